@@ -0,0 +1,147 @@
+"""
+로컬 에이전트 라우터 (LLM 호출 없이 planner/coach/analysis 분류)
+
+- 한/영 키워드·구문에 가중치를 주고, import 시점에 Aho-Corasick 오토마톤으로 미리 컴파일
+- 요청 문자열을 한 번만 훑어 에이전트별 점수를 합산 → (agent, confidence) 반환
+- confidence가 임계값보다 낮을 때만 orchestrator가 LLM을 호출
+
+환경변수 (선택)
+- ROUTER_CONFIDENCE_THRESHOLD=0.75
+"""
+
+from __future__ import annotations
+
+import os
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Literal, Tuple
+
+AgentKind = Literal["planner", "coach", "analysis"]
+
+# 동점일 때의 우선순위 (기존 _normalize_agent_choice 휴리스틱 순서와 동일)
+_AGENT_ORDER: Tuple[AgentKind, ...] = ("planner", "coach", "analysis")
+
+# 점수가 적을 때 confidence를 깎기 위한 사전값 (키워드 하나만 맞으면 LLM으로 넘기도록)
+_CONFIDENCE_PRIOR = 1.0
+
+_DEFAULT_CONFIDENCE_THRESHOLD = 0.75
+
+_KEYWORD_WEIGHTS: Dict[AgentKind, Dict[str, float]] = {
+    "planner": {
+        "계획": 2.0, "플랜": 2.0, "로드맵": 2.0, "전략": 1.5, "루틴": 1.5,
+        "일정": 1.0, "스케줄": 1.0, "단계별": 1.0, "목표 설정": 1.5, "세워": 1.0,
+        "짜줘": 1.0, "짜 줘": 1.0, "미션 추천": 1.5, "식단 짜": 1.5, "주간 계획": 2.0,
+        "plan": 2.0, "planning": 2.0, "roadmap": 2.0, "strategy": 1.5, "routine": 1.5,
+        "schedule": 1.0, "timeline": 1.5, "step by step": 1.0,
+    },
+    "coach": {
+        "코칭": 2.0, "조언": 2.0, "가이드": 1.5, "응원": 1.5, "힘들어": 1.5,
+        "힘들": 1.0, "동기": 1.0, "의지": 1.0, "포기": 1.0, "습관": 1.0,
+        "도와줘": 1.0, "고민": 1.0, "어떻게 하면": 1.0, "팁": 1.0, "격려": 1.5,
+        "coach": 2.0, "coaching": 2.0, "advice": 2.0, "guide": 1.5, "motivation": 1.5,
+        "tips": 1.0, "help me": 1.0,
+    },
+    "analysis": {
+        "분석": 2.0, "평가": 1.5, "검토": 1.5, "원인": 1.5, "통계": 1.5,
+        "추세": 1.5, "성공률": 1.5, "리포트": 1.5, "비교": 1.0, "데이터": 1.0,
+        "결과": 1.0, "피드백": 1.0, "왜": 1.0,
+        "analysis": 2.0, "analyze": 2.0, "analyse": 2.0, "review": 1.5, "evaluate": 1.5,
+        "statistics": 1.5, "stats": 1.5, "trend": 1.5, "report": 1.5, "why": 1.0,
+    },
+}
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    agent: AgentKind
+    confidence: float
+    scores: Dict[str, float]
+
+
+class _KeywordAutomaton:
+    """Aho-Corasick 오토마톤. 영문 키워드는 단어 경계에서만 매칭 (plan ⊄ explanation)."""
+
+    def __init__(self, weights: Dict[AgentKind, Dict[str, float]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # state -> [(agent, weight, keyword_len, ascii_word)]
+        self._out: List[List[Tuple[AgentKind, float, int, bool]]] = [[]]
+
+        for agent, table in weights.items():
+            for keyword, weight in table.items():
+                self._add(keyword.lower(), agent, weight)
+        self._build_fail_links()
+
+    def _add(self, keyword: str, agent: AgentKind, weight: float) -> None:
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((agent, weight, len(keyword), keyword.isascii()))
+
+    def _build_fail_links(self) -> None:
+        queue: Deque[int] = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                candidate = self._goto[f].get(ch, 0)
+                self._fail[nxt] = candidate if candidate != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def score(self, text: str) -> Dict[str, float]:
+        scores: Dict[str, float] = {agent: 0.0 for agent in _AGENT_ORDER}
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        n = len(text)
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for agent, weight, length, ascii_word in out[state]:
+                if ascii_word:
+                    start = i - length + 1
+                    if start > 0 and _is_ascii_alnum(text[start - 1]):
+                        continue
+                    if i + 1 < n and _is_ascii_alnum(text[i + 1]):
+                        continue
+                scores[agent] += weight
+        return scores
+
+
+def _is_ascii_alnum(ch: str) -> bool:
+    return ch.isascii() and ch.isalnum()
+
+
+_AUTOMATON = _KeywordAutomaton(_KEYWORD_WEIGHTS)
+
+
+def route_locally(user_request: str) -> RouteDecision:
+    """요청을 로컬에서 분류. 매칭이 없으면 analysis / confidence 0."""
+    scores = _AUTOMATON.score((user_request or "").lower())
+    total = sum(scores.values())
+    if total <= 0:
+        return RouteDecision(agent="analysis", confidence=0.0, scores=scores)
+
+    best = max(_AGENT_ORDER, key=lambda a: (scores[a], -_AGENT_ORDER.index(a)))
+    confidence = scores[best] / (total + _CONFIDENCE_PRIOR)
+    return RouteDecision(agent=best, confidence=confidence, scores=scores)
+
+
+def router_confidence_threshold() -> float:
+    raw = os.environ.get("ROUTER_CONFIDENCE_THRESHOLD")
+    if raw:
+        try:
+            return max(0.0, min(1.0, float(raw)))
+        except ValueError:
+            pass
+    return _DEFAULT_CONFIDENCE_THRESHOLD
@@ -9,6 +9,8 @@ LangGraph 기반 에이전트 오케스트레이션 시스템 (LangSmith tracing
 
 환경변수 (.env 권장)
 - UPSTAGE_API_KEY=...
+- UPSTAGE_API_BASE=https://api.upstage.ai/v1/solar  # 선택 (프록시/전용 엔드포인트)
+- LLM_HTTP_MAX_CONNECTIONS=100                   # LLM httpx 연결 풀 크기 (선택)
 - LANGCHAIN_TRACING_V2=true
 - LANGCHAIN_API_KEY=lsv2_...                     # LangSmith API key
 - LANGCHAIN_PROJECT=...                          # LangSmith project
@@ -24,29 +26,37 @@ LangGraph 기반 에이전트 오케스트레이션 시스템 (LangSmith tracing
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import TypedDict, Literal, Optional, Dict, Any, List, cast
+from typing import TYPE_CHECKING, TypedDict, Literal, Optional, Dict, Any, AsyncIterator, List, Tuple, cast
 from dotenv import load_dotenv
+import asyncio
+import hashlib
 import os
 import time
 import uuid
 import threading
 import random
 
-from langchain_upstage import ChatUpstage
 from langchain_core.messages import (
     BaseMessage,
+    BaseMessageChunk,
     HumanMessage,
     AIMessage,
     SystemMessage,
 )
-from langchain_core.runnables import RunnableConfig
-from langgraph.graph import StateGraph, END
+from langgraph.constants import END
 
-# LangSmith (LangChain tracer)
-try:
-    from langchain.callbacks.tracers.langchain import LangChainTracer
-except Exception:
-    LangChainTracer = None
+# 무거운 provider/그래프/tracing 모듈(langchain_upstage, openai, httpx, langgraph.graph)은
+# 처음 쓰는 시점에 import한다 (워커 기동/테스트 시작 시간 단축, scripts/bench_import_time.py 참고)
+if TYPE_CHECKING:
+    import httpx
+    from langchain_core.runnables import RunnableConfig
+    from langchain_upstage import ChatUpstage
+
+from agent_router import route_locally, router_confidence_threshold
+from llm_hedging import get_hedger
+from llm_resilience import acall_with_retry, call_with_retry, get_llm_circuit_breaker, guarded, llm_timeout_seconds
+from prompt_templates import get_prompt_registry
+from user_store import UserRecord, get_user_store
 
 # -----------------------------------------------------------------------------
 # Load env
@@ -104,87 +114,47 @@ ORCHESTRATOR_SYSTEM_PROMPT = """당신은 사용자의 요청을 분석하여 
 """
 
 # -----------------------------------------------------------------------------
-# In-memory personalization store (MVP) - 멀티워커/멀티프로세스에서는 불안정
+# Personalization store (user_store.py: 인메모리 기본, USER_STORE_DB_PATH면 워커 공용 SQLite)
 # -----------------------------------------------------------------------------
-_USER_STORE: Dict[str, Dict[str, Any]] = {}
-_USER_STORE_LOCK = threading.Lock()
-_MAX_USER_EVENTS = 30
-_USER_TTL_SECONDS = 60 * 60 * 24 * 14  # 14 days
-
-
-def _now_ts() -> float:
-    return time.time()
-
-
-def _prune_expired_user(user_id: str) -> None:
-    with _USER_STORE_LOCK:
-        record = _USER_STORE.get(user_id)
-        if not record:
-            return
-        if _now_ts() - record.get("updated_at", 0) > _USER_TTL_SECONDS:
-            _USER_STORE.pop(user_id, None)
-
-
 def _ensure_user_record(user_id: str) -> Dict[str, Any]:
-    _prune_expired_user(user_id)
-    with _USER_STORE_LOCK:
-        record = _USER_STORE.get(user_id)
-        if record is None:
-            record = {
-                "preferences": {},
-                "events": [],
-                "stats": {"success": 0, "fail": 0},
-                "updated_at": _now_ts(),
-            }
-            _USER_STORE[user_id] = record
-        return record
+    store = get_user_store()
+    store.ensure(user_id)
+    return store.read(user_id) or {}
 
 
 def update_user_context(user_id: str, payload: Optional[Dict[str, Any]]) -> None:
-    """개인화용 유저 컨텍스트를 인메모리에 업데이트(MVP)."""
+    """
+    개인화용 유저 컨텍스트를 저장소에 업데이트.
+    내용이 실제로 바뀐 경우에만 version이 올라간다. 직전과 같은 이벤트(재시도/중복 요청)는 다시 쌓지 않는다.
+    """
     if not user_id:
         return
-    record = _ensure_user_record(user_id)
-    with _USER_STORE_LOCK:
-        if not payload:
-            record["updated_at"] = _now_ts()
-            return
+    get_user_store().update(user_id, payload)
 
-        preferences = payload.get("preferences") or {}
-        if isinstance(preferences, dict):
-            record["preferences"].update(preferences)
 
-        event = payload.get("event")
-        if isinstance(event, dict):
-            event = {**event, "ts": _now_ts()}
-            record["events"].append(event)
-            record["events"] = record["events"][-_MAX_USER_EVENTS:]
+def get_user_context_version(user_id: Optional[str]) -> int:
+    """유저 컨텍스트 버전 (레코드가 없으면 0). 응답 캐시 키에 사용."""
+    if not user_id:
+        return 0
+    return get_user_store().version(user_id)
 
-            if event.get("mission_result") == "success":
-                record["stats"]["success"] += 1
-            elif event.get("mission_result") == "fail":
-                record["stats"]["fail"] += 1
 
-        record["updated_at"] = _now_ts()
+@dataclass(frozen=True)
+class UserContext:
+    """렌더링된 유저 컨텍스트. 저장소 레코드에 version과 함께 캐시된다."""
 
+    summary: str
+    message: Optional[SystemMessage]
+    fingerprint: str
 
-def summarize_user_context(user_id: Optional[str]) -> str:
-    """유저 컨텍스트를 요약하여 프롬프트에 주입."""
-    if not user_id:
-        return ""
-    _prune_expired_user(user_id)
-    with _USER_STORE_LOCK:
-        record = _USER_STORE.get(user_id)
-        if not record:
-            return ""
-
-        prefs = record.get("preferences", {})
-        events = list(record.get("events", []))
-        stats = dict(record.get("stats", {}))
-
-    recent = events[-3:] if events else []
+
+_EMPTY_USER_CONTEXT = UserContext(summary="", message=None, fingerprint="none")
+
+
+def _render_user_context(record: UserRecord) -> UserContext:
+    """레코드 → 요약 문자열 / system message / fingerprint (저장소 조각 락 안에서 호출됨)."""
     recent_strs: List[str] = []
-    for e in recent:
+    for e in record.events.recent(3):
         parts: List[str] = []
         if e.get("mission"):
             parts.append(f"미션:{e.get('mission')}")
@@ -199,18 +169,45 @@ def summarize_user_context(user_id: Optional[str]) -> str:
         if parts:
             recent_strs.append(" / ".join(parts))
 
+    prefs = record.preferences
     prefs_str = ", ".join([f"{k}:{v}" for k, v in prefs.items()]) if prefs else "없음"
     recent_str = " | ".join(recent_strs) if recent_strs else "없음"
-    total_success = stats.get("success", 0)
-    total_fail = stats.get("fail", 0)
 
-    return (
+    summary = (
         "유저 컨텍스트 요약:\n"
         f"- 선호/기본값: {prefs_str}\n"
         f"- 최근 기록(최대 3건): {recent_str}\n"
-        f"- 누적 통계: 성공 {total_success}회 / 실패 {total_fail}회\n"
+        f"- 누적 통계: 성공 {record.success}회 / 실패 {record.fail}회\n"
         "이 정보를 고려해 개인화된 답변을 제공하세요."
     )
+    return UserContext(
+        summary=summary,
+        message=build_context_message(summary),
+        fingerprint=hashlib.sha256(summary.encode("utf-8")).hexdigest()[:16],
+    )
+
+
+def get_user_context(user_id: Optional[str]) -> UserContext:
+    """
+    렌더링된 유저 컨텍스트. update_user_context로 version이 오를 때만 다시 렌더링하고,
+    그 전까지는 레코드에 캐시된 요약 / SystemMessage를 그대로 돌려준다.
+    """
+    if not user_id:
+        return _EMPTY_USER_CONTEXT
+    return get_user_store().render(user_id, _render_user_context) or _EMPTY_USER_CONTEXT
+
+
+def summarize_user_context(user_id: Optional[str]) -> str:
+    """유저 컨텍스트를 요약하여 프롬프트에 주입."""
+    return get_user_context(user_id).summary
+
+
+def get_user_context_fingerprint(user_id: Optional[str]) -> str:
+    """
+    렌더링된 컨텍스트 요약의 해시. version 카운터는 프로세스마다 달라서
+    워커/재시작을 넘는 캐시 키에는 내용 기반 값인 이 fingerprint를 쓴다.
+    """
+    return get_user_context(user_id).fingerprint
 
 
 def build_context_message(user_context_summary: str) -> Optional[SystemMessage]:
@@ -272,7 +269,11 @@ def get_langsmith_tracer() -> Optional[object]:
     global _CACHED_LANGSMITH_TRACER
     if _CACHED_LANGSMITH_TRACER is not None:
         return _CACHED_LANGSMITH_TRACER
-    if not _langsmith_tracing_enabled() or LangChainTracer is None:
+    if not _langsmith_tracing_enabled():
+        return None
+    try:
+        from langchain_core.tracers.langchain import LangChainTracer
+    except Exception:
         return None
     project = _langsmith_project() or "omteam"
     try:
@@ -302,23 +303,69 @@ def node_event(
 
 # -----------------------------------------------------------------------------
 # LLM (cached)
+# - 여러 요청/스레드가 동시에 처음 호출해도 한 번만 생성 (double-checked lock)
+# - httpx 클라이언트를 직접 만들어 연결 풀을 공유하고, 기동 시 warm_up_agent_system으로 미리 연결
 # -----------------------------------------------------------------------------
-_CACHED_LLM: Optional[ChatUpstage] = None
+_DEFAULT_UPSTAGE_API_BASE = "https://api.upstage.ai/v1/solar"
+
+_CACHED_LLM: Optional["ChatUpstage"] = None
+_CACHED_HTTP_CLIENTS: Optional[Tuple["httpx.Client", "httpx.AsyncClient"]] = None
+_LLM_LOCK = threading.Lock()
+
+
+def upstage_api_base() -> str:
+    return (os.environ.get("UPSTAGE_API_BASE") or _DEFAULT_UPSTAGE_API_BASE).rstrip("/")
+
+
+def _llm_http_limits() -> "httpx.Limits":
+    import httpx
+
+    raw = os.environ.get("LLM_HTTP_MAX_CONNECTIONS")
+    max_connections = 100
+    if raw:
+        try:
+            max_connections = max(1, int(raw))
+        except ValueError:
+            pass
+    return httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+
 
 def get_llm() -> ChatUpstage:
-    global _CACHED_LLM
-    if _CACHED_LLM is None:
-        api_key = os.environ.get("UPSTAGE_API_KEY")
-        if not api_key:
-            raise RuntimeError("UPSTAGE_API_KEY 환경 변수가 필요합니다.")
-
-        _CACHED_LLM = ChatUpstage(
-            model="solar-pro2",
-            upstage_api_key=api_key,
-        )
+    global _CACHED_LLM, _CACHED_HTTP_CLIENTS
+    if _CACHED_LLM is not None:
+        return _CACHED_LLM
+    with _LLM_LOCK:
+        if _CACHED_LLM is None:
+            api_key = os.environ.get("UPSTAGE_API_KEY")
+            if not api_key:
+                raise RuntimeError("UPSTAGE_API_KEY 환경 변수가 필요합니다.")
+
+            import httpx
+            from langchain_upstage import ChatUpstage
+
+            limits = _llm_http_limits()
+            _CACHED_HTTP_CLIENTS = (httpx.Client(limits=limits), httpx.AsyncClient(limits=limits))
+            _CACHED_LLM = ChatUpstage(
+                model="solar-pro2",
+                upstage_api_key=api_key,
+                upstage_api_base=upstage_api_base(),
+                timeout=llm_timeout_seconds() or None,
+                max_retries=0,  # 재시도는 llm_resilience가 (지터 백오프 + 서킷 브레이커)
+                http_client=_CACHED_HTTP_CLIENTS[0],
+                http_async_client=_CACHED_HTTP_CLIENTS[1],
+            )
     return _CACHED_LLM
 
 
+async def close_llm_clients() -> None:
+    global _CACHED_LLM, _CACHED_HTTP_CLIENTS
+    with _LLM_LOCK:
+        clients, _CACHED_HTTP_CLIENTS, _CACHED_LLM = _CACHED_HTTP_CLIENTS, None, None
+    if clients is not None:
+        clients[0].close()
+        await clients[1].aclose()
+
+
 # -----------------------------------------------------------------------------
 # State / Validation
 # -----------------------------------------------------------------------------
@@ -327,9 +374,13 @@ class AgentState(TypedDict):
     user_request: str
     user_id: Optional[str]
     user_context_summary: str
+    # user_context_summary의 미리 만든 system message (get_user_context 캐시, 없으면 노드에서 만듦)
+    user_context_message: Optional[SystemMessage]
     selected_agent: Optional[AgentKind]
     agent_response: str
     task_completed: bool
+    # True면 agent_response는 LLM 답이 아니라 build_error_response() 안내 문구 (호출 실패)
+    agent_failed: bool
 
     # tracing / correlation
     request_id: str
@@ -338,6 +389,9 @@ class AgentState(TypedDict):
     git_sha: str
     trace_enabled: bool
 
+    # True면 에이전트 노드가 토큰을 custom stream으로 흘려보냄 (stream_agent_system_async)
+    stream_tokens: bool
+
 
 def validate_user_request(user_request: str) -> Optional[str]:
     if not user_request or not user_request.strip():
@@ -365,13 +419,8 @@ def _normalize_agent_choice(raw: str, fallback_request: str) -> AgentKind:
     if "analysis" in s:
         return "analysis"
 
-    # fallback heuristics
-    r = (fallback_request or "").lower()
-    if any(k in r for k in ["계획", "전략", "로드맵", "plan", "strategy"]):
-        return "planner"
-    if any(k in r for k in ["코칭", "가이드", "조언", "coach", "guide", "advice"]):
-        return "coach"
-    return "analysis"
+    # fallback heuristics (로컬 라우터의 최고 점수 에이전트, 매칭 없으면 analysis)
+    return route_locally(fallback_request).agent
 
 
 def _trace_context_from_state(state: AgentState) -> TraceContext:
@@ -391,7 +440,7 @@ def _llm_config_from_state(state: AgentState, node_name: str) -> RunnableConfig:
     - tags/metadata: 노드 단위 관측용 필터링 키
     """
     return cast(
-        RunnableConfig,
+        "RunnableConfig",
         {
             "callbacks": build_callbacks(state["trace_enabled"]),
             "tags": [state["app_env"], f"node:{node_name}"],
@@ -414,14 +463,15 @@ def _llm_config_from_state(state: AgentState, node_name: str) -> RunnableConfig:
 # -----------------------------------------------------------------------------
 # Nodes
 # -----------------------------------------------------------------------------
-def orchestrator_node(state: AgentState) -> AgentState:
-    user_request = state.get("user_request") or _extract_last_human(state["messages"])
-    tc = _trace_context_from_state(state)
+def _context_message(state: AgentState) -> Optional[SystemMessage]:
+    return state.get("user_context_message") or build_context_message(state.get("user_context_summary", ""))
 
-    node_event("orchestrator", "start", tc, {"user_request_len": len(user_request)}, state["trace_enabled"])
+
+def _build_orchestrator_messages(state: AgentState) -> Tuple[str, List[BaseMessage]]:
+    user_request = state.get("user_request") or _extract_last_human(state["messages"])
 
     messages: List[BaseMessage] = [SystemMessage(content=ORCHESTRATOR_SYSTEM_PROMPT)]
-    ctx_msg = build_context_message(state.get("user_context_summary", ""))
+    ctx_msg = _context_message(state)
     if ctx_msg:
         messages.append(ctx_msg)
 
@@ -433,9 +483,61 @@ def orchestrator_node(state: AgentState) -> AgentState:
             )
         )
     )
+    return user_request, messages
+
+
+_ROUTING_COUNTS: Dict[str, int] = {"local": 0, "llm": 0}
+
+
+def get_routing_stats() -> Dict[str, Any]:
+    total = _ROUTING_COUNTS["local"] + _ROUTING_COUNTS["llm"]
+    return {
+        **_ROUTING_COUNTS,
+        "llm_calls_saved_ratio": round(_ROUTING_COUNTS["local"] / total, 4) if total else 0.0,
+    }
+
+
+def _route_without_llm(state: AgentState, user_request: str, tc: TraceContext) -> Optional[AgentKind]:
+    """로컬 라우터가 충분히 확신하면 에이전트를 반환, 아니면 None (LLM 호출 필요)."""
+    decision = route_locally(user_request)
+    if decision.confidence < router_confidence_threshold():
+        _ROUTING_COUNTS["llm"] += 1
+        return None
+    _ROUTING_COUNTS["local"] += 1
+    node_event(
+        "orchestrator",
+        "end",
+        tc,
+        {"selected_agent": decision.agent, "router": "local", "confidence": decision.confidence},
+        state["trace_enabled"],
+    )
+    return decision.agent
+
+
+def _orchestrator_result(state: AgentState, user_request: str, selected: AgentKind) -> AgentState:
+    return {
+        **state,
+        "user_request": user_request,
+        "selected_agent": selected,
+        "messages": state["messages"] + [AIMessage(content=f"[Orchestrator] 선택된 에이전트: {selected}")],
+    }
+
+
+def orchestrator_node(state: AgentState) -> AgentState:
+    user_request, messages = _build_orchestrator_messages(state)
+    tc = _trace_context_from_state(state)
+
+    node_event("orchestrator", "start", tc, {"user_request_len": len(user_request)}, state["trace_enabled"])
+
+    local_choice = _route_without_llm(state, user_request, tc)
+    if local_choice is not None:
+        return _orchestrator_result(state, user_request, local_choice)
 
     try:
-        resp = get_llm().invoke(messages, config=_llm_config_from_state(state, "orchestrator"))
+        # 라우팅은 휴리스틱으로 대체할 수 있으므로 재시도 없이 한 번만
+        resp = call_with_retry(
+            lambda: get_llm().invoke(messages, config=_llm_config_from_state(state, "orchestrator")), max_retries=0
+        )
         selected = _normalize_agent_choice(resp.content, user_request)
     except Exception as exc:
         # tracing은 LangSmith가 수행하므로, 여기서는 상태만 안정적으로 처리
@@ -443,12 +545,59 @@ def orchestrator_node(state: AgentState) -> AgentState:
         node_event("orchestrator", "error", tc, {"error": type(exc).__name__}, state["trace_enabled"])
 
     node_event("orchestrator", "end", tc, {"selected_agent": selected}, state["trace_enabled"])
+    return _orchestrator_result(state, user_request, selected)
+
+
+async def orchestrator_node_async(state: AgentState) -> AgentState:
+    """orchestrator_node의 비동기 버전 (graph.ainvoke 경로에서 사용)."""
+    user_request, messages = _build_orchestrator_messages(state)
+    tc = _trace_context_from_state(state)
+
+    node_event("orchestrator", "start", tc, {"user_request_len": len(user_request)}, state["trace_enabled"])
+
+    local_choice = _route_without_llm(state, user_request, tc)
+    if local_choice is not None:
+        return _orchestrator_result(state, user_request, local_choice)
+
+    speculation = _start_speculation(state, user_request)
+    try:
+        resp = await acall_with_retry(
+            lambda: get_llm().ainvoke(messages, config=_llm_config_from_state(state, "orchestrator")), max_retries=0
+        )
+        selected = _normalize_agent_choice(resp.content, user_request)
+    except Exception as exc:
+        selected = _normalize_agent_choice("", user_request)
+        node_event("orchestrator", "error", tc, {"error": type(exc).__name__}, state["trace_enabled"])
+    except BaseException:
+        if speculation is not None:
+            speculation[1].cancel()
+        raise
 
+    node_event("orchestrator", "end", tc, {"selected_agent": selected}, state["trace_enabled"])
+    result = _orchestrator_result(state, user_request, selected)
+    if speculation is not None:
+        return await _resolve_speculation(result, selected, *speculation)
+    return result
+
+
+def _build_agent_messages(state: AgentState, system_prompt: str) -> Tuple[str, List[BaseMessage]]:
+    user_request = state.get("user_request") or _extract_last_human(state["messages"])
+
+    messages: List[BaseMessage] = [SystemMessage(content=system_prompt)]
+    ctx_msg = _context_message(state)
+    if ctx_msg:
+        messages.append(ctx_msg)
+    messages.append(HumanMessage(content=user_request))
+    return user_request, messages
+
+
+def _agent_result(state: AgentState, node_name: AgentKind, agent_response: str, failed: bool = False) -> AgentState:
     return {
         **state,
-        "user_request": user_request,
-        "selected_agent": selected,
-        "messages": state["messages"] + [AIMessage(content=f"[Orchestrator] 선택된 에이전트: {selected}")],
+        "agent_response": agent_response,
+        "task_completed": True,
+        "agent_failed": failed,
+        "messages": state["messages"] + [AIMessage(content=f"[{node_name.upper()}]\n{agent_response}")],
     }
 
 
@@ -458,35 +607,72 @@ def _agent_node_common(
     node_name: AgentKind,
     system_prompt: str,
 ) -> AgentState:
-    user_request = state.get("user_request") or _extract_last_human(state["messages"])
+    user_request, messages = _build_agent_messages(state, system_prompt)
     tc = _trace_context_from_state(state)
 
     node_event(node_name, "start", tc, {"user_request_len": len(user_request)}, state["trace_enabled"])
 
-    messages: List[BaseMessage] = [SystemMessage(content=system_prompt)]
-    ctx_msg = build_context_message(state.get("user_context_summary", ""))
-    if ctx_msg:
-        messages.append(ctx_msg)
-    messages.append(HumanMessage(content=user_request))
+    try:
+        resp = call_with_retry(lambda: get_llm().invoke(messages, config=_llm_config_from_state(state, node_name)))
+        agent_response = resp.content
+        node_event(node_name, "end", tc, {"status": "success"}, state["trace_enabled"])
+    except Exception as exc:
+        node_event(node_name, "error", tc, {"error": type(exc).__name__}, state["trace_enabled"])
+        return _agent_result(state, node_name, build_error_response(), failed=True)
+
+    return _agent_result(state, node_name, agent_response)
+
+
+async def _astream_llm(messages: List[BaseMessage], config: RunnableConfig, node_name: AgentKind) -> BaseMessageChunk:
+    """ChatUpstage.astream으로 호출하면서 토큰을 그래프의 custom stream으로 내보내고, 합친 메시지를 반환."""
+    from langgraph.config import get_stream_writer
+
+    writer = get_stream_writer()
+    merged: Optional[BaseMessageChunk] = None
+    # 토큰이 이미 흘러나간 뒤에는 재시도할 수 없으므로 서킷 브레이커만 적용
+    with guarded(get_llm_circuit_breaker()):
+        async for chunk in get_llm().astream(messages, config=config):
+            if chunk.content:
+                writer({"node": node_name, "token": chunk.content})
+            merged = chunk if merged is None else merged + chunk
+    if merged is None:
+        raise RuntimeError("LLM stream returned no chunks")
+    return merged
+
+
+async def _agent_node_common_async(
+    *,
+    state: AgentState,
+    node_name: AgentKind,
+    system_prompt: str,
+) -> AgentState:
+    user_request, messages = _build_agent_messages(state, system_prompt)
+    tc = _trace_context_from_state(state)
+
+    node_event(node_name, "start", tc, {"user_request_len": len(user_request)}, state["trace_enabled"])
 
     try:
-        resp = get_llm().invoke(messages, config=_llm_config_from_state(state, node_name))
+        if state.get("stream_tokens"):
+            resp = await _astream_llm(messages, _llm_config_from_state(state, node_name), node_name)
+        else:
+            # 시도마다 헤지(opt-in): 노드의 pXX 지연을 넘기면 같은 호출을 하나 더 보내 먼저 끝난 쪽 사용
+            resp = await acall_with_retry(lambda: get_hedger().call(
+                node_name, lambda: get_llm().ainvoke(messages, config=_llm_config_from_state(state, node_name))
+            ))
         agent_response = resp.content
         node_event(node_name, "end", tc, {"status": "success"}, state["trace_enabled"])
     except Exception as exc:
-        agent_response = build_error_response()
         node_event(node_name, "error", tc, {"error": type(exc).__name__}, state["trace_enabled"])
+        return _agent_result(state, node_name, build_error_response(), failed=True)
 
-    return {
-        **state,
-        "agent_response": agent_response,
-        "task_completed": True,
-        "messages": state["messages"] + [AIMessage(content=f"[{node_name.upper()}]\n{agent_response}")],
-    }
+    return _agent_result(state, node_name, agent_response)
 
 
-def planner_agent_node(state: AgentState) -> AgentState:
-    system_prompt = f"""{SAFETY_SYSTEM_PROMPT}
+_PROMPTS = get_prompt_registry()
+
+# 에이전트 system prompt는 변수 구간이 없으므로 import 시 한 번만 렌더링해 둔다.
+_AGENT_SYSTEM_PROMPTS: Dict[AgentKind, str] = {
+    "planner": _PROMPTS.register("system.planner", f"""{SAFETY_SYSTEM_PROMPT}
 당신은 전문 계획 수립 에이전트(Planner Agent)입니다.
 - 명확하고 구체적인 단계별 계획 수립
 - 현실적인 타임라인 제시
@@ -494,12 +680,8 @@ def planner_agent_node(state: AgentState) -> AgentState:
 - 실행 가능한 액션 아이템 제공
 
 사용자의 요청에 대해 상세하고 실용적인 계획을 제공하세요.
-"""
-    return _agent_node_common(state=state, node_name="planner", system_prompt=system_prompt)
-
-
-def coach_agent_node(state: AgentState) -> AgentState:
-    system_prompt = f"""{SAFETY_SYSTEM_PROMPT}
+""", dedent=False).render().text,
+    "coach": _PROMPTS.register("system.coach", f"""{SAFETY_SYSTEM_PROMPT}
 당신은 전문 코칭 에이전트(Coach Agent)입니다.
 - 실용적이고 실행 가능한 조언
 - 단계별 가이드 제공
@@ -507,20 +689,116 @@ def coach_agent_node(state: AgentState) -> AgentState:
 - 과장된 격려보다는 현실적 코칭
 
 사용자의 요청에 대해 도움이 되는 코칭과 가이드를 제공하세요.
-"""
-    return _agent_node_common(state=state, node_name="coach", system_prompt=system_prompt)
-
-
-def analysis_agent_node(state: AgentState) -> AgentState:
-    system_prompt = f"""{SAFETY_SYSTEM_PROMPT}
+""", dedent=False).render().text,
+    "analysis": _PROMPTS.register("system.analysis", f"""{SAFETY_SYSTEM_PROMPT}
 당신은 전문 분석 에이전트(Analysis Agent)입니다.
 - 객관적이고 체계적인 분석
 - 근본 원인 파악
 - 명확한 결론 및 권장사항 제시
 
 사용자의 요청에 대해 깊이 있는 분석과 인사이트를 제공하세요.
-"""
-    return _agent_node_common(state=state, node_name="analysis", system_prompt=system_prompt)
+""", dedent=False).render().text,
+}
+_PROMPTS.register("system.orchestrator", ORCHESTRATOR_SYSTEM_PROMPT, dedent=False)
+
+
+def planner_agent_node(state: AgentState) -> AgentState:
+    return _agent_node_common(state=state, node_name="planner", system_prompt=_AGENT_SYSTEM_PROMPTS["planner"])
+
+
+async def planner_agent_node_async(state: AgentState) -> AgentState:
+    return await _agent_node_common_async(state=state, node_name="planner", system_prompt=_AGENT_SYSTEM_PROMPTS["planner"])
+
+
+def coach_agent_node(state: AgentState) -> AgentState:
+    return _agent_node_common(state=state, node_name="coach", system_prompt=_AGENT_SYSTEM_PROMPTS["coach"])
+
+
+async def coach_agent_node_async(state: AgentState) -> AgentState:
+    return await _agent_node_common_async(state=state, node_name="coach", system_prompt=_AGENT_SYSTEM_PROMPTS["coach"])
+
+
+def analysis_agent_node(state: AgentState) -> AgentState:
+    return _agent_node_common(state=state, node_name="analysis", system_prompt=_AGENT_SYSTEM_PROMPTS["analysis"])
+
+
+async def analysis_agent_node_async(state: AgentState) -> AgentState:
+    return await _agent_node_common_async(state=state, node_name="analysis", system_prompt=_AGENT_SYSTEM_PROMPTS["analysis"])
+
+
+# -----------------------------------------------------------------------------
+# Speculative execution (opt-in, async 경로 전용)
+# - orchestrator LLM과 동시에 로컬 휴리스틱이 고른 에이전트를 미리 실행
+# - orchestrator가 같은 에이전트를 고르면 결과를 그대로 쓰고, 아니면 취소 후 정상 경로로 재실행
+# -----------------------------------------------------------------------------
+_SPECULATION_STATS: Dict[str, int] = {
+    "attempts": 0,
+    "hits": 0,
+    "misses": 0,
+    "failed": 0,
+    "cancelled": 0,
+    "wasted_tokens": 0,
+}
+
+
+def _speculative_routing_enabled() -> bool:
+    return os.environ.get("SPECULATIVE_ROUTING", "").lower() in {"true", "1", "yes"}
+
+
+def get_speculation_stats() -> Dict[str, Any]:
+    decided = _SPECULATION_STATS["hits"] + _SPECULATION_STATS["misses"]
+    return {
+        **_SPECULATION_STATS,
+        "hit_rate": round(_SPECULATION_STATS["hits"] / decided, 4) if decided else 0.0,
+    }
+
+
+async def _speculative_agent_call(state: AgentState, node_name: AgentKind) -> AIMessage:
+    _, messages = _build_agent_messages(state, _AGENT_SYSTEM_PROMPTS[node_name])
+    return await acall_with_retry(lambda: get_llm().ainvoke(messages, config=_llm_config_from_state(state, node_name)))
+
+
+def _start_speculation(state: AgentState, user_request: str) -> Optional[Tuple[AgentKind, "asyncio.Task[AIMessage]"]]:
+    if not _speculative_routing_enabled():
+        return None
+    guess = _normalize_agent_choice("", user_request)
+    _SPECULATION_STATS["attempts"] += 1
+    return guess, asyncio.create_task(_speculative_agent_call(state, guess))
+
+
+async def _discard_speculation(task: "asyncio.Task[AIMessage]") -> None:
+    if task.done() and not task.cancelled() and task.exception() is None:
+        usage = getattr(task.result(), "usage_metadata", None) or {}
+        _SPECULATION_STATS["wasted_tokens"] += int(usage.get("total_tokens", 0))
+        return
+    if not task.done():
+        task.cancel()
+        _SPECULATION_STATS["cancelled"] += 1
+    await asyncio.gather(task, return_exceptions=True)
+
+
+async def _resolve_speculation(
+    state: AgentState,
+    selected: AgentKind,
+    guess: AgentKind,
+    task: "asyncio.Task[AIMessage]",
+) -> AgentState:
+    if selected != guess:
+        _SPECULATION_STATS["misses"] += 1
+        await _discard_speculation(task)
+        return state
+
+    try:
+        resp = await task
+    except Exception as exc:
+        # 추측은 맞았지만 호출이 실패 → 정상 경로(에이전트 노드)에서 다시 실행
+        _SPECULATION_STATS["failed"] += 1
+        node_event(guess, "error", _trace_context_from_state(state), {"error": type(exc).__name__, "speculative": True}, state["trace_enabled"])
+        return state
+
+    _SPECULATION_STATS["hits"] += 1
+    node_event(guess, "end", _trace_context_from_state(state), {"status": "success", "speculative": True}, state["trace_enabled"])
+    return _agent_result(state, guess, resp.content)
 
 
 def route_to_agent(state: AgentState) -> AgentKind:
@@ -530,26 +808,54 @@ def route_to_agent(state: AgentState) -> AgentKind:
     return "analysis"
 
 
+def route_after_orchestrator(state: AgentState) -> str:
+    """투기 실행이 이미 답을 만들었으면 종료, 아니면 선택된 에이전트로."""
+    if state.get("task_completed"):
+        return END
+    return route_to_agent(state)
+
+
+def route_entry(state: AgentState) -> str:
+    """호출자가 에이전트를 지정했으면 orchestrator를 건너뛰고 바로 해당 에이전트로 진입."""
+    if state.get("selected_agent") in ("planner", "coach", "analysis"):
+        return route_to_agent(state)
+    return "orchestrator"
+
+
 # -----------------------------------------------------------------------------
 # Graph (cached)
 # -----------------------------------------------------------------------------
 _CACHED_GRAPH = None
+_GRAPH_LOCK = threading.Lock()
 
 def create_agent_graph():
+    from langchain_core.runnables import RunnableLambda
+    from langgraph.graph import StateGraph
+
+    # 각 노드는 sync/async 구현을 함께 가지므로 graph.invoke / graph.ainvoke 모두 지원
     workflow = StateGraph(AgentState)
-    workflow.add_node("orchestrator", orchestrator_node)
-    workflow.add_node("planner", planner_agent_node)
-    workflow.add_node("coach", coach_agent_node)
-    workflow.add_node("analysis", analysis_agent_node)
+    workflow.add_node("orchestrator", RunnableLambda(orchestrator_node, afunc=orchestrator_node_async, name="orchestrator"))
+    workflow.add_node("planner", RunnableLambda(planner_agent_node, afunc=planner_agent_node_async, name="planner"))
+    workflow.add_node("coach", RunnableLambda(coach_agent_node, afunc=coach_agent_node_async, name="coach"))
+    workflow.add_node("analysis", RunnableLambda(analysis_agent_node, afunc=analysis_agent_node_async, name="analysis"))
 
-    workflow.set_entry_point("orchestrator")
+    workflow.set_conditional_entry_point(
+        route_entry,
+        {
+            "orchestrator": "orchestrator",
+            "planner": "planner",
+            "coach": "coach",
+            "analysis": "analysis",
+        },
+    )
     workflow.add_conditional_edges(
         "orchestrator",
-        route_to_agent,
+        route_after_orchestrator,
         {
             "planner": "planner",
             "coach": "coach",
             "analysis": "analysis",
+            END: END,
         },
     )
     workflow.add_edge("planner", END)
@@ -560,28 +866,77 @@ def create_agent_graph():
 
 def get_agent_graph():
     global _CACHED_GRAPH
-    if _CACHED_GRAPH is None:
-        _CACHED_GRAPH = create_agent_graph()
+    if _CACHED_GRAPH is not None:
+        return _CACHED_GRAPH
+    with _GRAPH_LOCK:
+        if _CACHED_GRAPH is None:
+            _CACHED_GRAPH = create_agent_graph()
     return _CACHED_GRAPH
 
 
+async def warm_up_agent_system() -> Dict[str, Any]:
+    """
+    첫 요청 전에 그래프 컴파일 + LLM 클라이언트 생성 + API 서버 연결(TCP/TLS)을 끝내 둔다.
+    그래프/클라이언트 생성 실패는 예외로 올리고(준비 안 됨), 연결 예열 실패는 결과에만 기록한다.
+    """
+    started = time.perf_counter()
+    await asyncio.to_thread(get_agent_graph)
+    graph_seconds = time.perf_counter() - started
+
+    llm = await asyncio.to_thread(get_llm)
+    connection = "skipped"
+    clients = _CACHED_HTTP_CLIENTS
+    if clients is not None:
+        # 응답 코드와 관계없이 요청이 오가면 TLS 세션이 맺어진 연결이 풀에 남는다
+        try:
+            api_key = llm.upstage_api_key.get_secret_value() if llm.upstage_api_key else ""
+            resp = await clients[1].get(
+                f"{upstage_api_base()}/models",
+                headers={"Authorization": f"Bearer {api_key}"},
+                timeout=llm_timeout_seconds() or None,
+            )
+            connection = f"ok ({resp.status_code})"
+        except Exception as exc:
+            connection = f"failed ({type(exc).__name__})"
+
+    return {
+        "graph_seconds": round(graph_seconds, 3),
+        "total_seconds": round(time.perf_counter() - started, 3),
+        "api_base": upstage_api_base(),
+        "connection": connection,
+    }
+
+
 # -----------------------------------------------------------------------------
 # Runner
 # -----------------------------------------------------------------------------
-def run_agent_system(
+def _prepare_agent_run(
     user_request: str,
-    user_id: Optional[str] = None,
-    user_payload: Optional[Dict[str, Any]] = None,
-) -> Dict[str, Any]:
+    user_id: Optional[str],
+    user_payload: Optional[Dict[str, Any]],
+    target_agent: Optional[AgentKind] = None,
+    include_context: bool = True,
+) -> Tuple[Optional[Dict[str, Any]], Optional[AgentState], Optional[RunnableConfig]]:
+    """
+    run_agent_system / run_agent_system_async 공통 준비 단계.
+    검증 실패 시 (early_result, None, None), 아니면 (None, initial_state, graph_config)를 반환.
+    target_agent가 주어지면 selected_agent를 미리 채워 orchestrator LLM 호출을 생략.
+    include_context=False면 유저 컨텍스트 system message를 넣지 않음 (토큰 예산 초과 시, 저장은 그대로).
+    """
     validation_error = validate_user_request(user_request)
     if validation_error:
-        return {
-            "messages": [],
-            "user_request": user_request,
-            "selected_agent": None,
-            "agent_response": validation_error,
-            "task_completed": False,
-        }
+        return (
+            {
+                "messages": [],
+                "user_request": user_request,
+                "selected_agent": None,
+                "agent_response": validation_error,
+                "task_completed": False,
+                "agent_failed": False,
+            },
+            None,
+            None,
+        )
 
     # 개인화 업데이트(MVP)
     if user_id:
@@ -592,7 +947,8 @@ def run_agent_system(
     app_env = os.environ.get("APP_ENV", "dev")
     git_sha = os.environ.get("GIT_SHA", "unknown")
 
-    user_context_summary = summarize_user_context(user_id)
+    user_context = get_user_context(user_id) if include_context else _EMPTY_USER_CONTEXT
+    user_context_summary = user_context.summary
     trace_enabled = should_trace_request(app_env, user_context_summary)
 
     initial_state: AgentState = {
@@ -600,21 +956,22 @@ def run_agent_system(
         "user_request": user_request,
         "user_id": user_id,
         "user_context_summary": user_context_summary,
-        "selected_agent": None,
+        "user_context_message": user_context.message,
+        "selected_agent": target_agent,
         "agent_response": "",
         "task_completed": False,
+        "agent_failed": False,
         "request_id": request_id,
         "thread_id": thread_id,
         "app_env": app_env,
         "git_sha": git_sha,
         "trace_enabled": trace_enabled,
+        "stream_tokens": False,
     }
 
-    graph = get_agent_graph()
-
     # 핵심: graph.invoke 레벨에도 callbacks/metadata 주입해서 "그래프 전체"를 하나의 상관관계로 묶음
     graph_config: RunnableConfig = cast(
-        RunnableConfig,
+        "RunnableConfig",
         {
             "callbacks": build_callbacks(trace_enabled),
             "tags": [app_env, "graph:agent_orchestration"],
@@ -631,11 +988,79 @@ def run_agent_system(
             },
         },
     )
+    return None, initial_state, graph_config
 
+
+def run_agent_system(
+    user_request: str,
+    user_id: Optional[str] = None,
+    user_payload: Optional[Dict[str, Any]] = None,
+    target_agent: Optional[AgentKind] = None,
+    include_context: bool = True,
+) -> Dict[str, Any]:
+    early_result, initial_state, graph_config = _prepare_agent_run(
+        user_request, user_id, user_payload, target_agent, include_context
+    )
+    if early_result is not None:
+        return early_result
+
+    graph = get_agent_graph()
     result = graph.invoke(initial_state, config=graph_config)
     return result
 
 
+async def run_agent_system_async(
+    user_request: str,
+    user_id: Optional[str] = None,
+    user_payload: Optional[Dict[str, Any]] = None,
+    target_agent: Optional[AgentKind] = None,
+    include_context: bool = True,
+) -> Dict[str, Any]:
+    """
+    run_agent_system의 비동기 버전.
+    graph.ainvoke → 각 노드의 ChatUpstage.ainvoke로 이어져 이벤트 루프를 막지 않음.
+    유저 컨텍스트 저장/조회(SQLite 저장소면 DB 읽기가 있을 수 있음)는 스레드에서 실행.
+    """
+    early_result, initial_state, graph_config = await asyncio.to_thread(
+        _prepare_agent_run, user_request, user_id, user_payload, target_agent, include_context
+    )
+    if early_result is not None:
+        return early_result
+
+    graph = get_agent_graph()
+    result = await graph.ainvoke(initial_state, config=graph_config)
+    return result
+
+
+async def stream_agent_system_async(
+    user_request: str,
+    user_id: Optional[str] = None,
+    user_payload: Optional[Dict[str, Any]] = None,
+    target_agent: Optional[AgentKind] = None,
+    include_context: bool = True,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    run_agent_system_async의 스트리밍 버전.
+    에이전트 노드가 생성하는 토큰마다 ("token", str)을, 마지막에 ("result", 최종 state)를 yield.
+    """
+    early_result, initial_state, graph_config = await asyncio.to_thread(
+        _prepare_agent_run, user_request, user_id, user_payload, target_agent, include_context
+    )
+    if early_result is not None:
+        yield "result", early_result
+        return
+
+    initial_state["stream_tokens"] = True
+    graph = get_agent_graph()
+    final_state: Dict[str, Any] = dict(initial_state)
+    async for mode, chunk in graph.astream(initial_state, config=graph_config, stream_mode=["custom", "values"]):
+        if mode == "custom":
+            yield "token", chunk["token"]
+        else:
+            final_state = chunk
+    yield "result", final_state
+
+
 # -----------------------------------------------------------------------------
 # Local test
 # -----------------------------------------------------------------------------
@@ -1,13 +1,28 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
+from fastapi.responses import StreamingResponse
 from app.api.schemas import ChatSessionRequest, ChatSessionResponse, ChatMessageRequest, ChatMessageResponse
-from app.api.services import create_chat_session_service, handle_chat_message_service
+from app.api.services import (
+    create_chat_session_service, handle_chat_message_service, open_chat_message_stream, mark_fallback_response
+)
 
 router = APIRouter(prefix="/ai", tags=["Chat"])
 
 @router.post("/chat/sessions", response_model=ChatSessionResponse)
-async def create_chat_session(request: ChatSessionRequest):
-    return await create_chat_session_service(request)
+async def create_chat_session(request: ChatSessionRequest, response: Response):
+    result = await create_chat_session_service(request)
+    mark_fallback_response(response)
+    return result
 
 @router.post("/chat/messages", response_model=ChatMessageResponse)
-async def handle_chat_message(request: ChatMessageRequest):
-    return await handle_chat_message_service(request)
\ No newline at end of file
+async def handle_chat_message(request: ChatMessageRequest, response: Response):
+    result = await handle_chat_message_service(request)
+    mark_fallback_response(response)
+    return result
+
+@router.post("/chat/messages/stream")
+async def stream_chat_message(request: ChatMessageRequest):
+    return StreamingResponse(
+        open_chat_message_stream(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
\ No newline at end of file
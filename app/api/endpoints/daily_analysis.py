@@ -1,9 +1,11 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 from app.api.schemas import DailyFeedbackRequest, DailyFeedbackResponse
-from app.api.services import get_daily_feedback_service
+from app.api.services import get_daily_feedback_service, mark_fallback_response
 
 router = APIRouter(prefix="/ai", tags=["Daily Analysis"])
 
 @router.post("/analysis/daily", response_model=DailyFeedbackResponse)
-async def create_daily_feedback(request: DailyFeedbackRequest):
-    return await get_daily_feedback_service(request)
\ No newline at end of file
+async def create_daily_feedback(request: DailyFeedbackRequest, response: Response):
+    result = await get_daily_feedback_service(request)
+    mark_fallback_response(response)
+    return result
\ No newline at end of file
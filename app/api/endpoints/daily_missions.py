@@ -1,9 +1,28 @@
-from fastapi import APIRouter
+from typing import List, Optional
+from fastapi import APIRouter, Query, Response
+from fastapi.responses import StreamingResponse
 from app.api.schemas import DailyMissionRequest, DailyMissionResponse
-from app.api.services import get_daily_missions_service
+from app.api.services import (
+    get_daily_missions_service, stream_daily_missions_batch_service, daily_missions_batch_concurrency,
+    mark_fallback_response,
+)
 
 router = APIRouter(prefix="/ai", tags=["Daily Missions"])
 
 @router.post("/missions/daily", response_model=DailyMissionResponse)
-async def create_daily_missions(request: DailyMissionRequest):
-    return await get_daily_missions_service(request)
\ No newline at end of file
+async def create_daily_missions(request: DailyMissionRequest, response: Response):
+    result = await get_daily_missions_service(request)
+    mark_fallback_response(response)
+    return result
+
+@router.post("/missions/daily:batch")
+async def create_daily_missions_batch(
+    requests: List[DailyMissionRequest],
+    concurrency: Optional[int] = Query(None, ge=1, description="Max in-flight items (default: DAILY_MISSIONS_BATCH_CONCURRENCY)"),
+):
+    """Streams one DailyMissionBatchItem JSON object per line as each item completes."""
+    limit = min(concurrency or daily_missions_batch_concurrency(), daily_missions_batch_concurrency())
+    return StreamingResponse(
+        stream_daily_missions_batch_service(requests, limit),
+        media_type="application/x-ndjson",
+    )
\ No newline at end of file
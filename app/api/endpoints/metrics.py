@@ -0,0 +1,39 @@
+import asyncio
+
+from fastapi import APIRouter
+from agent_system import get_routing_stats, get_speculation_stats
+from llm_hedging import get_hedger
+from llm_resilience import get_llm_resilience_stats
+from prompt_templates import get_prompt_registry
+from user_store import get_user_store
+from app.core.admission import get_admission_controller
+from app.core.cache import get_response_cache
+from app.core.disk_cache import get_disk_response_cache
+from app.core.near_dup import get_near_dup_index
+from app.core.singleflight import get_single_flight
+from app.core.token_budget import get_token_budget_stats
+from app.api.services import get_fallback_stats
+
+router = APIRouter(prefix="/ai", tags=["Metrics"])
+
+@router.get("/metrics")
+async def get_metrics():
+    disk_cache = get_disk_response_cache()
+    # Both SQLite snapshots count rows under a lock that a flush or cache write may hold.
+    user_store_snapshot = await asyncio.to_thread(get_user_store().snapshot)
+    disk_cache_snapshot = await asyncio.to_thread(disk_cache.snapshot) if disk_cache is not None else None
+    return {
+        "admission": get_admission_controller().snapshot(),
+        "routing": get_routing_stats(),
+        "speculation": get_speculation_stats(),
+        "llm": get_llm_resilience_stats(),
+        "llm_hedging": get_hedger().snapshot(),
+        "single_flight": get_single_flight().snapshot(),
+        "response_cache": get_response_cache().snapshot(),
+        "response_cache_disk": disk_cache_snapshot,
+        "near_dup_cache": get_near_dup_index().snapshot(),
+        "prompts": get_prompt_registry().snapshot(),
+        "token_budget": get_token_budget_stats().snapshot(),
+        "fallback": get_fallback_stats(),
+        "user_store": user_store_snapshot,
+    }
@@ -1,9 +1,11 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 from app.api.schemas import WeeklyAnalysisRequest, WeeklyAnalysisResponse
-from app.api.services import get_weekly_analysis_service
+from app.api.services import get_weekly_analysis_service, mark_fallback_response
 
 router = APIRouter(prefix="/ai", tags=["Weekly Analysis"])
 
 @router.post("/analysis/weekly", response_model=WeeklyAnalysisResponse)
-async def create_weekly_analysis(request: WeeklyAnalysisRequest):
-    return await get_weekly_analysis_service(request)
\ No newline at end of file
+async def create_weekly_analysis(request: WeeklyAnalysisRequest, response: Response):
+    result = await get_weekly_analysis_service(request)
+    mark_fallback_response(response)
+    return result
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""
+Rule-based answers used when the agent misses the endpoint deadline or fails.
+
+No LLM is involved: missions are built from the user's preferred exercises, minimum
+exercise minutes and recent difficulty history; feedback and weekly texts come from
+templates keyed on Intent and success ratios. Every answer validates against the
+endpoint's response model; the endpoint marks it with the X-AI-Fallback header.
+"""
+
+from typing import List, Optional, Tuple
+
+from app.api.history import CompactHistory, compact_mission_history
+from app.api.schemas import (
+    BotMessage, BotMessageOption, ChatMessageRequest, ChatMessageResponse, ChatSessionRequest,
+    ChatSessionResponse, ChatState, DailyFeedbackRequest, DailyFeedbackResponse, DailyMissionRequest,
+    DailyMissionResponse, Difficulty, EncouragementCandidate, Intent, Mission, MissionResult, MissionType,
+    WeeklyAnalysisRequest, WeeklyAnalysisResponse,
+)
+
+_DIFFICULTIES = list(Difficulty)
+_DEFAULT_EXERCISE = "걷기"
+_KCAL_PER_MINUTE = {Difficulty.EASY: 4, Difficulty.NORMAL: 6, Difficulty.HARD: 8}
+_MINUTES_FACTOR = {Difficulty.EASY: 1.0, Difficulty.NORMAL: 1.25, Difficulty.HARD: 1.5}
+_DIET_MISSIONS = {
+    Difficulty.EASY: ("물 1.5L 나눠 마시기", 5),
+    Difficulty.NORMAL: ("저녁 8시 이후 야식 참기", 10),
+    Difficulty.HARD: ("세 끼 모두 채소 반찬 챙기기", 15),
+}
+
+_ENCOURAGEMENTS = {
+    Intent.PRAISE: ("잘하고 있어요", "지금 흐름이라면 목표에 충분히 도달할 수 있어요."),
+    Intent.RETRY: ("다시 도전해봐요", "내일은 부담 없는 짧은 미션부터 가볍게 시작해봐요."),
+    Intent.NORMAL: ("꾸준함이 답이에요", "오늘처럼 한 걸음씩 쌓이면 목표가 가까워져요."),
+    Intent.PUSH: ("지금 움직여볼까요?", "5분만 투자해도 오늘의 기록이 달라져요."),
+}
+
+_MISSION_TYPE_LABELS = {MissionType.EXERCISE: "운동", MissionType.DIET: "식단"}
+
+
+def success_ratio(successes: int, failures: int) -> Optional[float]:
+    total = successes + failures
+    return successes / total if total > 0 else None
+
+
+def _step(difficulty: Difficulty, delta: int) -> Difficulty:
+    index = min(max(_DIFFICULTIES.index(difficulty) + delta, 0), len(_DIFFICULTIES) - 1)
+    return _DIFFICULTIES[index]
+
+
+def next_difficulty(history: CompactHistory) -> Difficulty:
+    """Steps up after a success streak or a high success ratio, down after repeated failures."""
+    if history.latest is None:
+        return Difficulty.EASY
+    ratio = success_ratio(history.successes, history.failures) or 0.0
+    streak_result, streak_length = history.current_streak
+    if (streak_result == MissionResult.SUCCESS and streak_length >= 3) or ratio >= 0.8:
+        return _step(history.latest.difficulty, 1)
+    if (streak_result == MissionResult.FAILURE and streak_length >= 2) or ratio < 0.4:
+        return _step(history.latest.difficulty, -1)
+    return history.latest.difficulty
+
+
+def daily_missions_fallback(request: DailyMissionRequest) -> DailyMissionResponse:
+    history = compact_mission_history(request.recentMissionHistory)
+    difficulty = next_difficulty(history)
+    exercises = [e.strip() for e in request.onboarding.preferredExercises if e.strip()] or [_DEFAULT_EXERCISE]
+    base_minutes = max(request.onboarding.minExerciseMinutes, 10)
+    # Time was the main blocker this week -> keep the session at the user's minimum.
+    factor = 1.0 if any("시간" in reason for reason in request.weeklyFailureReasons) else _MINUTES_FACTOR[difficulty]
+    minutes = round(base_minutes * factor)
+
+    missions: List[Mission] = [
+        Mission(
+            name=f"{exercises[0]} {minutes}분",
+            type=MissionType.EXERCISE,
+            difficulty=difficulty,
+            estimatedMinutes=minutes,
+            estimatedCalories=minutes * _KCAL_PER_MINUTE[difficulty],
+        )
+    ]
+    if len(exercises) > 1:
+        light_minutes = max(base_minutes // 2, 10)
+        missions.append(Mission(
+            name=f"{exercises[1]} {light_minutes}분",
+            type=MissionType.EXERCISE,
+            difficulty=Difficulty.EASY,
+            estimatedMinutes=light_minutes,
+            estimatedCalories=light_minutes * _KCAL_PER_MINUTE[Difficulty.EASY],
+        ))
+    diet_name, diet_minutes = _DIET_MISSIONS[difficulty]
+    missions.append(Mission(
+        name=diet_name, type=MissionType.DIET, difficulty=difficulty,
+        estimatedMinutes=diet_minutes, estimatedCalories=0,
+    ))
+    return DailyMissionResponse(missions=missions)
+
+
+def feedback_intents(result: MissionResult, ratio: Optional[float]) -> Tuple[Intent, Intent]:
+    """(primary, secondary) intent for today's result and the recent success ratio."""
+    if result == MissionResult.SUCCESS:
+        return (Intent.PRAISE, Intent.NORMAL) if (ratio or 0.0) >= 0.6 else (Intent.NORMAL, Intent.PUSH)
+    if ratio is not None and ratio < 0.5:
+        return Intent.RETRY, Intent.PUSH
+    return Intent.PUSH, Intent.RETRY
+
+
+def _candidate(intent: Intent) -> EncouragementCandidate:
+    title, message = _ENCOURAGEMENTS[intent]
+    return EncouragementCandidate(intent=intent, title=title, message=message)
+
+
+def daily_feedback_fallback(request: DailyFeedbackRequest) -> DailyFeedbackResponse:
+    mission, summary = request.todayMission, request.recentSummary
+    ratio = success_ratio(summary.successDays, summary.failureDays)
+    primary, secondary = feedback_intents(mission.result, ratio)
+
+    outcome = "성공했어요" if mission.result == MissionResult.SUCCESS else "아쉽게 실패했어요"
+    text = f"오늘 {_MISSION_TYPE_LABELS[mission.missionType]} 미션({mission.difficulty.value})은 {outcome}."
+    if mission.result == MissionResult.FAILURE and mission.failureReason:
+        text += f" '{mission.failureReason}' 때문이었다면 내일은 난이도나 시간을 조금 조정해봐요."
+    if ratio is not None:
+        text += (
+            f" 최근 {summary.successDays + summary.failureDays}일 중 {summary.successDays}일 성공"
+            f"(성공률 {round(ratio * 100)}%)이에요. {_ENCOURAGEMENTS[primary][1]}"
+        )
+    return DailyFeedbackResponse(
+        feedbackText=text,
+        encouragementCandidates=[_candidate(primary), _candidate(secondary)],
+    )
+
+
+def weekly_analysis_fallback(request: WeeklyAnalysisRequest) -> WeeklyAnalysisResponse:
+    stats = request.weeklyStats
+    ranked = sorted(request.failureReasonsRanked, key=lambda item: -item.count)
+    if ranked:
+        main_reason = f"{ranked[0].reason} ({ranked[0].count}회)"
+    elif stats.failureDays:
+        main_reason = "뚜렷한 실패 원인이 기록되지 않았어요."
+    else:
+        main_reason = "이번 주에는 실패한 날이 없었어요."
+
+    ratio = success_ratio(stats.successDays, stats.failureDays)
+    summary = f"이번 주 {stats.totalDays}일 중 {stats.successDays}일 미션에 성공했어요."
+    if ratio is None:
+        advice = "기록이 아직 부족해요. 다음 주에는 가벼운 미션부터 꾸준히 기록해봐요."
+    elif ratio >= 0.8:
+        advice = "아주 좋은 흐름이에요. 지금 루틴을 유지하면서 난이도를 한 단계 올려봐도 좋아요."
+    elif ratio >= 0.5:
+        advice = "절반 이상 해냈어요. 실패가 잦았던 요일의 미션 시간을 조금 줄여서 유지해봐요."
+    else:
+        advice = "이번 주는 쉽지 않았네요. 다음 주에는 미션 난이도를 낮춰 성공 경험부터 쌓아봐요."
+    if ranked:
+        advice += f" 특히 '{ranked[0].reason}'에 대비한 계획을 미리 세워두면 도움이 돼요."
+    return WeeklyAnalysisResponse(mainFailureReason=main_reason, overallFeedback=f"{summary} {advice}")
+
+
+def chat_session_fallback(request: ChatSessionRequest) -> ChatSessionResponse:
+    return ChatSessionResponse(botMessage=BotMessage(
+        messageId=0,
+        text=f"안녕하세요! '{request.initialContext.appGoal}' 목표를 함께 이뤄봐요. 요즘 가장 고민되는 부분이 무엇인가요?",
+        options=[
+            BotMessageOption(label="운동이 너무 힘들어요", value="EXERCISE_HARD"),
+            BotMessageOption(label="식단 관리가 어려워요", value="DIET_HARD"),
+            BotMessageOption(label="시간이 부족해요", value="NO_TIME"),
+        ],
+    ))
+
+
+def chat_message_fallback(request: ChatMessageRequest) -> ChatMessageResponse:
+    return ChatMessageResponse(
+        botMessage=BotMessage(
+            messageId=0,
+            text="지금은 답변을 준비하는 데 시간이 조금 걸리고 있어요. 잠시 후 다시 말씀해 주시겠어요?",
+            options=[
+                BotMessageOption(label="다시 물어볼게요", value="RETRY"),
+                BotMessageOption(label="대화 마치기", value="END"),
+            ],
+        ),
+        state=ChatState(isTerminal=False),
+    )
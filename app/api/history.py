@@ -0,0 +1,131 @@
+"""
+Compaction of mission history for prompts and the user context store.
+
+Clients may send any amount of RecentMissionHistoryItem. Instead of one prompt line per
+mission, long histories are aggregated into a fixed-size block: totals and date range,
+counts per type x difficulty x result, current and longest streaks, the most frequent
+failure reasons, and the last few raw items.
+
+Env (optional)
+- MISSION_HISTORY_RAW_ITEMS=5   # raw items kept verbatim; shorter histories are not aggregated
+"""
+
+import os
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from app.api.schemas import Difficulty, MissionResult, MissionType, RecentMissionHistoryItem
+
+_DEFAULT_RAW_ITEMS = 5
+_TOP_FAILURE_REASONS = 3
+
+_RESULT_LABELS = {MissionResult.SUCCESS: "성공", MissionResult.FAILURE: "실패"}
+
+
+def mission_history_raw_items() -> int:
+    raw = os.environ.get("MISSION_HISTORY_RAW_ITEMS")
+    if raw:
+        try:
+            return max(1, int(raw))
+        except ValueError:
+            pass
+    return _DEFAULT_RAW_ITEMS
+
+
+def format_mission_item(item: RecentMissionHistoryItem) -> str:
+    line = (
+        f"- 날짜: {item.date.isoformat()}, 유형: {item.missionType.value}, "
+        f"난이도: {item.difficulty.value}, 결과: {item.result.value}"
+    )
+    return line + (f", 실패 사유: {item.failureReason}" if item.failureReason else "")
+
+
+@dataclass(frozen=True)
+class CompactHistory:
+    total: int
+    successes: int
+    failures: int
+    first_date: Optional[str]
+    last_date: Optional[str]
+    counts: Tuple[Tuple[MissionType, Difficulty, int, int], ...]  # (type, difficulty, successes, failures)
+    current_streak: Tuple[Optional[MissionResult], int]
+    longest_success_streak: int
+    top_failure_reasons: Tuple[Tuple[str, int], ...]
+    recent: Tuple[RecentMissionHistoryItem, ...]  # oldest -> newest
+
+    @property
+    def latest(self) -> Optional[RecentMissionHistoryItem]:
+        return self.recent[-1] if self.recent else None
+
+    @property
+    def aggregated(self) -> bool:
+        return self.total > len(self.recent)
+
+    def prompt_lines(self) -> List[str]:
+        """
+        Aggregate lines first, then the raw recent items (oldest -> newest).
+        When aggregated, the "- 최근 N건:" header and its indented items form one multi-line entry,
+        so the token budgeter (which drops whole entries) never leaves items without their header.
+        """
+        recent_lines = [format_mission_item(item) for item in self.recent]
+        if not self.aggregated:
+            return recent_lines
+
+        lines = [f"- 기간: {self.first_date} ~ {self.last_date} (총 {self.total}건, 성공 {self.successes} / 실패 {self.failures})"]
+        lines.append("- 유형/난이도별: " + ", ".join(
+            f"{mission_type.value}/{difficulty.value} 성공 {s}·실패 {f}"
+            for mission_type, difficulty, s, f in self.counts
+        ))
+        streak_result, streak_length = self.current_streak
+        lines.append(
+            f"- 현재 연속: {_RESULT_LABELS[streak_result]} {streak_length}회 / 최장 연속 성공: {self.longest_success_streak}회"
+        )
+        if self.top_failure_reasons:
+            lines.append("- 주요 실패 사유: " + ", ".join(f"{reason} {count}회" for reason, count in self.top_failure_reasons))
+        lines.append("\n".join([f"- 최근 {len(self.recent)}건:"] + [f"  {line}" for line in recent_lines]))
+        return lines
+
+
+def compact_mission_history(
+    items: Sequence[RecentMissionHistoryItem], raw_items: Optional[int] = None
+) -> CompactHistory:
+    raw_items = mission_history_raw_items() if raw_items is None else max(1, raw_items)
+    ordered = sorted(items, key=lambda item: item.date)
+
+    by_kind: Counter = Counter()
+    reasons: Counter = Counter()
+    longest = run = 0
+    for item in ordered:
+        by_kind[(item.missionType, item.difficulty, item.result)] += 1
+        if item.result == MissionResult.SUCCESS:
+            run += 1
+            longest = max(longest, run)
+        else:
+            run = 0
+            if item.failureReason:
+                reasons[item.failureReason.strip()] += 1
+
+    current_result = ordered[-1].result if ordered else None
+    current_length = 0
+    for item in reversed(ordered):
+        if item.result != current_result:
+            break
+        current_length += 1
+
+    kinds = sorted({(t, d) for t, d, _ in by_kind}, key=lambda kind: (kind[0].value, list(Difficulty).index(kind[1])))
+    successes = sum(n for (_, _, r), n in by_kind.items() if r == MissionResult.SUCCESS)
+    return CompactHistory(
+        total=len(ordered),
+        successes=successes,
+        failures=len(ordered) - successes,
+        first_date=ordered[0].date.isoformat() if ordered else None,
+        last_date=ordered[-1].date.isoformat() if ordered else None,
+        counts=tuple(
+            (t, d, by_kind[(t, d, MissionResult.SUCCESS)], by_kind[(t, d, MissionResult.FAILURE)]) for t, d in kinds
+        ),
+        current_streak=(current_result, current_length),
+        longest_success_streak=longest,
+        top_failure_reasons=tuple(reasons.most_common(_TOP_FAILURE_REASONS)),
+        recent=tuple(ordered[-raw_items:]),
+    )
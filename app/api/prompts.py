@@ -0,0 +1,164 @@
+"""
+Prompt templates for the API services.
+
+Registered once at import in the shared prompt registry; services render only the
+variable parts. Each template's version id is part of the response cache keys.
+"""
+
+from prompt_templates import get_prompt_registry
+
+_PROMPTS = get_prompt_registry()
+
+DAILY_MISSIONS_PROMPT = _PROMPTS.register("api.daily_missions", """
+    사용자 ID: {user_id}
+    사용자 목표: {app_goal}
+    근무 시간 유형: {work_time_type}
+    운동 가능 시간: {available_start} ~ {available_end} ({min_exercise_minutes}분 이상)
+    선호 운동: {preferred_exercises}
+    생활 패턴: {lifestyle_type}
+
+    최근 미션 이력:
+    {mission_history}
+
+    주간 주요 실패 원인: {weekly_failure_reasons}
+
+    위 정보를 바탕으로 사용자에게 오늘 수행할 데일리 추천 미션 2~3개를 추천해주세요.
+    미션은 EXERCISE 또는 DIET 유형으로 구성될 수 있습니다.
+    난이도는 EASY, NORMAL, HARD 중 하나여야 합니다.
+    각 미션에 대해 예상 소요 시간(분)과 예상 소모 칼로리(kcal)를 함께 알려주세요.
+    응답은 반드시 아래 JSON 형식으로만 해주세요:
+    ```json
+    {{
+        "missions": [
+            {{
+                "name": "미션 이름 1",
+                "type": "EXERCISE",
+                "difficulty": "EASY",
+                "estimatedMinutes": 20,
+                "estimatedCalories": 80
+            }},
+            {{
+                "name": "미션 이름 2",
+                "type": "DIET",
+                "difficulty": "NORMAL",
+                "estimatedMinutes": 10,
+                "estimatedCalories": 0
+            }}
+        ]
+    }}
+    ```
+    """)
+
+DAILY_FEEDBACK_PROMPT = _PROMPTS.register("api.daily_feedback", """
+    사용자 ID: {user_id}
+    분석 대상 날짜: {target_date}
+    오늘 수행한 미션:
+    - 유형: {mission_type}
+    - 난이도: {difficulty}
+    - 결과: {result}{failure_reason}
+    최근 요약:
+    - 성공 일수: {success_days}일
+    - 실패 일수: {failure_days}일
+
+    위 정보를 바탕으로 다음 내용을 분석하여 피드백을 제공해주세요.
+    1. 오늘 미션 수행 결과 및 최근 기록을 반영한 분석형 AI 피드백 문장을 생성해주세요.
+    2. 메인 화면에 표시할 격려/응원 메시지 후보 2~4개를 생성해주세요. 각 메시지는 'intent'(PRAISE, RETRY, NORMAL, PUSH 중 하나), 'title', 'message'를 포함해야 합니다.
+       - PRAISE: 잘하고 있을 때 칭찬 및 목표 상기.
+       - RETRY: 실패가 반복되거나 재도전이 필요할 때 격려.
+       - NORMAL: 보통일 때 목표 달성을 격려.
+       - PUSH: 행동을 촉구할 때.
+
+    응답은 반드시 아래 JSON 형식으로만 해주세요:
+    ```json
+    {{
+        "feedbackText": "오늘 미션 수행 결과 및 최근 기록을 반영한 분석형 AI 피드백 문장",
+        "encouragementCandidates": [
+            {{
+                "intent": "PRAISE",
+                "title": "잘하고 있어요",
+                "message": "이대로만 하면 목표에 도달할 수 있어요."
+            }},
+            {{
+                "intent": "RETRY",
+                "title": "다음은 다시 도전해봐요",
+                "message": "내일은 5분짜리 미션부터 가볍게 시작해봐요."
+            }}
+        ]
+    }}
+    ```
+    """)
+
+WEEKLY_ANALYSIS_PROMPT = _PROMPTS.register("api.weekly_analysis", """
+    사용자 ID: {user_id}
+    주간 분석 범위: {week_start} ~ {week_end}
+    주간 통계:
+    - 총 일수: {total_days}일
+    - 성공 일수: {success_days}일
+    - 실패 일수: {failure_days}일
+    주요 실패 원인 (횟수 기준):
+    {failure_reasons}
+
+    위 주간 데이터를 종합적으로 분석하여 사용자에게 다음 두 가지 정보를 제공해주세요.
+    1. 주간 주요 실패 원인을 요약한 문장 (mainFailureReason).
+    2. 사용자 유지/개선 중심의 종합 피드백 문장 (overallFeedback).
+
+    응답은 반드시 아래 JSON 형식으로만 해주세요:
+    ```json
+    {{
+        "mainFailureReason": "주간 주요 실패 원인 요약 (예: 운동 가능 시간 확보 실패)",
+        "overallFeedback": "유지/개선 중심 종합 피드백 (예: 이번 주에는 일정 제약으로 미션 실패가 많았네요. 다음 주에는 시간을 조금 더 확보해보세요.)"
+    }}
+    ```
+    """)
+
+CHAT_SESSION_PROMPT = _PROMPTS.register("api.chat_session", """
+    새로운 채팅 세션이 시작되었습니다.
+    사용자 ID: {user_id}
+    세션 ID: {session_id}
+    사용자 초기 컨텍스트:
+    - 앱 사용 목적: {app_goal}
+    - 생활 패턴: {lifestyle_type}
+
+    이 정보를 바탕으로 사용자에게 친근하게 인사하고, 어떤 점이 가장 고민되는지 물어보는 초기 챗봇 메시지를 생성해주세요.
+    메시지에는 2~3개의 선택지 옵션을 포함하여 사용자가 쉽게 대화를 시작할 수 있도록 유도해주세요.
+    응답은 반드시 아래 JSON 형식으로만 해주세요:
+    ```json
+    {{
+        "botMessage": {{
+            "messageId": 5001,
+            "text": "안녕하세요! 요즘 운동이나 생활 습관에서 가장 고민되는 부분이 무엇인가요?",
+            "options": [
+                {{"label": "운동이 너무 힘들어요", "value": "EXERCISE_HARD"}},
+                {{"label": "식단 관리가 어려워요", "value": "DIET_HARD"}}
+            ]
+        }}
+    }}
+    ```
+    """)
+
+CHAT_MESSAGE_PROMPT = _PROMPTS.register("api.chat_message", """
+    이전 대화 세션 ID: {session_id}
+    사용자 ID: {user_id}
+    사용자 입력: {user_input}
+    입력 시각: {timestamp}
+
+    사용자의 입력에 대해 챗봇 메시지를 생성해주세요.
+    필요하다면 2~3개의 선택지 옵션을 제공해주세요.
+    대화가 종료되어야 할 시점에는 "state.isTerminal"을 true로 설정해주세요.
+    응답은 반드시 아래 JSON 형식으로만 해주세요:
+    ```json
+    {{
+        "botMessage": {{
+            "messageId": 5002,
+            "text": "사용자의 입력에 대한 챗봇 응답 메시지",
+            "options": [
+                {{"label": "선택지 1", "value": "VALUE_1"}},
+                {{"label": "선택지 2", "value": "VALUE_2"}}
+            ]
+        }},
+        "state": {{
+            "isTerminal": false
+        }}
+    }}
+    ```
+    """)
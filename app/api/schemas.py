@@ -61,6 +61,18 @@ class Mission(BaseModel):
 class DailyMissionResponse(BaseModel):
     missions: List[Mission]
 
+# --- /ai/missions/daily:batch Models (NDJSON lines) ---
+class DailyMissionBatchError(BaseModel):
+    status: int
+    detail: str
+
+class DailyMissionBatchItem(BaseModel):
+    index: int
+    userId: int
+    response: Optional[DailyMissionResponse] = None
+    error: Optional[DailyMissionBatchError] = None
+    fallback: Optional[str] = None  # set when the item was answered by the rule-based fallback
+
 # --- /ai/analysis/daily Models ---
 class Intent(str, Enum):
     PRAISE = "PRAISE"
@@ -1,37 +1,78 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator, Callable, Hashable, Tuple, Type
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from functools import partial
+import asyncio
+import hashlib
 import json
+import logging
+import os
+import re
 from datetime import date, time, datetime
 from pydantic import BaseModel
 
-from fastapi import HTTPException
+from fastapi import HTTPException, Response
 
-from agent_system import run_agent_system
+from prompt_templates import PromptTemplate, RenderedPrompt, estimate_tokens, get_prompt_registry
+
+from agent_system import (
+    AgentKind, get_user_context_fingerprint, get_user_context_version, run_agent_system_async,
+    stream_agent_system_async, summarize_user_context, update_user_context,
+)
+from app.core.admission import (
+    LANE_BULK, LANE_INTERACTIVE, LANE_STANDARD, LaneFullError, get_admission_controller
+)
+from app.core.cache import get_response_cache
+from app.core.disk_cache import get_disk_response_cache
+from app.core.near_dup import (
+    NearDupKey, get_near_dup_index, make_near_dup_key, near_dup_threshold, near_dup_ttl_seconds
+)
+from app.core.singleflight import get_single_flight
+from app.core.token_budget import BudgetSection, fit_to_budget, get_token_budget_stats, token_budget
+from app.api.fallback import (
+    chat_message_fallback, chat_session_fallback, daily_feedback_fallback, daily_missions_fallback,
+    weekly_analysis_fallback,
+)
+from app.api.history import compact_mission_history
+from app.api.prompts import (
+    CHAT_MESSAGE_PROMPT, CHAT_SESSION_PROMPT, DAILY_FEEDBACK_PROMPT, DAILY_MISSIONS_PROMPT,
+    WEEKLY_ANALYSIS_PROMPT,
+)
 from app.api.schemas import (
-    DailyMissionRequest, DailyMissionResponse, Mission,
+    DailyMissionRequest, DailyMissionResponse, Mission, DailyMissionBatchItem, DailyMissionBatchError,
     DailyFeedbackRequest, DailyFeedbackResponse, EncouragementCandidate, Intent,
     WeeklyAnalysisRequest, WeeklyAnalysisResponse,
     ChatSessionRequest, ChatSessionResponse, BotMessage, BotMessageOption,
     ChatMessageRequest, ChatMessageResponse, ChatInputType, ChatState
 )
 
+logger = logging.getLogger(__name__)
 
-def _call_agent_and_parse_response(
-    user_request_prompt: str,
-    user_id: str,
-    user_payload_for_agent: Dict[str, Any],
-    response_model: BaseModel
-) -> BaseModel:
-    """
-    Calls the agent system, parses its JSON response, and validates against a Pydantic model.
-    """
-    agent_result = run_agent_system(
-        user_request=user_request_prompt,
-        user_id=user_id,
-        user_payload=user_payload_for_agent
+FALLBACK_HEADER = "X-AI-Fallback"
+FALLBACK_DEADLINE = "deadline"
+FALLBACK_AGENT_ERROR = "agent_error"
+
+# Set when the current request was answered by a rule-based fallback (read by the endpoint).
+_FALLBACK_REASON: ContextVar[Optional[str]] = ContextVar("ai_fallback_reason", default=None)
+_FALLBACK_STATS: Dict[str, Dict[str, int]] = {}
+
+
+class _AgentFailedError(Exception):
+    """The agent node could not get an answer from the LLM (its text is only an error notice)."""
+
+
+def _lane_full_error(e: LaneFullError) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=f"Too many pending requests in the '{e.lane}' lane. Retry later.",
+        headers={"Retry-After": str(e.retry_after)},
     )
 
-    agent_response_content = agent_result.get("agent_response", "")
 
+def _parse_agent_response(agent_response_content: str, response_model: BaseModel) -> BaseModel:
+    """
+    Extracts the JSON block from the agent's text and validates it against a Pydantic model.
+    """
     try:
         json_start = agent_response_content.find("```json")
         json_end = agent_response_content.rfind("```")
@@ -57,7 +98,380 @@ def _call_agent_and_parse_response(
         )
 
 
-async def get_daily_missions_service(request: DailyMissionRequest) -> DailyMissionResponse:
+@dataclass(frozen=True)
+class _EndpointSpec:
+    """Per-endpoint settings for the agent call (name is used in keys, env overrides and metrics)."""
+    name: str
+    response_model: Type[BaseModel]
+    target_agent: Optional[AgentKind]
+    lane: str
+    cache_ttl_seconds: float = 0  # 0 disables the response cache (override: RESPONSE_CACHE_TTL_<NAME>)
+    # Approximate cache (opt-in via NEAR_DUP_CACHE): payload -> (exact-match bucket, fuzzy fields)
+    near_dup_fields: Optional[Callable[[Dict[str, Any]], Tuple[Hashable, Dict[str, Any]]]] = None
+    near_dup_threshold: float = 0  # Jaccard similarity (override: NEAR_DUP_THRESHOLD_<NAME>)
+    token_budget: int = 0  # estimated prompt tokens incl. system/context, 0 = unlimited (override: PROMPT_TOKEN_BUDGET_<NAME>)
+    deadline_seconds: float = 0  # answer with the rule-based fallback after this, 0 = wait (override: AGENT_DEADLINE_<NAME>)
+    wait_for_slot: bool = False  # batch items wait for a lane slot instead of being rejected with 429
+
+
+def _daily_feedback_near_dup_fields(user_payload_for_agent: Dict[str, Any]) -> Tuple[Hashable, Dict[str, Any]]:
+    # The mission outcome must match exactly; the date and user id are ignored.
+    event = user_payload_for_agent["event"]
+    bucket = (event["missionType"], event["difficulty"], event["mission_result"], bool(event["fail_reason"]))
+    return bucket, {
+        "fail_reason": event["fail_reason"],
+        "successDays_recent": event["successDays_recent"],
+        "failureDays_recent": event["failureDays_recent"],
+    }
+
+
+def _weekly_analysis_near_dup_fields(user_payload_for_agent: Dict[str, Any]) -> Tuple[Hashable, Dict[str, Any]]:
+    # Only weeks of the same length are compared; the week range and user id are ignored.
+    event = user_payload_for_agent["event"]
+    return (event["totalDays_weekly"],), {
+        "successDays_weekly": event["successDays_weekly"],
+        "failureDays_weekly": event["failureDays_weekly"],
+        "failureReasons_ranked": event["failureReasons_ranked"],
+    }
+
+
+_DAILY_MISSIONS = _EndpointSpec(
+    "daily_missions", DailyMissionResponse, "planner", LANE_STANDARD, token_budget=2048,
+    deadline_seconds=20,
+)
+_DAILY_FEEDBACK = _EndpointSpec(
+    "daily_feedback", DailyFeedbackResponse, "analysis", LANE_STANDARD,
+    near_dup_fields=_daily_feedback_near_dup_fields, near_dup_threshold=0.9, token_budget=1536,
+    deadline_seconds=15,
+)
+_WEEKLY_ANALYSIS = _EndpointSpec(
+    "weekly_analysis", WeeklyAnalysisResponse, "analysis", LANE_BULK, cache_ttl_seconds=6 * 60 * 60,
+    near_dup_fields=_weekly_analysis_near_dup_fields, near_dup_threshold=0.9, token_budget=1536,
+    deadline_seconds=30,
+)
+_CHAT_SESSION = _EndpointSpec(
+    "chat_session", ChatSessionResponse, "coach", LANE_INTERACTIVE, cache_ttl_seconds=30 * 60,
+    token_budget=1024, deadline_seconds=10,
+)
+_CHAT_MESSAGE = _EndpointSpec(
+    "chat_message", ChatMessageResponse, "coach", LANE_INTERACTIVE, token_budget=1536,
+    deadline_seconds=15,
+)
+
+
+@dataclass(frozen=True)
+class _AgentCall:
+    """One request's input to the agent system, built by the per-endpoint builders."""
+    user_id: str
+    prompt: RenderedPrompt
+    payload: Dict[str, Any]
+    include_context: bool = True  # False when the token budget dropped the user context message
+    fallback: Optional[Callable[[], BaseModel]] = None  # rule-based answer on deadline/agent error
+
+
+def _render_within_budget(
+    spec: _EndpointSpec,
+    template: PromptTemplate,
+    user_id: str,
+    values: Dict[str, Any],
+    sections: Optional[Dict[str, BudgetSection]] = None,
+) -> Tuple[RenderedPrompt, bool]:
+    """
+    Renders the endpoint prompt inside its token budget: the duplicated user context message
+    is dropped first, then the oldest/lowest-ranked lines of each trimmable section.
+    Returns the prompt and whether the user context message should still be sent.
+    """
+    sections = sections or {}
+    budget = token_budget(spec.name, spec.token_budget)
+    fixed_tokens = template.static_tokens + sum(estimate_tokens(str(v)) for v in values.values())
+    if spec.target_agent:
+        fixed_tokens += get_prompt_registry().get(f"system.{spec.target_agent}").static_tokens
+    context_tokens = estimate_tokens(summarize_user_context(user_id)) if budget > 0 else 0
+
+    result = fit_to_budget(budget, fixed_tokens, context_tokens, sections)
+    get_token_budget_stats().record(spec.name, result, budget)
+    if result.tokens_saved:
+        logger.info(
+            "token budget %s user=%s: %d -> %d tokens (saved %d, budget %d, context dropped=%s, dropped lines=%s)",
+            spec.name, user_id, result.original_tokens, result.final_tokens, result.tokens_saved,
+            budget, not result.include_context, result.dropped_lines,
+        )
+    prompt = template.render(**values, **{name: section.render() for name, section in result.sections.items()})
+    return prompt, result.include_context
+
+
+def _cache_ttl_seconds(spec: _EndpointSpec) -> float:
+    raw = os.environ.get(f"RESPONSE_CACHE_TTL_{spec.name.upper()}")
+    if raw:
+        try:
+            return float(raw)
+        except ValueError:
+            pass
+    return spec.cache_ttl_seconds
+
+
+def _deadline_seconds(spec: _EndpointSpec) -> float:
+    raw = os.environ.get(f"AGENT_DEADLINE_{spec.name.upper()}")
+    if raw:
+        try:
+            return float(raw)
+        except ValueError:
+            pass
+    return spec.deadline_seconds
+
+
+def _request_digest(user_request_prompt: RenderedPrompt, user_payload_for_agent: Dict[str, Any]) -> str:
+    # Hash the template version and its variables instead of the full rendered text.
+    canonical = json.dumps(
+        {
+            "template": user_request_prompt.version,
+            "variables": user_request_prompt.variables,
+            "payload": user_payload_for_agent,
+        },
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _near_dup_key(spec: _EndpointSpec, call: _AgentCall) -> Optional[NearDupKey]:
+    if spec.near_dup_fields is None or near_dup_threshold(spec.name, spec.near_dup_threshold) <= 0:
+        return None
+    bucket, fields = spec.near_dup_fields(call.payload)
+    if call.include_context:
+        # The answer is personalized by the user context message, so only users whose context
+        # renders identically may share it (reads the store: call off the event loop).
+        bucket = (bucket, get_user_context_fingerprint(call.user_id))
+    return make_near_dup_key(bucket, fields)
+
+
+def _context_cache_keys(user_id: str) -> Tuple[int, str]:
+    """(context version, context fingerprint) for the memory and disk cache keys."""
+    return get_user_context_version(user_id), get_user_context_fingerprint(user_id)
+
+
+async def _build_call(builder: Callable[[Any], _AgentCall], request: Any) -> _AgentCall:
+    # Builders read the user context summary; the store may hit SQLite, so keep it off the event loop.
+    return await asyncio.to_thread(builder, request)
+
+
+async def _run_agent_and_parse_response(
+    spec: _EndpointSpec,
+    call: _AgentCall,
+    digest: str,
+    cache_ttl: float,
+    near_dup_key: Optional[NearDupKey] = None,
+) -> BaseModel:
+    user_id = call.user_id
+    try:
+        async with get_admission_controller().admit(spec.lane, wait=spec.wait_for_slot):
+            agent_result = await run_agent_system_async(
+                user_request=call.prompt.text,
+                user_id=user_id,
+                user_payload=call.payload,
+                target_agent=spec.target_agent,
+                include_context=call.include_context,
+            )
+    except LaneFullError as e:
+        raise _lane_full_error(e)
+
+    if agent_result.get("agent_failed"):
+        raise _AgentFailedError(spec.name)
+    response = _parse_agent_response(agent_result.get("agent_response", ""), spec.response_model)
+    if cache_ttl > 0:
+        # Keyed by the version that already includes this request's context update, so a repeat hits.
+        version, fingerprint = await asyncio.to_thread(_context_cache_keys, user_id)
+        cache_key = (user_id, digest, version)
+        get_response_cache().set(spec.name, cache_key, response, cache_ttl)
+        disk_cache = get_disk_response_cache()
+        if disk_cache is not None:
+            disk_key = f"{user_id}:{digest}:{fingerprint}"
+            await disk_cache.aset(spec.name, disk_key, response.model_dump_json().encode("utf-8"), cache_ttl)
+    if near_dup_key is not None:
+        get_near_dup_index().add(spec.name, near_dup_key, response, near_dup_ttl_seconds())
+    return response
+
+
+async def _lookup_cached_response(
+    spec: _EndpointSpec, user_id: str, digest: str, cache_ttl: float
+) -> Optional[BaseModel]:
+    """Memory tier first, then the shared SQLite tier (promoting hits into memory, read off the event loop)."""
+    version, fingerprint = await asyncio.to_thread(_context_cache_keys, user_id)
+    cache_key = (user_id, digest, version)
+    cached = get_response_cache().get(spec.name, cache_key)
+    if cached is not None:
+        return cached
+
+    disk_cache = get_disk_response_cache()
+    if disk_cache is None:
+        return None
+    disk_key = f"{user_id}:{digest}:{fingerprint}"
+    raw = await disk_cache.aget(spec.name, disk_key)
+    if raw is None:
+        return None
+    try:
+        cached = spec.response_model.model_validate_json(raw)
+    except ValueError as e:
+        # The disk tier outlives deploys and its key has no schema version: drop the row and miss.
+        logger.warning("discarding unreadable %s disk cache entry: %s", spec.name, e)
+        await disk_cache.adelete(spec.name, disk_key)
+        return None
+    get_response_cache().set(spec.name, cache_key, cached, cache_ttl)
+    return cached
+
+
+async def _call_agent_and_parse_response(spec: _EndpointSpec, call: _AgentCall) -> BaseModel:
+    """
+    Calls the agent system, parses its JSON response, and validates against the endpoint's model.
+    The endpoint's target agent answers directly (no orchestrator round trip), the call is
+    admitted through its priority lane (full lane -> 429), and identical concurrent requests
+    (same endpoint, user and payload) share a single in-flight agent call.
+    Endpoints with a cache TTL first look up a validated response keyed by the request digest
+    and the user's context version, so any context change invalidates earlier answers.
+    With RESPONSE_CACHE_DB_PATH set, a SQLite tier shared by all workers sits below it.
+    With NEAR_DUP_CACHE enabled, endpoints that define near-duplicate fields also reuse a response
+    from any user whose canonicalized payload is similar enough (MinHash/LSH, Jaccard threshold)
+    and, when the user context message is sent, whose context summary is identical.
+    If the agent misses the endpoint deadline or fails to reach the LLM, the call's rule-based
+    fallback answers instead (not cached); a late agent answer still fills the caches.
+    """
+    user_id, user_payload_for_agent = call.user_id, call.payload
+    digest = _request_digest(call.prompt, user_payload_for_agent)
+    cache_ttl = _cache_ttl_seconds(spec)
+    if cache_ttl > 0:
+        cached = await _lookup_cached_response(spec, user_id, digest, cache_ttl)
+        if cached is not None:
+            # Re-applying the same payload is a no-op, but keeps store bookkeeping (e.g. TTL) as usual.
+            await asyncio.to_thread(update_user_context, user_id, user_payload_for_agent)
+            return cached
+
+    near_dup_key = await asyncio.to_thread(_near_dup_key, spec, call)
+    if near_dup_key is not None:
+        match = get_near_dup_index().lookup(
+            spec.name, near_dup_key, near_dup_threshold(spec.name, spec.near_dup_threshold)
+        )
+        if match is not None:
+            await asyncio.to_thread(update_user_context, user_id, user_payload_for_agent)
+            return match[0]
+
+    in_flight = get_single_flight().do(
+        f"{spec.name}:{user_id}:{digest}",
+        lambda: _run_agent_and_parse_response(spec, call, digest, cache_ttl, near_dup_key),
+    )
+    deadline = _deadline_seconds(spec)
+    try:
+        # The shared call is shielded: on timeout it keeps running and still fills the caches.
+        return await (asyncio.wait_for(in_flight, deadline) if deadline > 0 else in_flight)
+    except asyncio.TimeoutError:
+        reason = FALLBACK_DEADLINE
+    except _AgentFailedError:
+        reason = FALLBACK_AGENT_ERROR
+    return _fallback_response(spec, call, reason)
+
+
+def _fallback_response(spec: _EndpointSpec, call: _AgentCall, reason: str) -> BaseModel:
+    if call.fallback is None:
+        if reason == FALLBACK_DEADLINE:
+            raise HTTPException(status_code=504, detail=f"AI agent did not answer within the {spec.name} deadline.")
+        raise HTTPException(status_code=502, detail="AI agent failed to generate a response.")
+    counters = _FALLBACK_STATS.setdefault(spec.name, {FALLBACK_DEADLINE: 0, FALLBACK_AGENT_ERROR: 0})
+    counters[reason] += 1
+    logger.warning("agent fallback %s user=%s: %s", spec.name, call.user_id, reason)
+    _FALLBACK_REASON.set(reason)
+    return call.fallback()
+
+
+def take_fallback_reason() -> Optional[str]:
+    """Returns and clears the fallback reason recorded for the current request, if any."""
+    reason = _FALLBACK_REASON.get()
+    _FALLBACK_REASON.set(None)
+    return reason
+
+
+def mark_fallback_response(response: Response) -> None:
+    """Adds the X-AI-Fallback header when the awaited service answered with a fallback."""
+    reason = take_fallback_reason()
+    if reason is not None:
+        response.headers[FALLBACK_HEADER] = reason
+
+
+def get_fallback_stats() -> Dict[str, Dict[str, int]]:
+    return {name: dict(counters) for name, counters in _FALLBACK_STATS.items()}
+
+
+_HEX4 = re.compile(r"[0-9a-fA-F]{4}")
+
+
+class _JsonStringFieldStream:
+    """
+    Incrementally decodes one string field (e.g. botMessage.text) out of JSON text
+    that arrives token by token, so it can be forwarded before the JSON is complete.
+    Raw control characters in the value are tolerated; a malformed escape stops the
+    preview (done) and leaves the verdict to the full parse of the final answer.
+    """
+
+    def __init__(self, field: str):
+        self._key_pattern = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._buffer = ""
+        self._value_start: Optional[int] = None
+        self._emitted = 0
+        self.done = False
+
+    @staticmethod
+    def _scan_raw(raw: str) -> Tuple[str, bool]:
+        """Returns the longest decodable prefix of the escaped value and whether it is closed."""
+        i = 0
+        while i < len(raw):
+            ch = raw[i]
+            if ch == '"':
+                return raw[:i], True
+            if ch == "\\":
+                if i + 1 >= len(raw):
+                    break
+                if raw[i + 1] == "u":
+                    end = i + 6
+                    if end > len(raw):
+                        break
+                    if not _HEX4.fullmatch(raw, i + 2, end):
+                        raise ValueError(f"invalid \\u escape: {raw[i:end]!r}")
+                    # A high surrogate must be decoded together with its low half (if one follows).
+                    if 0xD800 <= int(raw[i + 2:end], 16) <= 0xDBFF:
+                        if end + 2 > len(raw) or (raw.startswith("\\u", end) and end + 6 > len(raw)):
+                            break
+                    i = end
+                    continue
+                i += 2
+                continue
+            i += 1
+        return raw[:i], False
+
+    def feed(self, token: str) -> str:
+        if self.done:
+            return ""
+        self._buffer += token
+        if self._value_start is None:
+            match = self._key_pattern.search(self._buffer)
+            if not match:
+                return ""
+            self._value_start = match.end()
+
+        try:
+            raw, closed = self._scan_raw(self._buffer[self._value_start:])
+            decoded = json.loads(f'"{raw}"', strict=False)
+        except ValueError:
+            logger.warning("stopped streaming a malformed JSON string field")
+            self.done = True
+            return ""
+        delta = decoded[self._emitted:]
+        self._emitted = len(decoded)
+        self.done = closed
+        return delta
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _build_daily_missions_call(request: DailyMissionRequest) -> _AgentCall:
     user_id = str(request.userId)
 
     user_payload_for_agent = {
@@ -73,64 +487,103 @@ async def get_daily_missions_service(request: DailyMissionRequest) -> DailyMissi
             "weeklyFailureReasons": ", ".join(request.weeklyFailureReasons)
         }
     }
-    for mission_item in request.recentMissionHistory:
+    # The store keeps one event per request: the latest mission plus aggregate counts.
+    history = compact_mission_history(request.recentMissionHistory)
+    if history.latest is not None:
         user_payload_for_agent["event"] = {
-            "date": mission_item.date.isoformat(),
-            "missionType": mission_item.missionType.value,
-            "difficulty": mission_item.difficulty.value,
-            "mission_result": mission_item.result.value,
-            "fail_reason": mission_item.failureReason,
-            **user_payload_for_agent.get("event", {})
+            "date": history.latest.date.isoformat(),
+            "missionType": history.latest.missionType.value,
+            "difficulty": history.latest.difficulty.value,
+            "mission_result": history.latest.result.value,
+            "fail_reason": history.latest.failureReason,
+            "history_successes": history.successes,
+            "history_failures": history.failures,
+            **user_payload_for_agent["event"],
         }
 
-    user_request_prompt = f"""
-    사용자 ID: {request.userId}
-    사용자 목표: {request.onboarding.appGoal}
-    근무 시간 유형: {request.onboarding.workTimeType.value}
-    운동 가능 시간: {request.onboarding.availableStartTime.isoformat()} ~ {request.onboarding.availableEndTime.isoformat()} ({request.onboarding.minExerciseMinutes}분 이상)
-    선호 운동: {', '.join(request.onboarding.preferredExercises)}
-    생활 패턴: {request.onboarding.lifestyleType.value}
-
-    최근 미션 이력:
-    {    '\n'.join([
-        f"- 날짜: {item.date.isoformat()}, 유형: {item.missionType.value}, 난이도: {item.difficulty.value}, 결과: {item.result.value}{f', 실패 사유: {item.failureReason}' if item.failureReason else ''}"
-        for item in request.recentMissionHistory
-    ]) if request.recentMissionHistory else '- 없음'}
-
-    주간 주요 실패 원인: {', '.join(request.weeklyFailureReasons) if request.weeklyFailureReasons else '없음'}
-
-    위 정보를 바탕으로 사용자에게 오늘 수행할 데일리 추천 미션 2~3개를 추천해주세요.
-    미션은 EXERCISE 또는 DIET 유형으로 구성될 수 있습니다.
-    난이도는 EASY, NORMAL, HARD 중 하나여야 합니다.
-    각 미션에 대해 예상 소요 시간(분)과 예상 소모 칼로리(kcal)를 함께 알려주세요.
-    응답은 반드시 아래 JSON 형식으로만 해주세요:
-    ```json
-    {{
-        "missions": [
-            {{
-                "name": "미션 이름 1",
-                "type": "EXERCISE",
-                "difficulty": "EASY",
-                "estimatedMinutes": 20,
-                "estimatedCalories": 80
-            }},
-            {{
-                "name": "미션 이름 2",
-                "type": "DIET",
-                "difficulty": "NORMAL",
-                "estimatedMinutes": 10,
-                "estimatedCalories": 0
-            }}
-        ]
-    }}
-    ```
-    """
-    return _call_agent_and_parse_response(
-        user_request_prompt, user_id, user_payload_for_agent, DailyMissionResponse
+    prompt_values = dict(
+        user_id=request.userId,
+        app_goal=request.onboarding.appGoal,
+        work_time_type=request.onboarding.workTimeType.value,
+        available_start=request.onboarding.availableStartTime.isoformat(),
+        available_end=request.onboarding.availableEndTime.isoformat(),
+        min_exercise_minutes=request.onboarding.minExerciseMinutes,
+        preferred_exercises=", ".join(request.onboarding.preferredExercises),
+        lifestyle_type=request.onboarding.lifestyleType.value,
+        weekly_failure_reasons=", ".join(request.weeklyFailureReasons) or "없음",
+    )
+    prompt_sections = {
+        # Aggregates come first, so the budgeter trims them before the raw recent missions.
+        "mission_history": BudgetSection(history.prompt_lines(), trim_from="start", min_lines=1, empty_text="- 없음"),
+    }
+    user_request_prompt, include_context = _render_within_budget(
+        _DAILY_MISSIONS, DAILY_MISSIONS_PROMPT, user_id, prompt_values, prompt_sections
+    )
+    return _AgentCall(
+        user_id, user_request_prompt, user_payload_for_agent, include_context, partial(daily_missions_fallback, request)
     )
 
 
-async def get_daily_feedback_service(request: DailyFeedbackRequest) -> DailyFeedbackResponse:
+async def get_daily_missions_service(
+    request: DailyMissionRequest, lane: str = LANE_STANDARD, wait_for_slot: bool = False
+) -> DailyMissionResponse:
+    return await _call_agent_and_parse_response(
+        replace(_DAILY_MISSIONS, lane=lane, wait_for_slot=wait_for_slot),
+        await _build_call(_build_daily_missions_call, request),
+    )
+
+
+def daily_missions_batch_concurrency() -> int:
+    raw = os.environ.get("DAILY_MISSIONS_BATCH_CONCURRENCY")
+    if raw:
+        try:
+            return max(1, int(raw))
+        except ValueError:
+            pass
+    return 8
+
+
+async def _run_daily_missions_batch_item(index: int, request: DailyMissionRequest) -> DailyMissionBatchItem:
+    try:
+        # The batch already bounds its own concurrency, so its items queue for a bulk slot instead of 429.
+        response = await get_daily_missions_service(request, lane=LANE_BULK, wait_for_slot=True)
+        return DailyMissionBatchItem(
+            index=index, userId=request.userId, response=response, fallback=take_fallback_reason()
+        )
+    except HTTPException as e:
+        error = DailyMissionBatchError(status=e.status_code, detail=str(e.detail))
+    except Exception as e:
+        error = DailyMissionBatchError(status=500, detail=f"{type(e).__name__}: {e}")
+    return DailyMissionBatchItem(index=index, userId=request.userId, error=error)
+
+
+async def stream_daily_missions_batch_service(
+    requests: List[DailyMissionRequest], concurrency: int
+) -> AsyncIterator[str]:
+    """
+    Runs every request through the planner with at most `concurrency` in flight (bulk lane)
+    and yields one NDJSON line per item in completion order. Failures are reported per item;
+    a busy bulk lane only delays items (they wait for a slot rather than failing with 429).
+    """
+    pending = iter(enumerate(requests))
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def worker() -> None:
+        for index, request in pending:
+            await results.put(await _run_daily_missions_batch_item(index, request))
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(requests)))]
+    try:
+        for _ in range(len(requests)):
+            item = await results.get()
+            yield item.model_dump_json(exclude_none=True) + "\n"
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+def _build_daily_feedback_call(request: DailyFeedbackRequest) -> _AgentCall:
     user_id = str(request.userId)
 
     user_payload_for_agent = {
@@ -145,50 +598,29 @@ async def get_daily_feedback_service(request: DailyFeedbackRequest) -> DailyFeed
         }
     }
 
-    user_request_prompt = f"""
-    사용자 ID: {request.userId}
-    분석 대상 날짜: {request.targetDate.isoformat()}
-    오늘 수행한 미션:
-    - 유형: {request.todayMission.missionType.value}
-    - 난이도: {request.todayMission.difficulty.value}
-    - 결과: {request.todayMission.result.value}{f' (실패 사유: {request.todayMission.failureReason})' if request.todayMission.failureReason else ''}
-    최근 요약:
-    - 성공 일수: {request.recentSummary.successDays}일
-    - 실패 일수: {request.recentSummary.failureDays}일
-
-    위 정보를 바탕으로 다음 내용을 분석하여 피드백을 제공해주세요.
-    1. 오늘 미션 수행 결과 및 최근 기록을 반영한 분석형 AI 피드백 문장을 생성해주세요.
-    2. 메인 화면에 표시할 격려/응원 메시지 후보 2~4개를 생성해주세요. 각 메시지는 'intent'(PRAISE, RETRY, NORMAL, PUSH 중 하나), 'title', 'message'를 포함해야 합니다.
-       - PRAISE: 잘하고 있을 때 칭찬 및 목표 상기.
-       - RETRY: 실패가 반복되거나 재도전이 필요할 때 격려.
-       - NORMAL: 보통일 때 목표 달성을 격려.
-       - PUSH: 행동을 촉구할 때.
-
-    응답은 반드시 아래 JSON 형식으로만 해주세요:
-    ```json
-    {{
-        "feedbackText": "오늘 미션 수행 결과 및 최근 기록을 반영한 분석형 AI 피드백 문장",
-        "encouragementCandidates": [
-            {{
-                "intent": "PRAISE",
-                "title": "잘하고 있어요",
-                "message": "이대로만 하면 목표에 도달할 수 있어요."
-            }},
-            {{
-                "intent": "RETRY",
-                "title": "다음은 다시 도전해봐요",
-                "message": "내일은 5분짜리 미션부터 가볍게 시작해봐요."
-            }}
-        ]
-    }}
-    ```
-    """
-    return _call_agent_and_parse_response(
-        user_request_prompt, user_id, user_payload_for_agent, DailyFeedbackResponse
+    prompt_values = dict(
+        user_id=request.userId,
+        target_date=request.targetDate.isoformat(),
+        mission_type=request.todayMission.missionType.value,
+        difficulty=request.todayMission.difficulty.value,
+        result=request.todayMission.result.value,
+        failure_reason=f" (실패 사유: {request.todayMission.failureReason})" if request.todayMission.failureReason else "",
+        success_days=request.recentSummary.successDays,
+        failure_days=request.recentSummary.failureDays,
+    )
+    user_request_prompt, include_context = _render_within_budget(_DAILY_FEEDBACK, DAILY_FEEDBACK_PROMPT, user_id, prompt_values)
+    return _AgentCall(
+        user_id, user_request_prompt, user_payload_for_agent, include_context, partial(daily_feedback_fallback, request)
     )
 
 
-async def get_weekly_analysis_service(request: WeeklyAnalysisRequest) -> WeeklyAnalysisResponse:
+async def get_daily_feedback_service(request: DailyFeedbackRequest) -> DailyFeedbackResponse:
+    return await _call_agent_and_parse_response(
+        _DAILY_FEEDBACK, await _build_call(_build_daily_feedback_call, request)
+    )
+
+
+def _build_weekly_analysis_call(request: WeeklyAnalysisRequest) -> _AgentCall:
     user_id = str(request.userId)
 
     user_payload_for_agent = {
@@ -203,37 +635,36 @@ async def get_weekly_analysis_service(request: WeeklyAnalysisRequest) -> WeeklyA
         }
     }
 
-    user_request_prompt = f"""
-    사용자 ID: {request.userId}
-    주간 분석 범위: {request.weekRange.start.isoformat()} ~ {request.weekRange.end.isoformat()}
-    주간 통계:
-    - 총 일수: {request.weeklyStats.totalDays}일
-    - 성공 일수: {request.weeklyStats.successDays}일
-    - 실패 일수: {request.weeklyStats.failureDays}일
-    주요 실패 원인 (횟수 기준):
-    {    '\n'.join([
-        f"- {item.reason}: {item.count}회"
-        for item in request.failureReasonsRanked
-    ]) if request.failureReasonsRanked else '- 없음'}
-
-    위 주간 데이터를 종합적으로 분석하여 사용자에게 다음 두 가지 정보를 제공해주세요.
-    1. 주간 주요 실패 원인을 요약한 문장 (mainFailureReason).
-    2. 사용자 유지/개선 중심의 종합 피드백 문장 (overallFeedback).
-
-    응답은 반드시 아래 JSON 형식으로만 해주세요:
-    ```json
-    {{
-        "mainFailureReason": "주간 주요 실패 원인 요약 (예: 운동 가능 시간 확보 실패)",
-        "overallFeedback": "유지/개선 중심 종합 피드백 (예: 이번 주에는 일정 제약으로 미션 실패가 많았네요. 다음 주에는 시간을 조금 더 확보해보세요.)"
-    }}
-    ```
-    """
-    return _call_agent_and_parse_response(
-        user_request_prompt, user_id, user_payload_for_agent, WeeklyAnalysisResponse
+    prompt_values = dict(
+        user_id=request.userId,
+        week_start=request.weekRange.start.isoformat(),
+        week_end=request.weekRange.end.isoformat(),
+        total_days=request.weeklyStats.totalDays,
+        success_days=request.weeklyStats.successDays,
+        failure_days=request.weeklyStats.failureDays,
+    )
+    prompt_sections = {
+        # Ranked most frequent first, so the budgeter drops the rarest reasons first.
+        "failure_reasons": BudgetSection(
+            [f"- {item.reason}: {item.count}회" for item in request.failureReasonsRanked],
+            trim_from="end", min_lines=1, empty_text="- 없음",
+        ),
+    }
+    user_request_prompt, include_context = _render_within_budget(
+        _WEEKLY_ANALYSIS, WEEKLY_ANALYSIS_PROMPT, user_id, prompt_values, prompt_sections
+    )
+    return _AgentCall(
+        user_id, user_request_prompt, user_payload_for_agent, include_context, partial(weekly_analysis_fallback, request)
     )
 
 
-async def create_chat_session_service(request: ChatSessionRequest) -> ChatSessionResponse:
+async def get_weekly_analysis_service(request: WeeklyAnalysisRequest) -> WeeklyAnalysisResponse:
+    return await _call_agent_and_parse_response(
+        _WEEKLY_ANALYSIS, await _build_call(_build_weekly_analysis_call, request)
+    )
+
+
+def _build_chat_session_call(request: ChatSessionRequest) -> _AgentCall:
     user_id = str(request.userId)
 
     user_payload_for_agent = {
@@ -243,38 +674,27 @@ async def create_chat_session_service(request: ChatSessionRequest) -> ChatSessio
         }
     }
 
-    user_request_prompt = f"""
-    새로운 채팅 세션이 시작되었습니다.
-    사용자 ID: {request.userId}
-    세션 ID: {request.sessionId}
-    사용자 초기 컨텍스트:
-    - 앱 사용 목적: {request.initialContext.appGoal}
-    - 생활 패턴: {request.initialContext.lifestyleType.value}
-
-    이 정보를 바탕으로 사용자에게 친근하게 인사하고, 어떤 점이 가장 고민되는지 물어보는 초기 챗봇 메시지를 생성해주세요.
-    메시지에는 2~3개의 선택지 옵션을 포함하여 사용자가 쉽게 대화를 시작할 수 있도록 유도해주세요.
-    응답은 반드시 아래 JSON 형식으로만 해주세요:
-    ```json
-    {{
-        "botMessage": {{
-            "messageId": 5001,
-            "text": "안녕하세요! 요즘 운동이나 생활 습관에서 가장 고민되는 부분이 무엇인가요?",
-            "options": [
-                {{"label": "운동이 너무 힘들어요", "value": "EXERCISE_HARD"}},
-                {{"label": "식단 관리가 어려워요", "value": "DIET_HARD"}}
-            ]
-        }}
-    }}
-    ```
-    """
-    return _call_agent_and_parse_response(
-        user_request_prompt, user_id, user_payload_for_agent, ChatSessionResponse
+    prompt_values = dict(
+        user_id=request.userId,
+        session_id=request.sessionId,
+        app_goal=request.initialContext.appGoal,
+        lifestyle_type=request.initialContext.lifestyleType.value,
+    )
+    user_request_prompt, include_context = _render_within_budget(_CHAT_SESSION, CHAT_SESSION_PROMPT, user_id, prompt_values)
+    return _AgentCall(
+        user_id, user_request_prompt, user_payload_for_agent, include_context, partial(chat_session_fallback, request)
     )
 
 
-async def handle_chat_message_service(request: ChatMessageRequest) -> ChatMessageResponse:
+async def create_chat_session_service(request: ChatSessionRequest) -> ChatSessionResponse:
+    return await _call_agent_and_parse_response(
+        _CHAT_SESSION, await _build_call(_build_chat_session_call, request)
+    )
+
+
+def _build_chat_message_call(request: ChatMessageRequest) -> _AgentCall:
     user_id = str(request.userId)
-    
+
     user_input_content = ""
     if request.input.type == ChatInputType.TEXT and request.input.text:
         user_input_content = f"사용자 텍스트 입력: {request.input.text}"
@@ -290,32 +710,113 @@ async def handle_chat_message_service(request: ChatMessageRequest) -> ChatMessag
         }
     }
 
-    user_request_prompt = f"""
-    이전 대화 세션 ID: {request.sessionId}
-    사용자 ID: {request.userId}
-    사용자 입력: {user_input_content}
-    입력 시각: {request.timestamp.isoformat()}
-
-    사용자의 입력에 대해 챗봇 메시지를 생성해주세요.
-    필요하다면 2~3개의 선택지 옵션을 제공해주세요.
-    대화가 종료되어야 할 시점에는 "state.isTerminal"을 true로 설정해주세요.
-    응답은 반드시 아래 JSON 형식으로만 해주세요:
-    ```json
-    {{
-        "botMessage": {{
-            "messageId": 5002,
-            "text": "사용자의 입력에 대한 챗봇 응답 메시지",
-            "options": [
-                {{"label": "선택지 1", "value": "VALUE_1"}},
-                {{"label": "선택지 2", "value": "VALUE_2"}}
-            ]
-        }},
-        "state": {{
-            "isTerminal": false
-        }}
-    }}
-    ```
-    """
-    return _call_agent_and_parse_response(
-        user_request_prompt, user_id, user_payload_for_agent, ChatMessageResponse
+    prompt_values = dict(
+        session_id=request.sessionId,
+        user_id=request.userId,
+        user_input=user_input_content,
+        timestamp=request.timestamp.isoformat(),
     )
+    user_request_prompt, include_context = _render_within_budget(_CHAT_MESSAGE, CHAT_MESSAGE_PROMPT, user_id, prompt_values)
+    return _AgentCall(
+        user_id, user_request_prompt, user_payload_for_agent, include_context, partial(chat_message_fallback, request)
+    )
+
+
+async def handle_chat_message_service(request: ChatMessageRequest) -> ChatMessageResponse:
+    return await _call_agent_and_parse_response(
+        _CHAT_MESSAGE, await _build_call(_build_chat_message_call, request)
+    )
+
+
+async def _stream_chat_message_agent(
+    call: _AgentCall, text_stream: _JsonStringFieldStream, deadline: float
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Yields ("token", text delta) while the coach answers, then ("result", final state).
+    Raises asyncio.TimeoutError once the endpoint deadline passes and _AgentFailedError
+    when the agent could not reach the LLM, like the non-streaming call.
+    """
+    loop = asyncio.get_running_loop()
+    expires_at = loop.time() + deadline if deadline > 0 else None
+    async with get_admission_controller().admit(_CHAT_MESSAGE.lane):
+        events = stream_agent_system_async(
+            user_request=call.prompt.text,
+            user_id=call.user_id,
+            user_payload=call.payload,
+            target_agent=_CHAT_MESSAGE.target_agent,
+            include_context=call.include_context,
+        )
+        try:
+            while True:
+                step = anext(events)
+                try:
+                    if expires_at is None:
+                        kind, value = await step
+                    else:
+                        kind, value = await asyncio.wait_for(step, max(0.0, expires_at - loop.time()))
+                except StopAsyncIteration:
+                    return
+                if kind == "token":
+                    delta = text_stream.feed(value)
+                    if delta:
+                        yield "token", delta
+                else:
+                    if value.get("agent_failed"):
+                        raise _AgentFailedError(_CHAT_MESSAGE.name)
+                    yield "result", value
+        finally:
+            await events.aclose()
+
+
+async def _chat_message_sse_events(request: ChatMessageRequest) -> AsyncIterator[str]:
+    call = await _build_call(_build_chat_message_call, request)
+    text_stream = _JsonStringFieldStream("text")
+    agent_result: Dict[str, Any] = {}
+    fallback_reason: Optional[str] = None
+
+    try:
+        try:
+            async for kind, value in _stream_chat_message_agent(call, text_stream, _deadline_seconds(_CHAT_MESSAGE)):
+                if kind == "token":
+                    yield _sse_event("token", {"text": value})
+                else:
+                    agent_result = value
+        except asyncio.TimeoutError:
+            fallback_reason = FALLBACK_DEADLINE
+        except _AgentFailedError:
+            fallback_reason = FALLBACK_AGENT_ERROR
+        if fallback_reason is not None:
+            response = _fallback_response(_CHAT_MESSAGE, call, fallback_reason)
+            take_fallback_reason()  # reported as an SSE event below, not as a header
+        else:
+            response = _parse_agent_response(agent_result.get("agent_response", ""), _CHAT_MESSAGE.response_model)
+    except LaneFullError as e:
+        yield _sse_event("error", {"status": 429, "detail": _lane_full_error(e).detail, "retryAfter": e.retry_after})
+        return
+    except HTTPException as e:
+        yield _sse_event("error", {"status": e.status_code, "detail": e.detail})
+        return
+    except Exception:
+        logger.exception("chat message stream failed user=%s", call.user_id)
+        yield _sse_event("error", {"status": 500, "detail": "AI agent failed to generate a response."})
+        return
+
+    if fallback_reason is not None:
+        yield _sse_event("fallback", {"reason": fallback_reason})
+    yield _sse_event("done", response.model_dump(mode="json"))
+
+
+def open_chat_message_stream(request: ChatMessageRequest) -> AsyncIterator[str]:
+    """
+    Streaming variant of handle_chat_message_service as server-sent events:
+    "token" events carry botMessage.text deltas, then a single "done" event carries
+    the full ChatMessageResponse (options, state.isTerminal) or an "error" event.
+    On a missed deadline or agent error a "fallback" event ({"reason"}) precedes a "done"
+    event with the rule-based answer, which replaces any text streamed so far.
+    A full interactive lane is rejected with 429 before the stream starts.
+    """
+    try:
+        get_admission_controller().check(_CHAT_MESSAGE.lane)
+    except LaneFullError as e:
+        raise _lane_full_error(e)
+    return _chat_message_sse_events(request)
@@ -0,0 +1,153 @@
+"""
+우선순위 레인별 어드미션 컨트롤러.
+
+- 엔드포인트 클래스마다 레인(interactive/standard/bulk)을 분리해 동시 실행 수와 대기열 길이를 제한
+- 레인 대기열이 가득 차면 기다리지 않고 바로 LaneFullError → API 레이어에서 429 + Retry-After
+- 배치 작업(admit(..., wait=True))은 거절되지 않고 자리가 날 때까지 기다린다.
+  배치는 자체 동시 실행 수로 대기 수가 이미 제한되므로 레인 대기열 길이에는 세지 않는다
+
+환경변수 (선택)
+- ADMISSION_<LANE>_CONCURRENCY=...   # 레인별 동시 실행 수
+- ADMISSION_<LANE>_QUEUE_SIZE=...    # 레인별 최대 대기 수 (0이면 대기 없이 즉시 거절)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+LANE_INTERACTIVE = "interactive"
+LANE_STANDARD = "standard"
+LANE_BULK = "bulk"
+
+# lane -> (concurrency, queue_size)
+_DEFAULT_LANE_LIMITS: Dict[str, Tuple[int, int]] = {
+    LANE_INTERACTIVE: (32, 64),
+    LANE_STANDARD: (16, 64),
+    LANE_BULK: (4, 16),
+}
+
+_EWMA_ALPHA = 0.2
+
+
+class LaneFullError(Exception):
+    """레인 대기열이 가득 찬 경우."""
+
+    def __init__(self, lane: str, retry_after: int):
+        super().__init__(f"admission lane '{lane}' is full")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class AdmissionLane:
+    def __init__(self, name: str, concurrency: int, queue_size: int):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue_size = max(0, queue_size)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._waiting = 0
+        self._waiting_batch = 0  # wait=True로 기다리는 배치 작업 (queue_size에 세지 않음)
+        self._active = 0
+        self._avg_service_seconds = 1.0
+        self.admitted = 0
+        self.rejected = 0
+
+    def _retry_after(self) -> int:
+        # 현재 대기열이 모두 빠지는 데 걸릴 예상 시간
+        backlog = self._waiting + 1
+        return max(1, math.ceil(self._avg_service_seconds * backlog / self.concurrency))
+
+    def check(self) -> None:
+        """자리를 잡지 않고 지금 받아줄 수 있는지만 확인 (스트리밍 응답 시작 전 429 판단용)."""
+        if self._semaphore.locked() and self._waiting >= self.queue_size:
+            self.rejected += 1
+            raise LaneFullError(self.name, self._retry_after())
+
+    @asynccontextmanager
+    async def slot(self, wait: bool = False) -> AsyncIterator[None]:
+        """wait=True면 대기열이 가득 차도 거절하지 않고 자리가 날 때까지 기다린다 (배치 작업용)."""
+        if wait:
+            self._waiting_batch += 1
+        else:
+            self.check()
+            self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            if wait:
+                self._waiting_batch -= 1
+            else:
+                self._waiting -= 1
+
+        self.admitted += 1
+        self._active += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self._avg_service_seconds += _EWMA_ALPHA * (elapsed - self._avg_service_seconds)
+            self._active -= 1
+            self._semaphore.release()
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "active": self._active,
+            "waiting": self._waiting,
+            "waiting_batch": self._waiting_batch,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_service_seconds": round(self._avg_service_seconds, 4),
+        }
+
+
+def _env_int(key: str, default: int) -> int:
+    raw = os.environ.get(key)
+    if raw:
+        try:
+            return int(raw)
+        except ValueError:
+            pass
+    return default
+
+
+class AdmissionController:
+    def __init__(self, lanes: Dict[str, AdmissionLane]):
+        self.lanes = lanes
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        lanes: Dict[str, AdmissionLane] = {}
+        for name, (concurrency, queue_size) in _DEFAULT_LANE_LIMITS.items():
+            prefix = f"ADMISSION_{name.upper()}"
+            lanes[name] = AdmissionLane(
+                name,
+                concurrency=_env_int(f"{prefix}_CONCURRENCY", concurrency),
+                queue_size=_env_int(f"{prefix}_QUEUE_SIZE", queue_size),
+            )
+        return cls(lanes)
+
+    def admit(self, lane: str, wait: bool = False):
+        return self.lanes[lane].slot(wait)
+
+    def check(self, lane: str) -> None:
+        self.lanes[lane].check()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {name: lane.snapshot() for name, lane in self.lanes.items()}
+
+
+_CACHED_CONTROLLER: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    global _CACHED_CONTROLLER
+    if _CACHED_CONTROLLER is None:
+        _CACHED_CONTROLLER = AdmissionController.from_env()
+    return _CACHED_CONTROLLER
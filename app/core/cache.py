@@ -0,0 +1,96 @@
+"""
+검증된 응답을 위한 인메모리 LRU + TTL 캐시.
+
+- 전체 엔트리 수 상한(LRU 축출)과 엔트리별 TTL을 함께 적용
+- 네임스페이스(엔드포인트) 단위로 hit/miss/eviction/expiration 카운터 집계
+
+환경변수 (선택)
+- RESPONSE_CACHE_MAX_ENTRIES=10000
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+_DEFAULT_MAX_ENTRIES = 10_000
+
+_COUNTER_NAMES = ("hits", "misses", "evictions", "expirations")
+
+
+class TTLCache:
+    def __init__(self, max_entries: int = _DEFAULT_MAX_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        # (namespace, key) -> (expires_at, value)
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, namespace: str, counter: str) -> None:
+        counters = self._counters.get(namespace)
+        if counters is None:
+            counters = self._counters[namespace] = dict.fromkeys(_COUNTER_NAMES, 0)
+        counters[counter] += 1
+
+    def get(self, namespace: str, key: Hashable) -> Optional[Any]:
+        full_key = (namespace, key)
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is None:
+                self._count(namespace, "misses")
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[full_key]
+                self._count(namespace, "expirations")
+                self._count(namespace, "misses")
+                return None
+            self._entries.move_to_end(full_key)
+            self._count(namespace, "hits")
+            return value
+
+    def set(self, namespace: str, key: Hashable, value: Any, ttl_seconds: float) -> None:
+        if ttl_seconds <= 0:
+            return
+        full_key = (namespace, key)
+        with self._lock:
+            self._entries[full_key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.max_entries:
+                (evicted_namespace, _), _ = self._entries.popitem(last=False)
+                self._count(evicted_namespace, "evictions")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "namespaces": {ns: dict(c) for ns, c in self._counters.items()},
+            }
+
+
+def _env_int(key: str, default: int) -> int:
+    raw = os.environ.get(key)
+    if raw:
+        try:
+            return int(raw)
+        except ValueError:
+            pass
+    return default
+
+
+_CACHED_RESPONSE_CACHE: Optional[TTLCache] = None
+
+
+def get_response_cache() -> TTLCache:
+    global _CACHED_RESPONSE_CACHE
+    if _CACHED_RESPONSE_CACHE is None:
+        _CACHED_RESPONSE_CACHE = TTLCache(_env_int("RESPONSE_CACHE_MAX_ENTRIES", _DEFAULT_MAX_ENTRIES))
+    return _CACHED_RESPONSE_CACHE
@@ -0,0 +1,199 @@
+"""
+SQLite 기반 영속 응답 캐시 (인메모리 TTLCache 아래의 2차 계층).
+
+- 한 호스트의 모든 uvicorn 워커가 같은 DB 파일을 공유하고, 재시작/배포 후에도 유지
+- WAL 모드 + synchronous=NORMAL: 읽기는 쓰기와 서로 막지 않음
+- 값은 compact JSON을 zlib으로 압축한 BLOB
+- 전체 크기가 상한을 넘으면 만료된 행 → 오래 안 쓰인 행 순서로 삭제
+- 동기 sqlite3 호출(잠금 대기 최대 5초)이라 async 요청 경로에서는 aget / aset / adelete로
+  스레드 풀에서 실행한다 → 쓰기 경합이 있어도 이벤트 루프는 막히지 않음
+- 키에 응답 스키마가 들어가지 않으므로, 배포 후 읽을 수 없게 된 행(압축 손상 / 스키마 불일치)은
+  miss로 보고 지운다 (get 자체 또는 호출 측의 delete)
+
+환경변수 (선택)
+- RESPONSE_CACHE_DB_PATH=/var/cache/omteam/responses.sqlite3   # 없으면 이 계층은 꺼짐
+- RESPONSE_CACHE_DB_MAX_BYTES=268435456
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+_DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_EVICT_CHECK_EVERY = 64          # set 몇 번마다 전체 크기를 확인할지
+_EVICT_TARGET_RATIO = 0.9        # 상한을 넘으면 이 비율까지 줄임
+_TOUCH_INTERVAL_SECONDS = 60.0   # hit 때 accessed_at 갱신 간격 (매 hit마다 쓰지 않도록)
+_COUNTER_NAMES = ("hits", "misses", "evictions", "invalid")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    namespace   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    value       BLOB NOT NULL,
+    size        INTEGER NOT NULL,
+    expires_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+class SQLiteResponseCache:
+    def __init__(self, path: str, max_bytes: int = _DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max(1, max_bytes)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._sets_since_check = 0
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, namespace: str, counter: str, n: int = 1) -> None:
+        counters = self._counters.get(namespace)
+        if counters is None:
+            counters = self._counters[namespace] = dict.fromkeys(_COUNTER_NAMES, 0)
+        counters[counter] += n
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at, accessed_at FROM responses WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self._count(namespace, "misses")
+                return None
+            if now - row[2] > _TOUCH_INTERVAL_SECONDS:
+                self._conn.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (now, namespace, key),
+                )
+            try:
+                value = zlib.decompress(row[0])
+            except zlib.error:
+                self._delete_locked(namespace, key)
+                self._count(namespace, "misses")
+                return None
+            self._count(namespace, "hits")
+        return value
+
+    def delete(self, namespace: str, key: str) -> None:
+        """읽을 수 없는 값(스키마가 바뀐 응답 등)을 지운다 → 다음 set까지 miss."""
+        with self._lock:
+            self._delete_locked(namespace, key)
+
+    def _delete_locked(self, namespace: str, key: str) -> None:
+        self._conn.execute("DELETE FROM responses WHERE namespace = ? AND key = ?", (namespace, key))
+        self._count(namespace, "invalid")
+
+    def set(self, namespace: str, key: str, value: bytes, ttl_seconds: float) -> None:
+        if ttl_seconds <= 0:
+            return
+        blob = zlib.compress(value, 6)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (namespace, key, value, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, blob, len(blob), now + ttl_seconds, now),
+            )
+            self._sets_since_check += 1
+            if self._sets_since_check >= _EVICT_CHECK_EVERY:
+                self._sets_since_check = 0
+                self._evict_locked(now)
+
+    def _evict_locked(self, now: float) -> None:
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * _EVICT_TARGET_RATIO)
+        freed = 0
+        victims = []
+        cursor = self._conn.execute("SELECT namespace, key, size FROM responses ORDER BY accessed_at")
+        for namespace, key, size in cursor:
+            victims.append((namespace, key))
+            freed += size
+            if total - freed <= target:
+                break
+        cursor.close()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany("DELETE FROM responses WHERE namespace = ? AND key = ?", victims)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        for namespace, _ in victims:
+            self._count(namespace, "evictions")
+
+    async def aget(self, namespace: str, key: str) -> Optional[bytes]:
+        """get을 이벤트 루프 밖(스레드 풀)에서 실행."""
+        return await asyncio.to_thread(self.get, namespace, key)
+
+    async def aset(self, namespace: str, key: str, value: bytes, ttl_seconds: float) -> None:
+        """set(필요하면 eviction 포함)을 이벤트 루프 밖(스레드 풀)에서 실행."""
+        await asyncio.to_thread(self.set, namespace, key, value, ttl_seconds)
+
+    async def adelete(self, namespace: str, key: str) -> None:
+        """delete를 이벤트 루프 밖(스레드 풀)에서 실행."""
+        await asyncio.to_thread(self.delete, namespace, key)
+
+    def evict(self) -> None:
+        with self._lock:
+            self._evict_locked(time.time())
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            rows, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            return {
+                "path": self.path,
+                "rows": rows,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "namespaces": {ns: dict(c) for ns, c in self._counters.items()},
+            }
+
+
+def _env_int(key: str, default: int) -> int:
+    raw = os.environ.get(key)
+    if raw:
+        try:
+            return int(raw)
+        except ValueError:
+            pass
+    return default
+
+
+_CACHED_DISK_CACHE: Optional[SQLiteResponseCache] = None
+_DISK_CACHE_INIT_LOCK = threading.Lock()
+
+
+def get_disk_response_cache() -> Optional[SQLiteResponseCache]:
+    """RESPONSE_CACHE_DB_PATH가 설정된 경우에만 디스크 계층을 연다."""
+    global _CACHED_DISK_CACHE
+    path = os.environ.get("RESPONSE_CACHE_DB_PATH")
+    if not path:
+        return None
+    if _CACHED_DISK_CACHE is None or _CACHED_DISK_CACHE.path != path:
+        with _DISK_CACHE_INIT_LOCK:
+            if _CACHED_DISK_CACHE is None or _CACHED_DISK_CACHE.path != path:
+                max_bytes = _env_int("RESPONSE_CACHE_DB_MAX_BYTES", _DEFAULT_MAX_BYTES)
+                _CACHED_DISK_CACHE = SQLiteResponseCache(path, max_bytes)
+    return _CACHED_DISK_CACHE
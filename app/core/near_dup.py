@@ -0,0 +1,259 @@
+"""
+근사 중복 요청 캐시 (MinHash + LSH).
+
+userId, 날짜, 숫자 하루 차이, 실패 사유 문구처럼 사소하게만 다른 요청은
+정확 키 캐시로는 hit가 나지 않는다. 여기서는 payload를 특성 집합으로 바꾼 뒤
+- 반드시 같아야 하는 필드(미션 유형/결과 등)는 bucket 키로 묶고
+- 나머지 필드는 MinHash 서명 → LSH 밴드로 후보를 찾고, 실제 Jaccard 유사도로 확인
+해서 임계값 이상이면 저장된 응답을 돌려준다.
+유저 컨텍스트로 개인화되는 호출은 호출 측(app/api/services)이 컨텍스트 fingerprint를 bucket에
+넣으므로, 컨텍스트가 같은 유저끼리만 응답을 공유한다.
+
+특성 집합 규칙 (canonical_features)
+- 문자열: NFKC + 소문자 + 공백/구두점 제거 후 문자 3-gram (한글도 글자 단위)
+- 정수: thermometer 인코딩 (f>=0 ... f>=v) → 3과 4의 유사도는 4/5, 3과 9는 4/10
+
+환경변수 (선택)
+- NEAR_DUP_CACHE=true                 # 켜야 동작 (기본 꺼짐)
+- NEAR_DUP_THRESHOLD_<ENDPOINT>=0.9   # 엔드포인트별 임계값 (0이면 해당 엔드포인트만 끔)
+- NEAR_DUP_TTL_SECONDS=3600
+- NEAR_DUP_MAX_ENTRIES=5000           # 네임스페이스별 상한 (LRU)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import struct
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Hashable, Mapping, Optional, Set, Tuple
+
+_NUM_PERM = 64
+_BANDS = 16              # 16 밴드 x 4 행 → 유사도 0.5 부근부터 후보로 잡힘
+_ROWS = _NUM_PERM // _BANDS
+_SHINGLE_SIZE = 3
+_MAX_THERMOMETER = 31    # 정수 인코딩 상한 (더 큰 값은 같은 값으로 취급)
+
+_DEFAULT_TTL_SECONDS = 3600.0
+_DEFAULT_MAX_ENTRIES = 5000
+_COUNTER_NAMES = ("hits", "misses", "candidates", "evictions")
+
+_unpack_hash_row = struct.Struct(f"<{_NUM_PERM}I").unpack
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def _normalize_text(value: str) -> str:
+    return _NON_WORD.sub("", unicodedata.normalize("NFKC", value).lower())
+
+
+def canonical_features(fields: Mapping[str, Any]) -> FrozenSet[str]:
+    """근사 비교용 필드를 특성 집합으로 바꾼다. None/빈 값은 "없음" 특성 하나로 표현."""
+    features: Set[str] = set()
+    for name, value in fields.items():
+        if value is None or value == "":
+            features.add(f"{name}:none")
+        elif isinstance(value, bool):
+            features.add(f"{name}={value}")
+        elif isinstance(value, int):
+            for step in range(min(max(value, 0), _MAX_THERMOMETER) + 1):
+                features.add(f"{name}>={step}")
+        else:
+            text = _normalize_text(str(value))
+            if len(text) <= _SHINGLE_SIZE:
+                features.add(f"{name}:{text}")
+            else:
+                for i in range(len(text) - _SHINGLE_SIZE + 1):
+                    features.add(f"{name}:{text[i:i + _SHINGLE_SIZE]}")
+    return frozenset(features)
+
+
+@lru_cache(maxsize=1 << 16)
+def _feature_hashes(feature: str) -> Tuple[int, ...]:
+    # 특성 하나당 독립 해시 _NUM_PERM개 (shake_128 출력을 32비트씩 자름).
+    # 3-gram/숫자 특성은 요청 간에 많이 겹쳐서 캐시 hit가 대부분이다.
+    return _unpack_hash_row(hashlib.shake_128(feature.encode("utf-8")).digest(4 * _NUM_PERM))
+
+
+def minhash_signature(features: FrozenSet[str]) -> Tuple[int, ...]:
+    if not features:
+        return (0,) * _NUM_PERM
+    # 슬롯별 최솟값: 파이썬 루프 대신 zip/min으로 C 레벨에서 계산
+    return tuple(map(min, zip(*map(_feature_hashes, features))))
+
+
+def jaccard(left: FrozenSet[str], right: FrozenSet[str]) -> float:
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
+
+
+_BandKey = Tuple[Hashable, int, Tuple[int, ...]]
+
+
+@dataclass(frozen=True)
+class NearDupKey:
+    """조회/저장에 함께 쓰는 키. 서명 계산은 만들 때 한 번만 한다."""
+    bucket: Hashable
+    features: FrozenSet[str]
+    band_keys: Tuple[_BandKey, ...]
+
+
+def make_near_dup_key(bucket: Hashable, fields: Mapping[str, Any]) -> NearDupKey:
+    features = canonical_features(fields)
+    signature = minhash_signature(features)
+    band_keys = tuple(
+        (bucket, band, signature[band * _ROWS:(band + 1) * _ROWS]) for band in range(_BANDS)
+    )
+    return NearDupKey(bucket, features, band_keys)
+
+
+class _Entry:
+    __slots__ = ("expires_at", "key", "value")
+
+    def __init__(self, expires_at: float, key: NearDupKey, value: Any):
+        self.expires_at = expires_at
+        self.key = key
+        self.value = value
+
+
+class NearDuplicateIndex:
+    def __init__(self, max_entries: int = _DEFAULT_MAX_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._next_id = 0
+        # namespace -> entry_id -> _Entry (LRU 순서)
+        self._entries: Dict[str, "OrderedDict[int, _Entry]"] = {}
+        # namespace -> (bucket, band, band_values) -> entry ids
+        self._bands: Dict[str, Dict[_BandKey, Set[int]]] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, namespace: str, counter: str, n: int = 1) -> None:
+        counters = self._counters.get(namespace)
+        if counters is None:
+            counters = self._counters[namespace] = dict.fromkeys(_COUNTER_NAMES, 0)
+        counters[counter] += n
+
+    def _remove_locked(self, namespace: str, entry_id: int) -> None:
+        entry = self._entries[namespace].pop(entry_id)
+        bands = self._bands[namespace]
+        for band_key in entry.key.band_keys:
+            ids = bands.get(band_key)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del bands[band_key]
+
+    def lookup(self, namespace: str, key: NearDupKey, threshold: float) -> Optional[Tuple[Any, float]]:
+        """임계값 이상인 가장 유사한 항목의 (값, 유사도). 없으면 None."""
+        now = time.monotonic()
+        with self._lock:
+            entries = self._entries.get(namespace)
+            if not entries:
+                self._count(namespace, "misses")
+                return None
+            bands = self._bands[namespace]
+            candidate_ids: Set[int] = set()
+            for band_key in key.band_keys:
+                candidate_ids.update(bands.get(band_key, ()))
+
+            best_id, best_similarity = None, threshold
+            for entry_id in candidate_ids:
+                entry = entries[entry_id]
+                if entry.expires_at <= now:
+                    self._remove_locked(namespace, entry_id)
+                    continue
+                similarity = jaccard(key.features, entry.key.features)
+                if similarity >= best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+            self._count(namespace, "candidates", len(candidate_ids))
+
+            if best_id is None:
+                self._count(namespace, "misses")
+                return None
+            entries.move_to_end(best_id)
+            self._count(namespace, "hits")
+            return entries[best_id].value, best_similarity
+
+    def add(self, namespace: str, key: NearDupKey, value: Any, ttl_seconds: float) -> None:
+        if ttl_seconds <= 0:
+            return
+        entry = _Entry(time.monotonic() + ttl_seconds, key, value)
+        with self._lock:
+            entries = self._entries.setdefault(namespace, OrderedDict())
+            bands = self._bands.setdefault(namespace, {})
+            entry_id = self._next_id
+            self._next_id += 1
+            entries[entry_id] = entry
+            for band_key in key.band_keys:
+                bands.setdefault(band_key, set()).add(entry_id)
+            while len(entries) > self.max_entries:
+                oldest_id = next(iter(entries))
+                self._remove_locked(namespace, oldest_id)
+                self._count(namespace, "evictions")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bands.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_entries": self.max_entries,
+                "namespaces": {
+                    ns: {**counters, "size": len(self._entries.get(ns, ()))}
+                    for ns, counters in self._counters.items()
+                },
+            }
+
+
+def _env_int(key: str, default: int) -> int:
+    raw = os.environ.get(key)
+    if raw:
+        try:
+            return int(raw)
+        except ValueError:
+            pass
+    return default
+
+
+def _env_float(key: str, default: float) -> float:
+    raw = os.environ.get(key)
+    if raw:
+        try:
+            return float(raw)
+        except ValueError:
+            pass
+    return default
+
+
+def near_dup_enabled() -> bool:
+    return os.environ.get("NEAR_DUP_CACHE", "false").lower() in ("1", "true", "yes")
+
+
+def near_dup_threshold(name: str, default: float) -> float:
+    """엔드포인트 임계값. 전체 스위치가 꺼져 있으면 0 (사용 안 함)."""
+    if not near_dup_enabled():
+        return 0.0
+    return _env_float(f"NEAR_DUP_THRESHOLD_{name.upper()}", default)
+
+
+def near_dup_ttl_seconds() -> float:
+    return _env_float("NEAR_DUP_TTL_SECONDS", _DEFAULT_TTL_SECONDS)
+
+
+_CACHED_NEAR_DUP_INDEX: Optional[NearDuplicateIndex] = None
+
+
+def get_near_dup_index() -> NearDuplicateIndex:
+    global _CACHED_NEAR_DUP_INDEX
+    if _CACHED_NEAR_DUP_INDEX is None:
+        _CACHED_NEAR_DUP_INDEX = NearDuplicateIndex(_env_int("NEAR_DUP_MAX_ENTRIES", _DEFAULT_MAX_ENTRIES))
+    return _CACHED_NEAR_DUP_INDEX
@@ -0,0 +1,56 @@
+"""
+Single-flight: 같은 키로 동시에 들어온 요청은 하나의 실행 결과를 함께 기다린다.
+
+- 첫 요청(leader)이 실제 작업을 별도 task로 시작하고, 나머지(coalesced)는 그 task를 await
+- 작업은 호출자와 분리된 task라서, leader 요청이 취소돼도 다른 대기자는 결과를 받는다
+- 결과/예외 모두 공유되며, 작업이 끝나면 키는 즉시 제거된다 (결과 캐시가 아님)
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: "asyncio.Future[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 모든 대기자가 취소된 경우에도 "exception was never retrieved" 경고가 나지 않도록
+        if not task.cancelled():
+            task.exception()
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
+
+
+_CACHED_SINGLE_FLIGHT: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    global _CACHED_SINGLE_FLIGHT
+    if _CACHED_SINGLE_FLIGHT is None:
+        _CACHED_SINGLE_FLIGHT = SingleFlight()
+    return _CACHED_SINGLE_FLIGHT
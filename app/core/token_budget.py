@@ -0,0 +1,132 @@
+"""
+엔드포인트별 프롬프트 토큰 예산.
+
+프롬프트 = 고정 구간(system prompt, 템플릿 본문, 짧은 변수) + 잘라낼 수 있는 구간들 + 유저 컨텍스트 메시지.
+예산을 넘으면 가치가 낮은 것부터 줄인다.
+1) 유저 컨텍스트 메시지: 요청 본문에 같은 이력/선호가 이미 들어 있어 중복 → 통째로 생략
+2) 섹션별 오래된/순위 낮은 줄: min_lines까지 한 줄씩 제거
+그래도 넘치면 그대로 보내고 over_budget으로 집계한다.
+
+환경변수 (선택)
+- PROMPT_TOKEN_BUDGET_<ENDPOINT>=2048   # 0이면 해당 엔드포인트 예산 없음
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Literal, Optional
+
+from prompt_templates import estimate_tokens
+
+
+@dataclass
+class BudgetSection:
+    """
+    잘라낼 수 있는 여러 줄 구간. lines는 렌더링 순서 그대로.
+    항목 하나가 여러 줄(제목 + 들여쓴 하위 줄)일 수 있고, 줄일 때는 항목 단위로 통째로 뺀다.
+    """
+    lines: List[str]
+    trim_from: Literal["start", "end"] = "start"  # start: 앞(오래된 것)부터, end: 뒤(순위 낮은 것)부터
+    min_lines: int = 0
+    empty_text: str = ""
+
+    def render(self) -> str:
+        return "\n".join(self.lines) if self.lines else self.empty_text
+
+
+@dataclass
+class BudgetResult:
+    sections: Dict[str, BudgetSection]
+    include_context: bool
+    original_tokens: int
+    final_tokens: int
+    dropped_lines: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.final_tokens
+
+
+def _line_tokens(line: str) -> int:
+    return estimate_tokens(line) + line.count("\n") + 1  # 줄바꿈 포함
+
+
+def fit_to_budget(
+    budget: int,
+    fixed_tokens: int,
+    context_tokens: int,
+    sections: Dict[str, BudgetSection],
+) -> BudgetResult:
+    section_tokens = {
+        name: sum(_line_tokens(line) for line in section.lines) for name, section in sections.items()
+    }
+    original = fixed_tokens + context_tokens + sum(section_tokens.values())
+    result = BudgetResult(
+        sections={name: BudgetSection(list(s.lines), s.trim_from, s.min_lines, s.empty_text) for name, s in sections.items()},
+        include_context=True,
+        original_tokens=original,
+        final_tokens=original,
+    )
+    if budget <= 0 or original <= budget:
+        return result
+
+    total = original
+    if context_tokens:
+        result.include_context = False
+        total -= context_tokens
+
+    for name, section in result.sections.items():
+        while total > budget and len(section.lines) > section.min_lines:
+            line = section.lines.pop(0 if section.trim_from == "start" else -1)
+            total -= _line_tokens(line)
+            result.dropped_lines[name] = result.dropped_lines.get(name, 0) + 1
+        if total <= budget:
+            break
+
+    result.final_tokens = total
+    return result
+
+
+class TokenBudgetStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def record(self, endpoint: str, result: BudgetResult, budget: int) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(
+                endpoint, {"requests": 0, "trimmed": 0, "over_budget": 0, "tokens_saved": 0, "prompt_tokens": 0}
+            )
+            counters["requests"] += 1
+            counters["prompt_tokens"] += result.final_tokens
+            if result.tokens_saved:
+                counters["trimmed"] += 1
+                counters["tokens_saved"] += result.tokens_saved
+            if budget > 0 and result.final_tokens > budget:
+                counters["over_budget"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {name: dict(c) for name, c in self._counters.items()}
+
+
+def token_budget(endpoint: str, default: int) -> int:
+    raw = os.environ.get(f"PROMPT_TOKEN_BUDGET_{endpoint.upper()}")
+    if raw:
+        try:
+            return int(raw)
+        except ValueError:
+            pass
+    return default
+
+
+_CACHED_BUDGET_STATS: Optional[TokenBudgetStats] = None
+
+
+def get_token_budget_stats() -> TokenBudgetStats:
+    global _CACHED_BUDGET_STATS
+    if _CACHED_BUDGET_STATS is None:
+        _CACHED_BUDGET_STATS = TokenBudgetStats()
+    return _CACHED_BUDGET_STATS
@@ -1,21 +1,64 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Dict
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from agent_system import close_llm_clients, warm_up_agent_system
+from user_store import get_user_store
+from app.api.endpoints import daily_missions, daily_analysis, weekly_analysis, chat, metrics
+
+# Filled by the startup warmup; /ready reports 200 only once "ready" is True.
+_READINESS: Dict[str, Any] = {"ready": False, "warmup": None, "error": None}
+
+
+async def _warm_up() -> None:
+    try:
+        _READINESS["warmup"] = await warm_up_agent_system()
+        _READINESS["ready"] = True
+    except Exception as e:
+        _READINESS["error"] = f"{type(e).__name__}: {e}"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so the process answers liveness checks meanwhile.
+    _READINESS.update(ready=False, warmup=None, error=None)
+    warmup = asyncio.create_task(_warm_up())
+    try:
+        yield
+    finally:
+        warmup.cancel()
+        await asyncio.gather(warmup, return_exceptions=True)
+        await close_llm_clients()
+        # Write out batched user-context updates before the worker exits.
+        await asyncio.to_thread(get_user_store().flush)
 
-from app.api.endpoints import daily_missions, daily_analysis, weekly_analysis, chat
 
 app = FastAPI(
     title="OMTeam AI Server",
     description="AI Agent Orchestration for Daily Missions, Feedback, and Chat",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 @app.get("/")
 async def read_root():
     return {"message": "OMTeam AI Server is running!"}
 
+@app.get("/ready")
+async def read_ready():
+    if _READINESS["ready"]:
+        return {"status": "ready", **_READINESS["warmup"]}
+    status = "failed" if _READINESS["error"] else "warming_up"
+    return JSONResponse(status_code=503, content={"status": status, "error": _READINESS["error"]})
+
 app.include_router(daily_missions.router)
 app.include_router(daily_analysis.router)
 app.include_router(weekly_analysis.router)
 app.include_router(chat.router)
+app.include_router(metrics.router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,174 @@
+"""
+LLM 헤지 요청 (opt-in, async 에이전트 노드 전용)
+
+- 노드별 최근 지연시간을 모아 두고, 첫 호출이 그 노드의 p{LLM_HEDGE_PERCENTILE} 안에 끝나지 않으면
+  같은 호출을 하나 더 보내 먼저 끝난 쪽을 쓰고 나머지는 취소한다 (꼬리 지연 단축)
+- 헤지는 토큰을 두 배로 쓰므로 최근 호출 중 헤지 비율이 LLM_HEDGE_MAX_RATE를 넘지 않게 제한
+- 샘플이 LLM_HEDGE_MIN_SAMPLES보다 적으면 기준이 없으므로 헤지하지 않는다
+- 지연시간은 헤지를 끈 상태에서도 기록한다 (켜는 즉시 기준값 사용). 취소된 호출은 기록하지 않는다
+
+토큰 스트리밍 호출과 동기 호출은 헤지하지 않는다.
+
+환경변수 (선택)
+- LLM_HEDGING=true
+- LLM_HEDGE_PERCENTILE=95
+- LLM_HEDGE_MIN_SAMPLES=20
+- LLM_HEDGE_MAX_RATE=0.1
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+_LATENCY_WINDOW = 256
+_RATE_WINDOW = 200
+
+
+def hedging_enabled() -> bool:
+    return os.environ.get("LLM_HEDGING", "").lower() in {"true", "1", "yes"}
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(name)
+    if raw:
+        try:
+            return float(raw)
+        except ValueError:
+            pass
+    return default
+
+
+class LatencyTracker:
+    """키(노드)별 최근 지연시간 창."""
+
+    def __init__(self, window: int = _LATENCY_WINDOW) -> None:
+        self._window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self._window)).append(seconds)
+
+    def count(self, key: str) -> int:
+        with self._lock:
+            return len(self._samples.get(key, ()))
+
+    def percentile(self, key: str, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+
+class Hedger:
+    def __init__(self, percentile: float = 95.0, min_samples: int = 20, max_rate: float = 0.1) -> None:
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_rate = max_rate
+        self.latencies = LatencyTracker()
+        self._recent: Deque[bool] = deque(maxlen=_RATE_WINDOW)  # 최근 호출마다 헤지 여부
+        self._recent_hedges = 0
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        if self.latencies.count(key) < self.min_samples:
+            return None
+        return self.latencies.percentile(key, self.percentile)
+
+    def _note_call(self, hedged: bool) -> None:
+        if len(self._recent) == self._recent.maxlen and self._recent[0]:
+            self._recent_hedges -= 1
+        self._recent.append(hedged)
+        self._recent_hedges += int(hedged)
+
+    def _within_rate(self) -> bool:
+        return self._recent_hedges + 1 <= self.max_rate * max(len(self._recent), 1)
+
+    def _counters(self, key: str) -> Dict[str, int]:
+        return self._stats.setdefault(key, {"calls": 0, "hedges_fired": 0, "hedges_won": 0, "rate_limited": 0})
+
+    async def _timed(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        started = time.perf_counter()
+        result = await fn()
+        self.latencies.record(key, time.perf_counter() - started)
+        return result
+
+    async def call(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        counters = self._counters(key)
+        counters["calls"] += 1
+        delay = self.hedge_delay(key) if hedging_enabled() else None
+        if delay is None:
+            return await self._timed(key, fn)
+
+        primary = asyncio.ensure_future(self._timed(key, fn))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                if self._within_rate():
+                    hedge = asyncio.ensure_future(self._timed(key, fn))
+                    tasks.add(hedge)
+                    counters["hedges_fired"] += 1
+                    self._note_call(True)
+                else:
+                    counters["rate_limited"] += 1
+                    self._note_call(False)
+            else:
+                self._note_call(False)
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # 동시에 끝났으면 primary 우선, 실패한 쪽은 버리고 남은 쪽을 기다린다
+                for task in sorted(done, key=lambda t: t is not primary):
+                    if task.exception() is None:
+                        if task is not primary:
+                            counters["hedges_won"] += 1
+                        return task.result()
+            return primary.result()  # 모두 실패 → 첫 호출의 예외
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        nodes = {}
+        for key, counters in self._stats.items():
+            delay = self.hedge_delay(key)
+            nodes[key] = {
+                **counters,
+                "samples": self.latencies.count(key),
+                "hedge_after_ms": round(delay * 1000, 1) if delay is not None else None,
+            }
+        return {
+            "enabled": hedging_enabled(),
+            "percentile": self.percentile,
+            "max_rate": self.max_rate,
+            "recent_rate": round(self._recent_hedges / len(self._recent), 4) if self._recent else 0.0,
+            "nodes": nodes,
+        }
+
+
+_CACHED_HEDGER: Optional[Hedger] = None
+
+
+def get_hedger() -> Hedger:
+    global _CACHED_HEDGER
+    if _CACHED_HEDGER is None:
+        _CACHED_HEDGER = Hedger(
+            percentile=min(max(_env_float("LLM_HEDGE_PERCENTILE", 95.0), 0.0), 100.0),
+            min_samples=max(1, int(_env_float("LLM_HEDGE_MIN_SAMPLES", 20))),
+            max_rate=min(max(_env_float("LLM_HEDGE_MAX_RATE", 0.1), 0.0), 1.0),
+        )
+    return _CACHED_HEDGER
@@ -0,0 +1,287 @@
+"""
+LLM 호출 복원력 계층 (타임아웃 + 지터 백오프 재시도 + 서킷 브레이커)
+
+- 시도마다 타임아웃을 걸고, 재시도 가능한 오류(타임아웃/연결 오류/429/5xx)만 지수 백오프(full jitter)로 재시도
+- 재시도 가능한 오류가 연속으로 쌓이면 서킷을 열어, 제공자가 불안정한 동안은 기다리지 않고 즉시 실패
+  (에이전트 노드는 build_error_response + agent_failed → API는 규칙 기반 대체 응답)
+- reset 시간이 지나면 half-open으로 한 번만 시험 호출하고, 성공하면 닫고 실패하면 다시 연다
+- 400 같은 재시도 불가 오류는 제공자가 응답한 것이므로 장애로 세지 않는다
+
+환경변수 (선택)
+- LLM_TIMEOUT_SECONDS=30               # 시도당 타임아웃, 0이면 없음
+- LLM_MAX_RETRIES=2                    # 첫 시도 이후 재시도 횟수
+- LLM_RETRY_BASE_DELAY_SECONDS=0.5
+- LLM_RETRY_MAX_DELAY_SECONDS=4
+- LLM_CIRCUIT_FAILURE_THRESHOLD=5      # 연속 실패 몇 번에 서킷을 열지
+- LLM_CIRCUIT_RESET_SECONDS=30         # 열린 뒤 half-open 시험까지 대기
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+_RETRYABLE_STATUS = {408, 409, 429}
+_JITTER = random.Random()
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(name)
+    if raw:
+        try:
+            return max(0.0, float(raw))
+        except ValueError:
+            pass
+    return default
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name)
+    if raw:
+        try:
+            return max(0, int(raw))
+        except ValueError:
+            pass
+    return default
+
+
+def llm_timeout_seconds() -> float:
+    return _env_float("LLM_TIMEOUT_SECONDS", 30.0)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_retries: int = 2
+    base_delay: float = 0.5
+    max_delay: float = 4.0
+    timeout: float = 30.0  # 0이면 타임아웃 없음
+
+    def backoff(self, attempt: int, rng: Optional[random.Random] = None) -> float:
+        """attempt번째 재시도 전 대기 시간 (full jitter: 0 ~ min(max, base * 2^attempt))."""
+        return (rng or _JITTER).uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+def retry_policy_from_env() -> RetryPolicy:
+    return RetryPolicy(
+        max_retries=_env_int("LLM_MAX_RETRIES", 2),
+        base_delay=_env_float("LLM_RETRY_BASE_DELAY_SECONDS", 0.5),
+        max_delay=_env_float("LLM_RETRY_MAX_DELAY_SECONDS", 4.0),
+        timeout=llm_timeout_seconds(),
+    )
+
+
+def _retryable_client_errors() -> Tuple[Type[BaseException], ...]:
+    # openai는 import 비용이 커서 직접 import하지 않는다. 아직 로드되지 않았다면 그 예외가 날 수도 없다.
+    openai = sys.modules.get("openai")
+    return (openai.APIConnectionError,) if openai is not None else ()  # APITimeoutError 포함
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, (TimeoutError, ConnectionError) + _retryable_client_errors()):
+        return True
+    status = getattr(exc, "status_code", None)
+    return isinstance(status, int) and (status in _RETRYABLE_STATUS or status >= 500)
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM circuit is open (retry after {retry_after:.1f}s)")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._counters = {"successes": 0, "failures": 0, "opened": 0, "short_circuited": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> None:
+        """호출해도 되면 그냥 반환, 서킷이 열려 있으면 CircuitOpenError."""
+        with self._lock:
+            if self._state == OPEN:
+                remaining = self._opened_at + self.reset_seconds - self._clock()
+                if remaining > 0:
+                    self._counters["short_circuited"] += 1
+                    raise CircuitOpenError(remaining)
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN:
+                if self._probe_in_flight:
+                    # 시험 호출은 하나만; 결과가 나올 때까지 나머지는 즉시 실패
+                    self._counters["short_circuited"] += 1
+                    raise CircuitOpenError(self.reset_seconds)
+                self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._counters["successes"] += 1
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            self._state = CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._counters["failures"] += 1
+            self._consecutive_failures += 1
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._counters["opened"] += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+    def release(self) -> None:
+        """결과 없이 끝난 호출(취소) → half-open 시험 슬롯만 반납."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_after = 0.0
+            if self._state == OPEN:
+                retry_after = max(0.0, self._opened_at + self.reset_seconds - self._clock())
+            return {
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "retry_after_seconds": round(retry_after, 3),
+                **self._counters,
+            }
+
+
+@contextmanager
+def guarded(breaker: CircuitBreaker) -> Iterator[None]:
+    """LLM 호출 한 번(재시도의 한 시도)을 서킷 브레이커로 감싼다. 재시도할 수 없는 스트리밍 호출은 이것만 쓴다."""
+    breaker.allow()
+    try:
+        yield
+    except Exception as exc:
+        if is_retryable(exc):
+            breaker.record_failure()
+        else:
+            breaker.record_success()  # 제공자는 응답함 (요청 자체의 문제)
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+    breaker.record_success()
+
+
+_RETRY_STATS: Dict[str, int] = {
+    "calls": 0,
+    "retries": 0,
+    "timeouts": 0,
+    "gave_up": 0,
+}
+
+
+def _should_retry(exc: Exception, attempt: int, policy: RetryPolicy) -> bool:
+    if isinstance(exc, TimeoutError):
+        _RETRY_STATS["timeouts"] += 1
+    if not is_retryable(exc):
+        return False
+    if attempt >= policy.max_retries:
+        _RETRY_STATS["gave_up"] += 1
+        return False
+    _RETRY_STATS["retries"] += 1
+    return True
+
+
+def _resolve_policy(policy: Optional[RetryPolicy], max_retries: Optional[int]) -> RetryPolicy:
+    policy = policy or retry_policy_from_env()
+    return policy if max_retries is None else replace(policy, max_retries=max_retries)
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    *,
+    policy: Optional[RetryPolicy] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    max_retries: Optional[int] = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> T:
+    """동기 호출용. 시도당 타임아웃은 클라이언트(ChatUpstage timeout)에 맡긴다."""
+    policy = _resolve_policy(policy, max_retries)
+    breaker = breaker or get_llm_circuit_breaker()
+    _RETRY_STATS["calls"] += 1
+    attempt = 0
+    while True:
+        try:
+            with guarded(breaker):
+                return fn()
+        except Exception as exc:
+            if not _should_retry(exc, attempt, policy):
+                raise
+        sleep(policy.backoff(attempt))
+        attempt += 1
+
+
+async def acall_with_retry(
+    fn: Callable[[], Awaitable[T]],
+    *,
+    policy: Optional[RetryPolicy] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    max_retries: Optional[int] = None,
+) -> T:
+    policy = _resolve_policy(policy, max_retries)
+    breaker = breaker or get_llm_circuit_breaker()
+    _RETRY_STATS["calls"] += 1
+    attempt = 0
+    while True:
+        try:
+            with guarded(breaker):
+                if policy.timeout > 0:
+                    return await asyncio.wait_for(fn(), policy.timeout)
+                return await fn()
+        except Exception as exc:
+            if not _should_retry(exc, attempt, policy):
+                raise
+        await asyncio.sleep(policy.backoff(attempt))
+        attempt += 1
+
+
+_CACHED_LLM_BREAKER: Optional[CircuitBreaker] = None
+
+
+def get_llm_circuit_breaker() -> CircuitBreaker:
+    global _CACHED_LLM_BREAKER
+    if _CACHED_LLM_BREAKER is None:
+        _CACHED_LLM_BREAKER = CircuitBreaker(
+            failure_threshold=_env_int("LLM_CIRCUIT_FAILURE_THRESHOLD", 5),
+            reset_seconds=_env_float("LLM_CIRCUIT_RESET_SECONDS", 30.0),
+        )
+    return _CACHED_LLM_BREAKER
+
+
+def get_llm_resilience_stats() -> Dict[str, Any]:
+    return {"retry": dict(_RETRY_STATS), "circuit": get_llm_circuit_breaker().snapshot()}
@@ -0,0 +1,115 @@
+"""
+프롬프트 템플릿 레지스트리.
+
+- import 시점에 템플릿을 한 번만 파싱해서 고정 구간(literal)과 변수 구간을 분리
+- render()는 변수 값만 끼워 넣고 join (큰 한국어 본문/JSON 예시를 매 호출마다 다시 만들지 않음)
+- 템플릿마다 원문 해시 기반 version id → 캐시 키에 넣으면 프롬프트 수정 시 자동 무효화
+- 고정 구간의 토큰 수를 미리 계산해 두어 예산/메트릭에 사용
+
+템플릿 문법은 str.format과 같다: {name}은 변수, {{ }}는 중괄호 문자 그대로.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import textwrap
+from dataclasses import dataclass
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토크나이저 없이 쓰는 토큰 수 추정치.
+    한글 음절은 대략 1토큰, 그 외 문자(영문/숫자/기호/공백)는 4글자당 1토큰으로 계산한다.
+    """
+    hangul = sum(1 for ch in text if "가" <= ch <= "힣")
+    return hangul + math.ceil((len(text) - hangul) / 4)
+
+
+@dataclass(frozen=True)
+class RenderedPrompt:
+    """렌더링 결과. 캐시 키는 전체 본문 대신 (version, variables)로 만든다."""
+    text: str
+    template_name: str
+    version: str
+    variables: Tuple[Tuple[str, str], ...]
+
+
+class PromptTemplate:
+    def __init__(self, name: str, source: str):
+        self.name = name
+        self.source = source
+        self.version = hashlib.sha256(f"{name}\0{source}".encode("utf-8")).hexdigest()[:12]
+
+        literals: List[str] = []
+        fields: List[str] = []
+        pending = ""
+        for literal, field_name, format_spec, conversion in Formatter().parse(source):
+            pending += literal
+            if field_name is None:
+                continue
+            if not field_name.isidentifier() or format_spec or conversion:
+                raise ValueError(f"prompt template '{name}' supports plain {{name}} fields only: {field_name!r}")
+            literals.append(pending)
+            fields.append(field_name)
+            pending = ""
+        literals.append(pending)
+
+        self._literals: Tuple[str, ...] = tuple(literals)
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self.static_text = "".join(self._literals)
+        self.static_tokens = estimate_tokens(self.static_text)
+
+    def render(self, **values: Any) -> RenderedPrompt:
+        missing = set(self.fields) - values.keys()
+        if missing:
+            raise KeyError(f"prompt template '{self.name}' is missing fields: {sorted(missing)}")
+        rendered = {name: str(values[name]) for name in set(self.fields)}
+        parts = [self._literals[0]]
+        for field_name, literal in zip(self.fields, self._literals[1:]):
+            parts.append(rendered[field_name])
+            parts.append(literal)
+        return RenderedPrompt(
+            text="".join(parts),
+            template_name=self.name,
+            version=self.version,
+            variables=tuple(sorted(rendered.items())),
+        )
+
+
+class PromptRegistry:
+    def __init__(self) -> None:
+        self._templates: Dict[str, PromptTemplate] = {}
+
+    def register(self, name: str, source: str, *, dedent: bool = True) -> PromptTemplate:
+        if name in self._templates:
+            raise ValueError(f"prompt template '{name}' is already registered")
+        template = PromptTemplate(name, textwrap.dedent(source).strip() + "\n" if dedent else source)
+        self._templates[name] = template
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        return self._templates[name]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "version": template.version,
+                "fields": list(template.fields),
+                "static_chars": len(template.static_text),
+                "static_tokens": template.static_tokens,
+            }
+            for name, template in self._templates.items()
+        }
+
+
+_CACHED_PROMPT_REGISTRY: Optional[PromptRegistry] = None
+
+
+def get_prompt_registry() -> PromptRegistry:
+    global _CACHED_PROMPT_REGISTRY
+    if _CACHED_PROMPT_REGISTRY is None:
+        _CACHED_PROMPT_REGISTRY = PromptRegistry()
+    return _CACHED_PROMPT_REGISTRY
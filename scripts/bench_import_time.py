@@ -0,0 +1,144 @@
+"""
+콜드 import 시간 벤치마크 (`python -X importtime` 기반).
+
+모듈마다 새 인터프리터를 --runs번 띄워 `import <module>`의 누적 import 시간을 재고,
+- 중앙값 / 최댓값과 예산(IMPORT_BUDGET_MS) 대비 결과
+- 가장 무거운 하위 import 상위 N개 (중앙값 실행 기준)
+- 첫 사용까지 미뤄야 하는 무거운 모듈(LAZY_MODULES)이 import 시점에 로드됐는지
+를 출력한다. 예산 초과나 지연 로딩 위반이 있으면 종료 코드 1 (CI에서 회귀 확인용).
+
+사용 예:
+    python -m scripts.bench_import_time
+    python -m scripts.bench_import_time --module agent_system --runs 10 --top 15
+    python -m scripts.bench_import_time --budget-ms 800
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# autoscaling 시 워커가 트래픽을 받기까지의 import 예산 (ms, 누적 import 시간)
+IMPORT_BUDGET_MS: Dict[str, float] = {
+    "agent_system": 800.0,
+    "app.main": 1500.0,
+}
+
+# 요청 처리 중 처음 필요할 때 import해야 하는 무거운 모듈 (provider SDK / 그래프 빌더)
+LAZY_MODULES: Tuple[str, ...] = ("langchain_upstage", "openai", "httpx", "langgraph.graph")
+
+
+@dataclass
+class ImportEntry:
+    module: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+
+@dataclass
+class ImportRun:
+    entries: List[ImportEntry]
+
+    def cumulative_us(self, module: str) -> Optional[int]:
+        for entry in self.entries:
+            if entry.module == module:
+                return entry.cumulative_us
+        return None
+
+    def loaded(self, module: str) -> bool:
+        return any(entry.module == module for entry in self.entries)
+
+    def heaviest_children(self, module: str, top: int) -> List[ImportEntry]:
+        """`module`이 직접 import한 모듈 중 누적 시간이 큰 순 (importtime은 자식을 부모보다 먼저 출력)."""
+        index = next((i for i, e in enumerate(self.entries) if e.module == module), None)
+        if index is None:
+            return []
+        parent_depth = self.entries[index].depth
+        children = []
+        for entry in reversed(self.entries[:index]):
+            if entry.depth <= parent_depth:
+                break
+            if entry.depth == parent_depth + 1:
+                children.append(entry)
+        return sorted(children, key=lambda e: e.cumulative_us, reverse=True)[:top]
+
+
+def parse_importtime(stderr: str) -> ImportRun:
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        stripped = name.lstrip(" ")
+        entries.append(ImportEntry(
+            module=stripped.strip(),
+            depth=(len(name) - len(stripped) - 1) // 2,
+            self_us=int(self_us),
+            cumulative_us=int(cumulative_us),
+        ))
+    return ImportRun(entries)
+
+
+def measure(module: str) -> ImportRun:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def run_benchmark(module: str, runs: int) -> Tuple[List[int], ImportRun]:
+    measured = []
+    for _ in range(runs):
+        run = measure(module)
+        measured.append((run.cumulative_us(module) or 0, run))
+    measured.sort(key=lambda item: item[0])
+    return [us for us, _ in measured], measured[len(measured) // 2][1]
+
+
+def report(module: str, runs: int, top: int, budget_ms: Optional[float]) -> bool:
+    samples, median_run = run_benchmark(module, runs)
+    median_ms = statistics.median(samples) / 1000
+    print(f"{module}: median {median_ms:.1f}ms / max {samples[-1] / 1000:.1f}ms over {runs} runs")
+
+    ok = True
+    if budget_ms is not None:
+        within = median_ms <= budget_ms
+        ok &= within
+        print(f"  budget {budget_ms:.0f}ms: {'OK' if within else 'OVER'}")
+
+    eager = [name for name in LAZY_MODULES if median_run.loaded(name)]
+    if eager:
+        ok = False
+        print(f"  loaded eagerly (should be deferred): {', '.join(eager)}")
+
+    print("  heaviest direct imports:")
+    for entry in median_run.heaviest_children(module, top):
+        print(f"    {entry.cumulative_us / 1000:8.1f}ms  {entry.module}")
+    return ok
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure cold import time with python -X importtime.")
+    parser.add_argument("--module", action="append", help="module to import (default: all budgeted modules)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=None, help="override the budget for every module")
+    args = parser.parse_args(argv)
+
+    ok = True
+    for module in args.module or list(IMPORT_BUDGET_MS):
+        budget = args.budget_ms if args.budget_ms is not None else IMPORT_BUDGET_MS.get(module)
+        ok &= report(module, max(1, args.runs), max(0, args.top), budget)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
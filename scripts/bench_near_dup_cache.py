@@ -0,0 +1,163 @@
+"""
+근사 중복 캐시 벤치마크 (합성 코퍼스).
+
+몇 개의 기본 "상황"(미션 결과 + 실패 사유 + 최근 성공/실패 일수)에서
+날짜/사용자, 숫자 ±1, 실패 사유 문구(띄어쓰기/구두점/어미)를 흔든 DailyFeedback payload를 만들고,
+요청마다 조회 → miss면 저장하는 흐름을 흉내 내어
+- 정확 키 캐시 hit율 vs 근사 캐시 hit율
+- hit 중 "같은 상황"(같은 bucket + 같은 실패 사유 + 일수 차이 1 이하)의 응답을 받은 비율 (precision)
+- 키 생성(정규화 + MinHash) / 조회 지연
+을 출력한다.
+
+사용 예:
+    python -m scripts.bench_near_dup_cache
+    python -m scripts.bench_near_dup_cache --requests 20000 --bases 200 --threshold 0.8
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import time
+from typing import Any, Dict, List, Tuple
+
+from app.api.services import _DAILY_FEEDBACK, _daily_feedback_near_dup_fields
+from app.core.near_dup import NearDuplicateIndex, make_near_dup_key
+
+_REASONS = [
+    "야근 때문에 운동할 시간이 없었어요",
+    "회식이 있어서 식단을 지키지 못했어요",
+    "비가 와서 밖에서 걷기를 못 했어요",
+    "컨디션이 안 좋아서 쉬었어요",
+    "아침에 늦잠을 자서 시간이 부족했어요",
+    "출장 중이라 헬스장에 갈 수 없었어요",
+]
+_SUFFIX_VARIANTS = [("었어요", "었음"), ("었어요", "었습니다"), ("어요", "어요."), ("", "!")]
+
+
+def _perturb_reason(reason: str, rng: random.Random) -> str:
+    if rng.random() < 0.3:
+        reason = reason.replace(" ", "", 1)
+    if rng.random() < 0.3:
+        old, new = rng.choice(_SUFFIX_VARIANTS)
+        reason = reason[:-len(old)] + new if old and reason.endswith(old) else reason + new
+    return reason
+
+
+def _make_bases(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    bases = []
+    for _ in range(count):
+        failed = rng.random() < 0.6
+        bases.append({
+            "missionType": rng.choice(["EXERCISE", "DIET"]),
+            "difficulty": rng.choice(["EASY", "NORMAL", "HARD"]),
+            "mission_result": "FAILURE" if failed else "SUCCESS",
+            "fail_reason": rng.choice(_REASONS) if failed else None,
+            "successDays_recent": rng.randint(0, 7),
+            "failureDays_recent": rng.randint(0, 7),
+        })
+    return bases
+
+
+def _make_request(base: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+    event = dict(base)
+    event["date"] = f"2026-01-{rng.randint(1, 28):02d}"
+    for field in ("successDays_recent", "failureDays_recent"):
+        if rng.random() < 0.4:
+            event[field] = max(0, event[field] + rng.choice([-1, 1]))
+    if event["fail_reason"]:
+        event["fail_reason"] = _perturb_reason(event["fail_reason"], rng)
+    return {"event": event}
+
+
+def _equivalent(left: Dict[str, Any], right: Dict[str, Any]) -> bool:
+    same = ("missionType", "difficulty", "mission_result", "fail_reason")
+    counts = ("successDays_recent", "failureDays_recent")
+    return all(left[k] == right[k] for k in same) and all(abs(left[k] - right[k]) <= 1 for k in counts)
+
+
+def _exact_key(payload: Dict[str, Any]) -> str:
+    # 정확 키 캐시가 사용자/날짜를 무시한다고 가정해도 나오는 최선의 hit율
+    event = {k: v for k, v in payload["event"].items() if k != "date"}
+    return hashlib.sha256(json.dumps(event, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_benchmark(requests: int, bases: int, threshold: float, seed: int = 7) -> Dict[str, float]:
+    rng = random.Random(seed)
+    base_events = _make_bases(bases, rng)
+    corpus: List[Tuple[int, Dict[str, Any]]] = []
+    for _ in range(requests):
+        base_id = rng.randrange(bases)
+        corpus.append((base_id, _make_request(base_events[base_id], rng)))
+
+    index = NearDuplicateIndex(max_entries=max(requests, 1))
+    exact_seen = set()
+    exact_hits = near_hits = correct_hits = 0
+    key_seconds: List[float] = []
+    lookup_seconds: List[float] = []
+
+    for base_id, payload in corpus:
+        exact = _exact_key(payload)
+        if exact in exact_seen:
+            exact_hits += 1
+        exact_seen.add(exact)
+
+        started = time.perf_counter()
+        bucket, fields = _daily_feedback_near_dup_fields(payload)
+        key = make_near_dup_key(bucket, fields)
+        built = time.perf_counter()
+        match = index.lookup(_DAILY_FEEDBACK.name, key, threshold)
+        lookup_seconds.append(time.perf_counter() - built)
+        key_seconds.append(built - started)
+
+        if match is None:
+            index.add(_DAILY_FEEDBACK.name, key, base_id, ttl_seconds=3600)
+        else:
+            near_hits += 1
+            correct_hits += int(_equivalent(base_events[match[0]], base_events[base_id]))
+
+    key_seconds.sort()
+    lookup_seconds.sort()
+    counters = index.snapshot()["namespaces"][_DAILY_FEEDBACK.name]
+    return {
+        "requests": requests,
+        "exact_hit_rate": exact_hits / requests,
+        "near_dup_hit_rate": near_hits / requests,
+        "near_dup_precision": correct_hits / near_hits if near_hits else 1.0,
+        "avg_candidates": counters["candidates"] / requests,
+        "key_us_p50": _percentile(key_seconds, 50) * 1e6,
+        "key_us_p99": _percentile(key_seconds, 99) * 1e6,
+        "lookup_us_p50": _percentile(lookup_seconds, 50) * 1e6,
+        "lookup_us_p99": _percentile(lookup_seconds, 99) * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the near-duplicate request cache on a synthetic corpus.")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--bases", type=int, default=100, help="distinct underlying situations")
+    parser.add_argument("--threshold", type=float, default=_DAILY_FEEDBACK.near_dup_threshold)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    result = run_benchmark(max(1, args.requests), max(1, args.bases), args.threshold, args.seed)
+    print(f"requests          : {result['requests']}")
+    print(f"exact hit rate    : {result['exact_hit_rate']:.1%}")
+    print(f"near-dup hit rate : {result['near_dup_hit_rate']:.1%} (threshold {args.threshold})")
+    print(f"near-dup precision: {result['near_dup_precision']:.1%} (hit served an equivalent situation)")
+    print(f"avg LSH candidates: {result['avg_candidates']:.2f}")
+    print(f"key build         : p50 {result['key_us_p50']:.1f}us / p99 {result['key_us_p99']:.1f}us")
+    print(f"lookup            : p50 {result['lookup_us_p50']:.1f}us / p99 {result['lookup_us_p99']:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+유저 컨텍스트 저장소 메모리 벤치마크 (기본 100만 명).
+
+요청 본문처럼 매번 JSON에서 새로 파싱한 payload로 유저마다 이벤트를 --events개 쌓고,
+- 현재 인메모리 저장소 (__slots__ 레코드 + 이벤트 링 버퍼 + 코드/공유 문자열)
+- 이전 표현 (레코드 dict + 이벤트 dict 리스트, 이벤트마다 슬라이스로 새 리스트)
+의 유저당 메모리(tracemalloc 기준)와 update 처리 시간을 비교한다.
+
+사용 예:
+    python -m scripts.bench_user_memory
+    python -m scripts.bench_user_memory --users 200000 --events 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from user_store import MAX_USER_EVENTS, InMemoryUserStore
+
+_REASONS = ["야근 때문에 시간이 없었어요", "회식", "비가 와서 못 걸었어요", "컨디션 난조", None]
+
+
+def _payloads(count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(count):
+        failed = rng.random() < 0.4
+        payloads.append(json.dumps({
+            "preferences": {"lifestyleType": rng.choice(["MORNING", "EVENING"]), "minExerciseMinutes": 20},
+            "event": {
+                "date": f"2026-01-{i % 28 + 1:02d}",
+                "missionType": rng.choice(["EXERCISE", "DIET"]),
+                "difficulty": rng.choice(["EASY", "NORMAL", "HARD"]),
+                "mission_result": "FAILURE" if failed else "SUCCESS",
+                "fail_reason": rng.choice(_REASONS) if failed else None,
+                "successDays_recent": rng.randint(0, 7),
+                "failureDays_recent": rng.randint(0, 7),
+            },
+        }, ensure_ascii=False))
+    return payloads
+
+
+class _LegacyStore:
+    """이전 인메모리 표현 (비교용)."""
+
+    def __init__(self) -> None:
+        self.records: Dict[str, Dict[str, Any]] = {}
+
+    def update(self, user_id: str, payload: Dict[str, Any]) -> None:
+        record = self.records.get(user_id)
+        if record is None:
+            record = self.records[user_id] = {
+                "preferences": {}, "events": [], "stats": {"success": 0, "fail": 0}, "updated_at": time.time(), "version": 0,
+            }
+        record["preferences"].update(payload.get("preferences") or {})
+        event = {**payload["event"], "ts": time.time()}
+        record["events"].append(event)
+        record["events"] = record["events"][-MAX_USER_EVENTS:]
+        record["updated_at"] = time.time()
+
+
+def measure(name: str, update: Callable[[str, Dict[str, Any]], None], users: int, events: int, payloads: List[str]) -> Tuple[float, float]:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    n = 0
+    for round_ in range(events):
+        for u in range(users):
+            update(f"user-{u}", json.loads(payloads[n % len(payloads)]))
+            n += 1
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_user = current / users
+    print(f"{name:>8}: {per_user:8.0f} B/user  total {current / 2**20:8.1f} MiB  update {elapsed / n * 1e6:6.2f} us")
+    return per_user, elapsed / n
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure per-user memory of the in-memory user store.")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--events", type=int, default=5, help="events per user")
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args(argv)
+
+    payloads = _payloads(4096, seed=7)
+    print(f"users={args.users} events/user={args.events} (tracemalloc; update time includes tracing overhead)")
+
+    store = InMemoryUserStore(max_users=0)
+    current, _ = measure("slots", store.update, args.users, args.events, payloads)
+    del store
+    if not args.skip_legacy:
+        legacy = _LegacyStore()
+        baseline, _ = measure("legacy", legacy.update, args.users, args.events, payloads)
+        del legacy
+        print(f"  → {1 - current / baseline:.0%} less memory per user")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
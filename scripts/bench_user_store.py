@@ -0,0 +1,115 @@
+"""
+유저 컨텍스트 저장소 락 경합 벤치마크.
+
+스레드 N개가 유저 M명에게 요청 한 건의 저장소 접근(update → read → version)을 반복하면서
+락 조각(stripe) 수에 따른
+- 처리량 (ops/s, op = 요청 한 건의 저장소 접근)
+- 락 경합 비율 (바로 잡지 못하고 기다린 락 획득 / 전체 획득)
+을 출력한다. GIL 빌드에서는 CPU 작업이 병렬로 돌지 않으므로 처리량보다 경합 비율 차이가 크게 나타나고,
+free-threaded 빌드(python3.13t 이상)에서는 조각 수만큼 처리량이 늘어난다.
+
+사용 예:
+    python -m scripts.bench_user_store
+    python -m scripts.bench_user_store --threads 1 4 16 --stripes 1 16 64 --users 10000
+    python -m scripts.bench_user_store --backend sqlite
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from user_store import InMemoryUserStore, SQLiteUserStore, UserContextStore
+
+
+class _ProbeLock:
+    """바로 잡히지 않은 획득 횟수를 세는 락 (벤치마크 전용)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.contended = 0
+
+    def __enter__(self) -> "_ProbeLock":
+        if not self._lock.acquire(blocking=False):
+            self._lock.acquire()
+            self.contended += 1
+        self.acquired += 1
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._lock.release()
+
+
+def _make_store(backend: str, stripes: int, tmpdir: str) -> UserContextStore:
+    if backend == "sqlite":
+        return SQLiteUserStore(os.path.join(tmpdir, f"users-{stripes}.sqlite3"), stripes=stripes)
+    return InMemoryUserStore(stripes=stripes)
+
+
+def run(backend: str, stripes: int, threads: int, users: int, ops_per_thread: int, tmpdir: str) -> Tuple[float, float]:
+    store = _make_store(backend, stripes, tmpdir)
+    user_ids = [f"user-{i}" for i in range(users)]
+    for user_id in user_ids:
+        store.update(user_id, {"preferences": {"goal": "감량"}})
+    probes = []
+    for stripe in store._stripes:
+        stripe.lock = _ProbeLock()
+        probes.append(stripe.lock)
+
+    start = threading.Barrier(threads + 1)
+
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        start.wait()
+        for n in range(ops_per_thread):
+            user_id = user_ids[rng.randrange(users)]
+            store.update(user_id, {"event": {"mission": f"m{n % 5}", "mission_result": "success"}})
+            store.read(user_id)
+            store.version(user_id)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    start.wait()
+    began = time.perf_counter()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - began
+    store.flush()
+
+    acquired = sum(p.acquired for p in probes)
+    contended = sum(p.contended for p in probes)
+    return threads * ops_per_thread / elapsed, contended / max(acquired, 1)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure user-store throughput and lock contention.")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--stripes", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--ops", type=int, default=20000, help="ops per thread")
+    args = parser.parse_args(argv)
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"backend={args.backend} users={args.users} ops/thread={args.ops} gil={'on' if gil else 'off'}")
+    print(f"{'stripes':>8} {'threads':>8} {'ops/s':>12} {'contended':>10}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        rows: List[Tuple[int, int, float, float]] = []
+        for stripes in args.stripes:
+            for threads in args.threads:
+                throughput, contention = run(args.backend, stripes, threads, args.users, args.ops, tmpdir)
+                rows.append((stripes, threads, throughput, contention))
+                print(f"{stripes:>8} {threads:>8} {throughput:>12,.0f} {contention:>10.2%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+로컬 라우터 평가 스크립트.
+
+라벨링된 JSONL({"text": ..., "agent": ...})에 대해
+- 로컬 라우터 단독 일치율
+- 임계값 이상(LLM 생략) 구간의 일치율과 비율(= 절약되는 orchestrator LLM 호출 비율)
+- 임계값 미만은 LLM이 맞힌다고 가정한 전체 라우팅 일치율
+- 요청당 분류 지연
+을 출력한다. --llm 옵션을 주면 라벨 대신 실제 orchestrator LLM 응답을 기준으로 비교한다.
+
+사용 예:
+    python -m scripts.eval_router
+    python -m scripts.eval_router --data my_labels.jsonl --threshold 0.6
+    python -m scripts.eval_router --llm      # UPSTAGE_API_KEY 필요
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from typing import Dict, List
+
+from agent_router import route_locally, router_confidence_threshold
+
+_DEFAULT_DATA = os.path.join(os.path.dirname(__file__), "data", "router_eval.jsonl")
+
+
+def _load(path: str) -> List[Dict[str, str]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _llm_label(text: str) -> str:
+    from langchain_core.messages import HumanMessage, SystemMessage
+    from agent_system import ORCHESTRATOR_SYSTEM_PROMPT, _normalize_agent_choice, get_llm
+
+    resp = get_llm().invoke([
+        SystemMessage(content=ORCHESTRATOR_SYSTEM_PROMPT),
+        HumanMessage(
+            content=(
+                f"사용자 요청: {text}\n\n"
+                "이 요청에 가장 적절한 에이전트를 선택하세요 (planner/coach/analysis 중 하나만):"
+            )
+        ),
+    ])
+    return _normalize_agent_choice(resp.content, text)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Evaluate the local agent router.")
+    parser.add_argument("--data", default=_DEFAULT_DATA)
+    parser.add_argument("--threshold", type=float, default=router_confidence_threshold())
+    parser.add_argument("--llm", action="store_true", help="label with the live orchestrator LLM")
+    parser.add_argument("--repeat", type=int, default=200, help="timing repetitions per sample")
+    args = parser.parse_args()
+
+    samples = _load(args.data)
+    if args.llm:
+        for sample in samples:
+            sample["agent"] = _llm_label(sample["text"])
+
+    agree = confident = confident_agree = 0
+    misses: List[str] = []
+    for sample in samples:
+        decision = route_locally(sample["text"])
+        hit = decision.agent == sample["agent"]
+        agree += hit
+        if decision.confidence >= args.threshold:
+            confident += 1
+            confident_agree += hit
+            if not hit:
+                misses.append(f"  {sample['text']!r}: router={decision.agent} label={sample['agent']} "
+                              f"conf={decision.confidence:.2f}")
+
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        for sample in samples:
+            route_locally(sample["text"])
+    per_call_us = (time.perf_counter() - started) / (args.repeat * len(samples)) * 1e6
+
+    n = len(samples)
+    # 임계값 미만은 LLM으로 넘어가므로 (LLM 라벨 기준이면) 그대로 일치한다고 본다
+    effective_agree = confident_agree + (n - confident)
+    print(f"samples                     : {n}")
+    print(f"threshold                   : {args.threshold:.2f}")
+    print(f"router-only agreement       : {agree / n:.1%}")
+    print(f"LLM calls saved             : {confident / n:.1%} ({confident}/{n})")
+    print(f"agreement when LLM skipped  : {confident_agree / confident:.1%}" if confident else
+          "agreement when LLM skipped  : n/a")
+    print(f"end-to-end routing agreement: {effective_agree / n:.1%}")
+    print(f"router latency              : {per_call_us:.1f} us/request")
+    if misses:
+        print("confident disagreements:")
+        print("\n".join(misses))
+
+
+if __name__ == "__main__":
+    main()
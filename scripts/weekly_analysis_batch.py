@@ -0,0 +1,188 @@
+"""
+주간 분석 오프라인 일괄 실행기.
+
+WeeklyAnalysisRequest JSONL을 읽어 워커 풀로 get_weekly_analysis_service를 호출하고,
+결과를 출력 JSONL에 한 줄씩 추가한다. 출력 파일 자체가 체크포인트라서
+중단 후 같은 명령을 다시 실행하면 이미 성공한 (userId, weekRange)는 건너뛴다.
+실패한 레코드는 <output>.errors.jsonl에 기록되고 다음 실행 때 다시 시도된다.
+규칙 기반 대체 응답(제한 시간 초과/LLM 오류)도 실패로 기록해 다음 실행 때 다시 시도한다.
+입력에서 같은 키가 다시 나오면 한 번만 호출하고(duplicates), 형식이 잘못된 줄은
+다시 시도해도 결과가 같으므로 실패와 따로 invalid로 센다 (오류 파일에는 남김).
+
+사용 예:
+    python -m scripts.weekly_analysis_batch --input weekly.jsonl --output weekly_out.jsonl --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Dict, IO, Iterator, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from app.api.schemas import WeeklyAnalysisRequest
+from app.api.services import get_weekly_analysis_service, take_fallback_reason
+
+_MAX_429_RETRIES = 5
+
+
+def record_key(request: WeeklyAnalysisRequest) -> str:
+    return f"{request.userId}:{request.weekRange.start.isoformat()}:{request.weekRange.end.isoformat()}"
+
+
+def load_completed_keys(output_path: str) -> Set[str]:
+    """출력 파일에서 완료된 키를 읽는다. 크래시로 잘린 마지막 줄은 잘라낸다."""
+    if not os.path.exists(output_path):
+        return set()
+
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        last_newline = data.rfind(b"\n")
+        if last_newline + 1 != len(data):
+            f.truncate(last_newline + 1)
+            data = data[:last_newline + 1]
+
+    completed: Set[str] = set()
+    for line in data.decode("utf-8").splitlines():
+        if line.strip():
+            completed.add(json.loads(line)["key"])
+    return completed
+
+
+def iter_requests(input_path: str) -> Iterator[Tuple[int, Optional[WeeklyAnalysisRequest], Optional[str]]]:
+    with open(input_path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, WeeklyAnalysisRequest.model_validate_json(line), None
+            except ValidationError as e:
+                yield line_no, None, f"invalid record: {e.errors()[0]['msg']}"
+
+
+def _append_line(f: IO[str], record: Dict) -> None:
+    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def _analyze_with_retry(request: WeeklyAnalysisRequest):
+    for attempt in range(_MAX_429_RETRIES + 1):
+        try:
+            return await get_weekly_analysis_service(request)
+        except HTTPException as e:
+            if e.status_code != 429 or attempt == _MAX_429_RETRIES:
+                raise
+            await asyncio.sleep(float((e.headers or {}).get("Retry-After", 1)))
+
+
+async def run_batch(input_path: str, output_path: str, workers: int) -> Dict[str, float]:
+    completed = load_completed_keys(output_path)
+    stats = {"succeeded": 0, "failed": 0, "skipped": 0, "duplicates": 0, "invalid": 0}
+    dispatched: Set[str] = set()  # 이번 실행에서 이미 워커에 넘긴 키
+    latencies: List[float] = []
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+    errors_path = output_path + ".errors.jsonl"
+
+    with open(output_path, "a", encoding="utf-8") as out, open(errors_path, "a", encoding="utf-8") as err:
+
+        async def worker() -> None:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                key, request = item
+                started = time.perf_counter()
+                try:
+                    response = await _analyze_with_retry(request)
+                except Exception as e:
+                    detail = e.detail if isinstance(e, HTTPException) else f"{type(e).__name__}: {e}"
+                    _append_line(err, {"key": key, "error": str(detail)})
+                    stats["failed"] += 1
+                    continue
+                fallback_reason = take_fallback_reason()
+                if fallback_reason is not None:
+                    _append_line(err, {"key": key, "error": f"fallback: {fallback_reason}"})
+                    stats["failed"] += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+                _append_line(out, {
+                    "key": key,
+                    "userId": request.userId,
+                    "weekRange": request.weekRange.model_dump(mode="json"),
+                    "response": response.model_dump(mode="json"),
+                })
+                completed.add(key)
+                stats["succeeded"] += 1
+
+        started_at = time.perf_counter()
+        tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+        for line_no, request, error in iter_requests(input_path):
+            if request is None:
+                _append_line(err, {"key": f"line:{line_no}", "error": error})
+                stats["invalid"] += 1
+                continue
+            key = record_key(request)
+            if key in completed:
+                stats["skipped"] += 1
+                continue
+            if key in dispatched:
+                stats["duplicates"] += 1
+                continue
+            dispatched.add(key)
+            await queue.put((key, request))
+        for _ in tasks:
+            await queue.put(None)
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    processed = stats["succeeded"] + stats["failed"]
+    return {
+        **stats,
+        "elapsed_seconds": elapsed,
+        "throughput_per_second": processed / elapsed if elapsed > 0 else 0.0,
+        "latency_p50": _percentile(latencies, 50),
+        "latency_p95": _percentile(latencies, 95),
+        "latency_p99": _percentile(latencies, 99),
+        "latency_max": latencies[-1] if latencies else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run weekly analysis for a JSONL file of WeeklyAnalysisRequest records.")
+    parser.add_argument("--input", required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    result = asyncio.run(run_batch(args.input, args.output, max(1, args.workers)))
+    print(f"succeeded  : {result['succeeded']}")
+    print(f"failed     : {result['failed']} (see {args.output}.errors.jsonl)")
+    print(f"skipped    : {result['skipped']} (already in {args.output})")
+    print(f"duplicates : {result['duplicates']} (same key earlier in {args.input})")
+    print(f"invalid    : {result['invalid']} (not retried, see {args.output}.errors.jsonl)")
+    print(f"elapsed    : {result['elapsed_seconds']:.2f}s")
+    print(f"throughput : {result['throughput_per_second']:.2f} records/s")
+    print(
+        "latency    : "
+        f"p50 {result['latency_p50']:.2f}s / p95 {result['latency_p95']:.2f}s / "
+        f"p99 {result['latency_p99']:.2f}s / max {result['latency_max']:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import asyncio
+import unittest
+from unittest.mock import patch, AsyncMock
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api.schemas import WeeklyAnalysisRequest
+from app.api.services import get_weekly_analysis_service
+from app.core.admission import AdmissionController, AdmissionLane, LaneFullError
+from app.core.singleflight import SingleFlight, get_single_flight
+
+client = TestClient(app)
+
+
+class TestAdmissionLane(unittest.TestCase):
+    def test_rejects_when_queue_is_full(self):
+        async def scenario():
+            lane = AdmissionLane("bulk", concurrency=1, queue_size=1)
+            release = asyncio.Event()
+
+            async def hold():
+                async with lane.slot():
+                    await release.wait()
+
+            holder = asyncio.create_task(hold())
+            waiter = asyncio.create_task(hold())
+            await asyncio.sleep(0)
+            self.assertEqual(lane.snapshot()["waiting"], 1)
+
+            with self.assertRaises(LaneFullError) as ctx:
+                async with lane.slot():
+                    pass
+            self.assertGreaterEqual(ctx.exception.retry_after, 1)
+
+            release.set()
+            await asyncio.gather(holder, waiter)
+            return lane.snapshot()
+
+        snapshot = asyncio.run(scenario())
+        self.assertEqual(snapshot["admitted"], 2)
+        self.assertEqual(snapshot["rejected"], 1)
+        self.assertEqual(snapshot["active"], 0)
+
+    def test_batch_waiters_queue_instead_of_being_rejected(self):
+        async def scenario():
+            lane = AdmissionLane("bulk", concurrency=1, queue_size=0)
+            order = []
+
+            async def item(i):
+                async with lane.slot(wait=True):
+                    order.append(i)
+                    await asyncio.sleep(0)
+
+            tasks = [asyncio.create_task(item(i)) for i in range(5)]
+            await asyncio.sleep(0)
+            self.assertEqual(lane.snapshot()["waiting_batch"], 4)
+            with self.assertRaises(LaneFullError):  # 배치 대기는 일반 요청의 대기열 자리를 늘리지 않음
+                lane.check()
+            await asyncio.gather(*tasks)
+            return order, lane.snapshot()
+
+        order, snapshot = asyncio.run(scenario())
+        self.assertEqual(order, [0, 1, 2, 3, 4])
+        self.assertEqual((snapshot["admitted"], snapshot["rejected"], snapshot["waiting_batch"]), (5, 1, 0))
+
+    def test_lanes_are_independent(self):
+        async def scenario():
+            controller = AdmissionController({
+                "interactive": AdmissionLane("interactive", concurrency=1, queue_size=0),
+                "bulk": AdmissionLane("bulk", concurrency=1, queue_size=0),
+            })
+            async with controller.admit("bulk"):
+                async with controller.admit("interactive"):
+                    return True
+
+        self.assertTrue(asyncio.run(scenario()))
+
+
+class TestAdmissionAPI(unittest.TestCase):
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
+    def test_full_lane_returns_429_with_retry_after(self, mock_run_agent_system):
+        full_lane = AdmissionLane("bulk", concurrency=1, queue_size=0)
+        full_lane._semaphore = asyncio.Semaphore(0)
+        controller = AdmissionController({"bulk": full_lane})
+
+        request_payload = {
+            "userId": 12345,
+            "weekRange": {"start": "2026-01-05", "end": "2026-01-11"},
+            "weeklyStats": {"totalDays": 7, "successDays": 3, "failureDays": 4},
+            "failureReasonsRanked": []
+        }
+        with patch('app.api.services.get_admission_controller', return_value=controller):
+            response = client.post("/ai/analysis/weekly", json=request_payload)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response.headers)
+        mock_run_agent_system.assert_not_called()
+
+    def test_metrics_exposes_lanes(self):
+        response = client.get("/ai/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("interactive", response.json()["admission"])
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_duplicates_share_one_call(self):
+        calls = []
+
+        async def scenario():
+            flight = SingleFlight()
+
+            async def work():
+                calls.append(1)
+                await asyncio.sleep(0.01)
+                return "result"
+
+            results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+            # 완료 후에는 새 호출로 취급
+            results.append(await flight.do("k", work))
+            return results, flight.snapshot()
+
+        results, snapshot = asyncio.run(scenario())
+        self.assertEqual(results, ["result"] * 6)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(snapshot, {"leaders": 2, "coalesced": 4, "inflight": 0})
+
+    def test_errors_are_shared(self):
+        async def scenario():
+            flight = SingleFlight()
+
+            async def fail():
+                await asyncio.sleep(0.01)
+                raise ValueError("boom")
+
+            return await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+
+        results = asyncio.run(scenario())
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
+    def test_duplicate_service_requests_are_coalesced(self, mock_run_agent_system):
+        async def slow_run(**kwargs):
+            await asyncio.sleep(0.01)
+            return {"agent_response": '{"mainFailureReason": "시간 부족", "overallFeedback": "좋아요"}'}
+
+        mock_run_agent_system.side_effect = slow_run
+        request = WeeklyAnalysisRequest(**{
+            "userId": 777,
+            "weekRange": {"start": "2026-01-05", "end": "2026-01-11"},
+            "weeklyStats": {"totalDays": 7, "successDays": 3, "failureDays": 4},
+            "failureReasonsRanked": []
+        })
+        before = get_single_flight().snapshot()["coalesced"]
+
+        async def scenario():
+            return await asyncio.gather(*(get_weekly_analysis_service(request) for _ in range(3)))
+
+        responses = asyncio.run(scenario())
+        self.assertEqual({r.mainFailureReason for r in responses}, {"시간 부족"})
+        mock_run_agent_system.assert_called_once()
+        self.assertEqual(get_single_flight().snapshot()["coalesced"], before + 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,14 @@
 import unittest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from datetime import date, time, datetime
+import asyncio
 import json
+import os
 
 from app.main import app
+from app.core.admission import AdmissionController, AdmissionLane
+from app.core.cache import get_response_cache
 from app.api.schemas import (
     DailyMissionResponse, DailyMissionRequest, Mission, MissionType, Difficulty, WorkTimeType, LifestyleType, RecentMissionHistoryItem, MissionResult, OnboardingData,
     DailyFeedbackResponse, DailyFeedbackRequest, TodayMissionData, RecentSummaryData, Intent, EncouragementCandidate,
@@ -16,7 +20,7 @@ from app.api.schemas import (
 client = TestClient(app)
 
 class TestDailyMissionsAPI(unittest.TestCase):
-    @patch('api_server.run_agent_system')
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
     def test_create_daily_missions_success(self, mock_run_agent_system):
         # Mock the agent system's response
         mock_response_content = """
@@ -86,9 +90,10 @@ class TestDailyMissionsAPI(unittest.TestCase):
 
         self.assertIn("preferences", kwargs["user_payload"])
         self.assertEqual(kwargs["user_id"], "12345")
+        self.assertEqual(kwargs["target_agent"], "planner")
 
 
-    @patch('api_server.run_agent_system')
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
     def test_create_daily_missions_ai_response_parse_error(self, mock_run_agent_system):
         # Mock the agent system's response to be invalid JSON
         mock_run_agent_system.return_value = {"agent_response": "This is not JSON", "selected_agent": "planner"}
@@ -112,7 +117,7 @@ class TestDailyMissionsAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 500)
         self.assertIn("Failed to parse AI agent's response as JSON", response.json()["detail"])
 
-    @patch('api_server.run_agent_system')
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
     def test_create_daily_missions_ai_response_validation_error(self, mock_run_agent_system):
         # Mock the agent system's response to be valid JSON but not conform to schema
         mock_response_content = """
@@ -121,7 +126,7 @@ class TestDailyMissionsAPI(unittest.TestCase):
             "missions": [
                 {
                     "name": "저녁 스트레칭 20분",
-                    "type": "INVALID_TYPE", # Invalid type
+                    "type": "INVALID_TYPE",
                     "difficulty": "EASY",
                     "estimatedMinutes": 20,
                     "estimatedCalories": 80
@@ -151,8 +156,72 @@ class TestDailyMissionsAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 500)
         self.assertIn("AI agent's response did not match the expected DailyMissionResponse schema", response.json()["detail"])
 
+class TestDailyMissionsBatchAPI(unittest.TestCase):
+    @staticmethod
+    def _request(user_id):
+        return {
+            "userId": user_id,
+            "onboarding": {
+                "appGoal": "체중 감량",
+                "workTimeType": "FIXED",
+                "availableStartTime": "18:30",
+                "availableEndTime": "22:00",
+                "minExerciseMinutes": 20,
+                "preferredExercises": ["러닝"],
+                "lifestyleType": "NIGHT"
+            },
+            "recentMissionHistory": [],
+            "weeklyFailureReasons": []
+        }
+
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
+    def test_batch_streams_ndjson_with_per_item_errors(self, mock_run_agent_system):
+        ok_response = '```json\n{"missions": [{"name": "걷기 20분", "type": "EXERCISE", "difficulty": "EASY", "estimatedMinutes": 20, "estimatedCalories": 80}]}\n```'
+
+        async def fake_run(**kwargs):
+            if kwargs["user_id"] == "2":
+                return {"agent_response": "This is not JSON"}
+            return {"agent_response": ok_response}
+
+        mock_run_agent_system.side_effect = fake_run
+
+        payload = [self._request(1), self._request(2), self._request(3)]
+        response = client.post("/ai/missions/daily:batch?concurrency=2", json=payload)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("application/x-ndjson"))
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(sorted(line["index"] for line in lines), [0, 1, 2])
+        by_user = {line["userId"]: line for line in lines}
+        self.assertEqual(by_user[2]["error"]["status"], 500)
+        self.assertNotIn("response", by_user[2])
+        DailyMissionResponse(**by_user[1]["response"])
+        DailyMissionResponse(**by_user[3]["response"])
+        self.assertEqual(mock_run_agent_system.call_count, 3)
+
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
+    def test_batch_items_wait_for_a_busy_bulk_lane(self, mock_run_agent_system):
+        ok_response = '{"missions": [{"name": "걷기 20분", "type": "EXERCISE", "difficulty": "EASY", "estimatedMinutes": 20, "estimatedCalories": 80}]}'
+
+        async def fake_run(**kwargs):
+            await asyncio.sleep(0.01)
+            return {"agent_response": ok_response}
+
+        mock_run_agent_system.side_effect = fake_run
+        controller = AdmissionController({"bulk": AdmissionLane("bulk", concurrency=1, queue_size=0)})
+
+        payload = [self._request(user_id) for user_id in range(1, 7)]
+        with patch('app.api.services.get_admission_controller', return_value=controller):
+            response = client.post("/ai/missions/daily:batch?concurrency=6", json=payload)
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(all("response" in line for line in lines), lines)
+        self.assertEqual(controller.snapshot()["bulk"]["rejected"], 0)
+
+
 class TestDailyFeedbackAPI(unittest.TestCase):
-    @patch('api_server.run_agent_system')
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
     def test_create_daily_feedback_success(self, mock_run_agent_system):
         # Mock the agent system's response
         mock_response_content = """
@@ -202,7 +271,7 @@ class TestDailyFeedbackAPI(unittest.TestCase):
         self.assertIn("event", kwargs["user_payload"])
         self.assertEqual(kwargs["user_id"], "12345")
 
-    @patch('api_server.run_agent_system')
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
     def test_create_daily_feedback_ai_response_parse_error(self, mock_run_agent_system):
         # Mock the agent system's response to be invalid JSON
         mock_run_agent_system.return_value = {"agent_response": "This is not JSON", "selected_agent": "analysis"}
@@ -226,7 +295,7 @@ class TestDailyFeedbackAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 500)
         self.assertIn("Failed to parse AI agent's response as JSON", response.json()["detail"])
 
-    @patch('api_server.run_agent_system')
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
     def test_create_daily_feedback_ai_response_validation_error(self, mock_run_agent_system):
         # Mock the agent system's response to be valid JSON but not conform to schema
         mock_response_content = """
@@ -234,7 +303,7 @@ class TestDailyFeedbackAPI(unittest.TestCase):
         {
             "feedbackText": "오늘은 시간 부족으로 미션을 완료하지 못했어",
             "encouragementCandidates": [
-                {"intent": "INVALID_INTENT", "title": "제목", "message": "메시지"} # Invalid intent type
+                {"intent": "INVALID_INTENT", "title": "제목", "message": "메시지"}
             ]
         }
         ```
@@ -261,7 +330,10 @@ class TestDailyFeedbackAPI(unittest.TestCase):
         self.assertIn("AI agent's response did not match the expected DailyFeedbackResponse schema", response.json()["detail"])
 
 class TestWeeklyAnalysisAPI(unittest.TestCase):
-    @patch('api_server.run_agent_system')
+    def setUp(self):
+        get_response_cache().clear()
+
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
     def test_create_weekly_analysis_success(self, mock_run_agent_system):
         # Mock the agent system's response
         mock_response_content = """
@@ -302,8 +374,9 @@ class TestWeeklyAnalysisAPI(unittest.TestCase):
         self.assertIn("주간 분석 범위: 2026-01-05 ~ 2026-01-11", kwargs["user_request"])
         self.assertIn("event", kwargs["user_payload"])
         self.assertEqual(kwargs["user_id"], "12345")
+        self.assertEqual(kwargs["target_agent"], "analysis")
 
-    @patch('api_server.run_agent_system')
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
     def test_create_weekly_analysis_ai_response_parse_error(self, mock_run_agent_system):
         # Mock the agent system's response to be invalid JSON
         mock_run_agent_system.return_value = {"agent_response": "This is not JSON", "selected_agent": "analysis"}
@@ -319,7 +392,7 @@ class TestWeeklyAnalysisAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 500)
         self.assertIn("Failed to parse AI agent's response as JSON", response.json()["detail"])
 
-    @patch('api_server.run_agent_system')
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
     def test_create_weekly_analysis_ai_response_validation_error(self, mock_run_agent_system):
         # Mock the agent system's response to be valid JSON but not conform to schema
         mock_response_content = """
@@ -344,7 +417,10 @@ class TestWeeklyAnalysisAPI(unittest.TestCase):
         self.assertIn("AI agent's response did not match the expected WeeklyAnalysisResponse schema", response.json()["detail"])
 
 class TestChatSessionAPI(unittest.TestCase):
-    @patch('api_server.run_agent_system')
+    def setUp(self):
+        get_response_cache().clear()
+
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
     def test_create_chat_session_success(self, mock_run_agent_system):
         # Mock the agent system's response
         mock_response_content = """
@@ -391,8 +467,9 @@ class TestChatSessionAPI(unittest.TestCase):
         self.assertIn("새로운 채팅 세션이 시작되었습니다", kwargs["user_request"])
         self.assertIn("preferences", kwargs["user_payload"])
         self.assertEqual(kwargs["user_id"], "12345")
+        self.assertEqual(kwargs["target_agent"], "coach")
 
-    @patch('api_server.run_agent_system')
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
     def test_create_chat_session_ai_response_parse_error(self, mock_run_agent_system):
         # Mock the agent system's response to be invalid JSON
         mock_run_agent_system.return_value = {"agent_response": "This is not JSON", "selected_agent": "coach"}
@@ -410,7 +487,7 @@ class TestChatSessionAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 500)
         self.assertIn("Failed to parse AI agent's response as JSON", response.json()["detail"])
 
-    @patch('api_server.run_agent_system')
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
     def test_create_chat_session_ai_response_validation_error(self, mock_run_agent_system):
         # Mock the agent system's response to be valid JSON but not conform to schema
         mock_response_content = """
@@ -440,7 +517,7 @@ class TestChatSessionAPI(unittest.TestCase):
         self.assertIn("AI agent's response did not match the expected ChatSessionResponse schema", response.json()["detail"])
 
 class TestChatMessageAPI(unittest.TestCase):
-    @patch('api_server.run_agent_system')
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
     def test_handle_chat_message_text_input_success(self, mock_run_agent_system):
         mock_response_content = """
         ```json
@@ -484,7 +561,7 @@ class TestChatMessageAPI(unittest.TestCase):
         self.assertEqual(kwargs["user_id"], "12345")
 
 
-    @patch('api_server.run_agent_system')
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
     def test_handle_chat_message_option_input_success(self, mock_run_agent_system):
         mock_response_content = """
         ```json
@@ -530,7 +607,7 @@ class TestChatMessageAPI(unittest.TestCase):
         self.assertEqual(kwargs["user_id"], "12345") # user_id will be passed from the request
 
 
-    @patch('api_server.run_agent_system')
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
     def test_handle_chat_message_ai_response_parse_error(self, mock_run_agent_system):
         mock_run_agent_system.return_value = {"agent_response": "This is not JSON", "selected_agent": "coach"}
 
@@ -548,7 +625,7 @@ class TestChatMessageAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 500)
         self.assertIn("Failed to parse AI agent's response as JSON", response.json()["detail"])
 
-    @patch('api_server.run_agent_system')
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
     def test_handle_chat_message_ai_response_validation_error(self, mock_run_agent_system):
         mock_response_content = """
         ```json
@@ -559,7 +636,7 @@ class TestChatMessageAPI(unittest.TestCase):
                 "options_INVALID": []
             },
             "state": {
-                "isTerminal": "not_boolean" # Invalid type
+                "isTerminal": "not_boolean"
             }
         }
         ```
@@ -580,5 +657,128 @@ class TestChatMessageAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 500)
         self.assertIn("AI agent's response did not match the expected ChatMessageResponse schema", response.json()["detail"])
 
+class TestChatMessageStreamAPI(unittest.TestCase):
+    @staticmethod
+    def _parse_sse(body):
+        events = []
+        for frame in body.strip().split("\n\n"):
+            lines = frame.split("\n")
+            events.append((lines[0][len("event: "):], json.loads(lines[1][len("data: "):])))
+        return events
+
+    @patch('app.api.services.stream_agent_system_async')
+    def test_stream_chat_message_emits_text_tokens_then_done(self, mock_stream_agent_system):
+        full_response = '```json\n{"botMessage": {"messageId": 5002, "text": "알겠어요.\\n조금씩 해봐요", "options": [{"label": "좋아요", "value": "OK"}]}, "state": {"isTerminal": true}}\n```'
+        tokens = [full_response[i:i + 7] for i in range(0, len(full_response), 7)]
+
+        async def fake_stream(**kwargs):
+            for token in tokens:
+                yield "token", token
+            yield "result", {"agent_response": full_response}
+
+        mock_stream_agent_system.side_effect = fake_stream
+
+        request_payload = {
+            "sessionId": 1,
+            "userId": 12345,
+            "input": {"type": "TEXT", "text": "운동이 너무 힘들어요"},
+            "timestamp": "2026-01-11T21:10:00+09:00"
+        }
+        response = client.post("/ai/chat/messages/stream", json=request_payload)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+        events = self._parse_sse(response.text)
+        token_events = [data["text"] for name, data in events if name == "token"]
+        self.assertGreater(len(token_events), 1)
+        self.assertEqual("".join(token_events), "알겠어요.\n조금씩 해봐요")
+        self.assertEqual(events[-1][0], "done")
+        ChatMessageResponse(**events[-1][1])
+        self.assertTrue(events[-1][1]["state"]["isTerminal"])
+        self.assertEqual(mock_stream_agent_system.call_args.kwargs["target_agent"], "coach")
+
+    @patch('app.api.services.stream_agent_system_async')
+    def test_stream_chat_message_parse_error_event(self, mock_stream_agent_system):
+        async def fake_stream(**kwargs):
+            yield "token", "This is not JSON"
+            yield "result", {"agent_response": "This is not JSON"}
+
+        mock_stream_agent_system.side_effect = fake_stream
+
+        request_payload = {
+            "sessionId": 1,
+            "userId": 12345,
+            "input": {"type": "OPTION", "value": "TIME_SHORTAGE"},
+            "timestamp": "2026-01-11T21:10:00+09:00"
+        }
+        response = client.post("/ai/chat/messages/stream", json=request_payload)
+        events = self._parse_sse(response.text)
+        self.assertEqual(events[-1][0], "error")
+        self.assertEqual(events[-1][1]["status"], 500)
+
+    _STREAM_REQUEST = {
+        "sessionId": 1,
+        "userId": 12345,
+        "input": {"type": "TEXT", "text": "운동이 너무 힘들어요"},
+        "timestamp": "2026-01-11T21:10:00+09:00"
+    }
+
+    @patch('app.api.services.stream_agent_system_async')
+    def test_stream_tolerates_raw_newlines_and_bad_escapes(self, mock_stream_agent_system):
+        async def fake_stream(**kwargs):
+            yield "token", '{"botMessage": {"messageId": 1, "text": "첫 줄\n둘째'
+            yield "token", ' 줄 \\u12zz'
+            yield "result", {"agent_response": "not json"}
+
+        mock_stream_agent_system.side_effect = fake_stream
+
+        response = client.post("/ai/chat/messages/stream", json=self._STREAM_REQUEST)
+        events = self._parse_sse(response.text)
+        self.assertEqual(events[0], ("token", {"text": "첫 줄\n둘째"}))
+        self.assertEqual(events[-1][0], "error")
+        self.assertEqual(events[-1][1]["status"], 500)
+
+    @patch('app.api.services.stream_agent_system_async')
+    def test_stream_agent_failure_answers_with_fallback(self, mock_stream_agent_system):
+        async def fake_stream(**kwargs):
+            yield "token", "지금은 응답을 생성하는 데 문제가 발생했어요."
+            yield "result", {"agent_response": "지금은 응답을 생성하는 데 문제가 발생했어요.", "agent_failed": True}
+
+        mock_stream_agent_system.side_effect = fake_stream
+
+        response = client.post("/ai/chat/messages/stream", json=self._STREAM_REQUEST)
+        events = self._parse_sse(response.text)
+        self.assertEqual(events[-2], ("fallback", {"reason": "agent_error"}))
+        self.assertEqual(events[-1][0], "done")
+        ChatMessageResponse(**events[-1][1])
+
+    @patch('app.api.services.stream_agent_system_async')
+    def test_stream_missed_deadline_answers_with_fallback(self, mock_stream_agent_system):
+        async def slow_stream(**kwargs):
+            yield "token", '{"botMessage": {"messageId": 1, "text": "천천히'
+            await asyncio.sleep(1)
+            yield "result", {"agent_response": "{}"}
+
+        mock_stream_agent_system.side_effect = slow_stream
+
+        with patch.dict(os.environ, {"AGENT_DEADLINE_CHAT_MESSAGE": "0.05"}):
+            response = client.post("/ai/chat/messages/stream", json=self._STREAM_REQUEST)
+        events = self._parse_sse(response.text)
+        self.assertEqual(events[0], ("token", {"text": "천천히"}))
+        self.assertEqual(events[-2], ("fallback", {"reason": "deadline"}))
+        self.assertEqual(events[-1][0], "done")
+
+    @patch('app.api.services.stream_agent_system_async')
+    def test_stream_unexpected_error_sends_error_event(self, mock_stream_agent_system):
+        async def broken_stream(**kwargs):
+            yield "token", '{"botMessage": {"text": "안녕'
+            raise RuntimeError("graph crashed")
+
+        mock_stream_agent_system.side_effect = broken_stream
+
+        response = client.post("/ai/chat/messages/stream", json=self._STREAM_REQUEST)
+        events = self._parse_sse(response.text)
+        self.assertEqual(events[-1], ("error", {"status": 500, "detail": "AI agent failed to generate a response."}))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
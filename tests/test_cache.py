@@ -0,0 +1,304 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+import zlib
+from unittest.mock import patch, AsyncMock
+
+from agent_system import get_user_context_version, update_user_context
+from app.api.schemas import DailyFeedbackRequest, WeeklyAnalysisRequest
+from app.api.services import get_daily_feedback_service, get_weekly_analysis_service
+from app.core.cache import TTLCache, get_response_cache
+from app.core.disk_cache import SQLiteResponseCache
+from app.core.near_dup import NearDuplicateIndex, get_near_dup_index, make_near_dup_key
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_lru_eviction_and_counters(self):
+        cache = TTLCache(max_entries=2)
+        cache.set("a", 1, "one", ttl_seconds=60)
+        cache.set("a", 2, "two", ttl_seconds=60)
+        self.assertEqual(cache.get("a", 1), "one")  # 1이 최근 사용으로 이동
+        cache.set("b", 3, "three", ttl_seconds=60)   # 2가 축출됨
+
+        self.assertIsNone(cache.get("a", 2))
+        self.assertEqual(cache.get("a", 1), "one")
+        snapshot = cache.snapshot()
+        self.assertEqual(snapshot["size"], 2)
+        self.assertEqual(snapshot["namespaces"]["a"], {"hits": 2, "misses": 1, "evictions": 1, "expirations": 0})
+
+    def test_expired_entries_miss(self):
+        cache = TTLCache()
+        with patch("app.core.cache.time.monotonic", return_value=100.0):
+            cache.set("a", 1, "one", ttl_seconds=10)
+        with patch("app.core.cache.time.monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("a", 1))
+        self.assertEqual(cache.snapshot()["namespaces"]["a"]["expirations"], 1)
+
+    def test_zero_ttl_is_not_stored(self):
+        cache = TTLCache()
+        cache.set("a", 1, "one", ttl_seconds=0)
+        self.assertIsNone(cache.get("a", 1))
+
+
+class TestSQLiteResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "responses.sqlite3")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_roundtrip_is_shared_between_connections(self):
+        writer = SQLiteResponseCache(self.path)
+        writer.set("a", "k", b'{"x": 1}', ttl_seconds=60)
+
+        reader = SQLiteResponseCache(self.path)  # 다른 워커 프로세스 역할
+        self.assertEqual(reader.get("a", "k"), b'{"x": 1}')
+        self.assertIsNone(reader.get("a", "missing"))
+        self.assertEqual(reader.snapshot()["namespaces"]["a"], {"hits": 1, "misses": 1, "evictions": 0, "invalid": 0})
+
+    def test_corrupt_value_misses_and_is_deleted(self):
+        cache = SQLiteResponseCache(self.path)
+        cache.set("a", "k", b'{"x": 1}', ttl_seconds=60)
+        cache._conn.execute("UPDATE responses SET value = ?", (b"not zlib",))
+
+        self.assertIsNone(cache.get("a", "k"))
+        snapshot = cache.snapshot()
+        self.assertEqual(snapshot["rows"], 0)
+        self.assertEqual((snapshot["namespaces"]["a"]["misses"], snapshot["namespaces"]["a"]["invalid"]), (1, 1))
+
+    def test_expired_entries_miss(self):
+        cache = SQLiteResponseCache(self.path)
+        with patch("app.core.disk_cache.time.time", return_value=100.0):
+            cache.set("a", "k", b"v", ttl_seconds=10)
+        with patch("app.core.disk_cache.time.time", return_value=111.0):
+            self.assertIsNone(cache.get("a", "k"))
+
+    def test_async_access_does_not_block_the_event_loop(self):
+        cache = SQLiteResponseCache(self.path)
+
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticking = asyncio.create_task(ticker())
+            with cache._lock:  # 다른 요청의 쓰기가 잠금을 잡고 있는 상황
+                pending = asyncio.create_task(cache.aset("a", "k", b"v", ttl_seconds=60))
+                await asyncio.sleep(0.1)
+                self.assertFalse(pending.done())
+            await pending
+            value = await cache.aget("a", "k")
+            ticking.cancel()
+            return ticks, value
+
+        ticks, value = asyncio.run(scenario())
+        self.assertGreaterEqual(ticks, 5)
+        self.assertEqual(value, b"v")
+
+    def test_evicts_least_recently_accessed_over_size_cap(self):
+        cache = SQLiteResponseCache(self.path, max_bytes=4096)
+        for i in range(20):
+            with patch("app.core.disk_cache.time.time", return_value=1000.0 + i):
+                cache.set("a", str(i), os.urandom(512), ttl_seconds=3600)  # 압축되지 않는 값
+        with patch("app.core.disk_cache.time.time", return_value=2000.0):
+            cache.evict()
+
+        snapshot = cache.snapshot()
+        self.assertLessEqual(snapshot["bytes"], 4096)
+        self.assertGreater(snapshot["namespaces"]["a"]["evictions"], 0)
+        with patch("app.core.disk_cache.time.time", return_value=2000.0):
+            self.assertIsNone(cache.get("a", "0"))
+            self.assertIsNotNone(cache.get("a", "19"))
+
+
+class TestNearDuplicateIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = NearDuplicateIndex()
+        self.stored = {"fail_reason": "야근 때문에 운동할 시간이 없었어요", "success": 3, "failure": 4}
+        self.index.add("a", make_near_dup_key("FAILURE", self.stored), "cached", ttl_seconds=60)
+
+    def test_near_duplicate_hits(self):
+        fields = {"fail_reason": "야근때문에 운동할 시간이 없었어요!", "success": 3, "failure": 4}
+        match = self.index.lookup("a", make_near_dup_key("FAILURE", fields), threshold=0.8)
+        self.assertIsNotNone(match)
+        self.assertEqual(match[0], "cached")
+        self.assertGreaterEqual(match[1], 0.8)
+
+    def test_different_bucket_or_dissimilar_fields_miss(self):
+        self.assertIsNone(self.index.lookup("a", make_near_dup_key("SUCCESS", self.stored), threshold=0.8))
+        fields = {"fail_reason": "회식이 있어서 식단을 지키지 못했어요", "success": 0, "failure": 7}
+        self.assertIsNone(self.index.lookup("a", make_near_dup_key("FAILURE", fields), threshold=0.8))
+        counters = self.index.snapshot()["namespaces"]["a"]
+        self.assertEqual((counters["hits"], counters["misses"]), (0, 2))
+
+    def test_lru_cap_drops_oldest(self):
+        index = NearDuplicateIndex(max_entries=1)
+        index.add("a", make_near_dup_key("b", {"x": "첫 번째 요청 내용"}), 1, ttl_seconds=60)
+        index.add("a", make_near_dup_key("b", {"x": "완전히 다른 두 번째"}), 2, ttl_seconds=60)
+        self.assertIsNone(index.lookup("a", make_near_dup_key("b", {"x": "첫 번째 요청 내용"}), threshold=0.9))
+        self.assertEqual(index.snapshot()["namespaces"]["a"]["evictions"], 1)
+
+
+class TestUserContextVersion(unittest.TestCase):
+    def test_version_bumps_only_on_change(self):
+        user_id = "cache-version-user"
+        update_user_context(user_id, {"preferences": {"goal": "감량"}})
+        v1 = get_user_context_version(user_id)
+        update_user_context(user_id, {"preferences": {"goal": "감량"}})
+        self.assertEqual(get_user_context_version(user_id), v1)
+
+        update_user_context(user_id, {"event": {"mission": "걷기"}})
+        v2 = get_user_context_version(user_id)
+        self.assertGreater(v2, v1)
+        update_user_context(user_id, {"event": {"mission": "걷기"}})  # 중복 이벤트
+        self.assertEqual(get_user_context_version(user_id), v2)
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        get_response_cache().clear()
+
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
+    def test_weekly_analysis_is_cached_until_context_changes(self, mock_run_agent_system):
+        mock_run_agent_system.return_value = {
+            "agent_response": '{"mainFailureReason": "시간 부족", "overallFeedback": "좋아요"}'
+        }
+        request = WeeklyAnalysisRequest(**{
+            "userId": 4242,
+            "weekRange": {"start": "2026-01-05", "end": "2026-01-11"},
+            "weeklyStats": {"totalDays": 7, "successDays": 3, "failureDays": 4},
+            "failureReasonsRanked": []
+        })
+
+        before = dict(get_response_cache().snapshot()["namespaces"].get("weekly_analysis", {"hits": 0, "misses": 0}))
+        first = asyncio.run(get_weekly_analysis_service(request))
+        second = asyncio.run(get_weekly_analysis_service(request))
+        self.assertEqual(first, second)
+        self.assertEqual(mock_run_agent_system.call_count, 1)
+
+        update_user_context("4242", {"preferences": {"lifestyleType": "MORNING"}})
+        asyncio.run(get_weekly_analysis_service(request))
+        self.assertEqual(mock_run_agent_system.call_count, 2)
+
+        counters = get_response_cache().snapshot()["namespaces"]["weekly_analysis"]
+        self.assertEqual(
+            (counters["hits"] - before["hits"], counters["misses"] - before["misses"]), (1, 2)
+        )
+
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
+    def test_disk_tier_serves_after_memory_cache_is_lost(self, mock_run_agent_system):
+        mock_run_agent_system.return_value = {
+            "agent_response": '{"mainFailureReason": "시간 부족", "overallFeedback": "좋아요"}'
+        }
+        request = WeeklyAnalysisRequest(**{
+            "userId": 4343,
+            "weekRange": {"start": "2026-01-05", "end": "2026-01-11"},
+            "weeklyStats": {"totalDays": 7, "successDays": 3, "failureDays": 4},
+            "failureReasonsRanked": []
+        })
+
+        with tempfile.TemporaryDirectory() as tmpdir, patch.dict(
+            os.environ, {"RESPONSE_CACHE_DB_PATH": os.path.join(tmpdir, "responses.sqlite3")}
+        ):
+            first = asyncio.run(get_weekly_analysis_service(request))
+            get_response_cache().clear()  # 재시작/다른 워커 상황
+            second = asyncio.run(get_weekly_analysis_service(request))
+
+        self.assertEqual(first, second)
+        self.assertEqual(mock_run_agent_system.call_count, 1)
+
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
+    def test_disk_tier_row_with_stale_schema_is_a_miss(self, mock_run_agent_system):
+        mock_run_agent_system.return_value = {
+            "agent_response": '{"mainFailureReason": "시간 부족", "overallFeedback": "좋아요"}'
+        }
+        request = WeeklyAnalysisRequest(**{
+            "userId": 4444,
+            "weekRange": {"start": "2026-01-05", "end": "2026-01-11"},
+            "weeklyStats": {"totalDays": 7, "successDays": 3, "failureDays": 4},
+            "failureReasonsRanked": []
+        })
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "responses.sqlite3")
+            with patch.dict(os.environ, {"RESPONSE_CACHE_DB_PATH": path}):
+                asyncio.run(get_weekly_analysis_service(request))
+                # 이전 배포의 응답 스키마로 저장된 행 (필수 필드 없음)
+                with sqlite3.connect(path) as conn:
+                    conn.execute("UPDATE responses SET value = ?", (zlib.compress(b'{"legacyField": 1}'),))
+                get_response_cache().clear()
+
+                response = asyncio.run(get_weekly_analysis_service(request))
+                self.assertEqual(response.mainFailureReason, "시간 부족")
+                self.assertEqual(mock_run_agent_system.call_count, 2)
+
+                get_response_cache().clear()  # 다시 호출한 응답으로 덮어썼으므로 이제는 disk hit
+                asyncio.run(get_weekly_analysis_service(request))
+                self.assertEqual(mock_run_agent_system.call_count, 2)
+
+
+class TestNearDuplicateResponseCache(unittest.TestCase):
+    def setUp(self):
+        get_near_dup_index().clear()
+
+    def _request(self, user_id, target_date, success_days, reason):
+        return DailyFeedbackRequest(**{
+            "userId": user_id,
+            "targetDate": target_date,
+            "todayMission": {"missionType": "EXERCISE", "difficulty": "EASY", "result": "FAILURE", "failureReason": reason},
+            "recentSummary": {"successDays": success_days, "failureDays": 2}
+        })
+
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
+    def test_daily_feedback_reuses_near_duplicate_only_when_enabled(self, mock_run_agent_system):
+        mock_run_agent_system.return_value = {
+            "agent_response": '{"feedbackText": "내일 다시 해봐요", "encouragementCandidates": []}'
+        }
+        first = self._request(5001, "2026-01-10", 3, "야근 때문에 운동할 시간이 없었어요")
+        similar = self._request(5002, "2026-01-11", 3, "야근때문에 운동할 시간이 없었어요.")
+
+        asyncio.run(get_daily_feedback_service(first))
+        asyncio.run(get_daily_feedback_service(similar))
+        self.assertEqual(mock_run_agent_system.call_count, 2)  # 기본값: 꺼짐
+
+        # 컨텍스트가 아직 같은(비어 있는) 두 유저 사이에서만 재사용된다
+        first = self._request(5003, "2026-01-10", 3, "야근 때문에 운동할 시간이 없었어요")
+        similar = self._request(5004, "2026-01-11", 3, "야근때문에 운동할 시간이 없었어요.")
+        with patch.dict(os.environ, {"NEAR_DUP_CACHE": "true"}):
+            asyncio.run(get_daily_feedback_service(first))
+            response = asyncio.run(get_daily_feedback_service(similar))
+            self.assertEqual(mock_run_agent_system.call_count, 3)
+            self.assertEqual(response.feedbackText, "내일 다시 해봐요")
+
+            with patch.dict(os.environ, {"NEAR_DUP_THRESHOLD_DAILY_FEEDBACK": "0"}):
+                asyncio.run(get_daily_feedback_service(similar))
+            self.assertEqual(mock_run_agent_system.call_count, 4)
+
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
+    def test_near_duplicate_is_not_shared_between_different_user_contexts(self, mock_run_agent_system):
+        mock_run_agent_system.side_effect = [
+            {"agent_response": '{"feedbackText": "아침 운동을 좋아하시니 내일 아침에 해봐요", "encouragementCandidates": []}'},
+            {"agent_response": '{"feedbackText": "저녁에 짧게라도 해봐요", "encouragementCandidates": []}'},
+        ]
+        update_user_context("5101", {"preferences": {"lifestyleType": "MORNING"}})
+        update_user_context("5102", {"preferences": {"lifestyleType": "NIGHT"}})
+        first = self._request(5101, "2026-01-10", 3, "야근 때문에 운동할 시간이 없었어요")
+        similar = self._request(5102, "2026-01-11", 3, "야근때문에 운동할 시간이 없었어요.")
+
+        with patch.dict(os.environ, {"NEAR_DUP_CACHE": "true"}):
+            asyncio.run(get_daily_feedback_service(first))
+            response = asyncio.run(get_daily_feedback_service(similar))
+
+        self.assertEqual(mock_run_agent_system.call_count, 2)
+        self.assertEqual(response.feedbackText, "저녁에 짧게라도 해봐요")
+
+
+if __name__ == "__main__":
+    unittest.main()
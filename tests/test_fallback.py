@@ -0,0 +1,144 @@
+import asyncio
+import os
+import unittest
+from datetime import date, timedelta
+from unittest.mock import patch, AsyncMock
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api.fallback import (
+    daily_feedback_fallback, daily_missions_fallback, next_difficulty, weekly_analysis_fallback,
+)
+from app.api.history import compact_mission_history
+from app.api.schemas import (
+    DailyFeedbackRequest, DailyFeedbackResponse, DailyMissionRequest, Difficulty, Intent, MissionType,
+    RecentMissionHistoryItem, WeeklyAnalysisRequest,
+)
+from app.api.services import get_fallback_stats
+
+client = TestClient(app)
+
+
+def _history(results, difficulty="NORMAL"):
+    start = date(2026, 1, 1)
+    return [
+        RecentMissionHistoryItem(
+            date=start + timedelta(days=i), missionType="EXERCISE", difficulty=difficulty, result=result
+        )
+        for i, result in enumerate(results)
+    ]
+
+
+def _missions_request(history=(), preferred=("러닝", "요가"), weekly_failures=()):
+    return DailyMissionRequest(
+        userId=1,
+        onboarding={
+            "appGoal": "체중 감량",
+            "workTimeType": "FIXED",
+            "availableStartTime": "18:30",
+            "availableEndTime": "22:00",
+            "minExerciseMinutes": 20,
+            "preferredExercises": list(preferred),
+            "lifestyleType": "NIGHT",
+        },
+        recentMissionHistory=list(history),
+        weeklyFailureReasons=list(weekly_failures),
+    )
+
+
+def _feedback_payload(user_id, result="FAILURE", success_days=1, failure_days=4):
+    return {
+        "userId": user_id,
+        "targetDate": "2026-01-11",
+        "todayMission": {"missionType": "EXERCISE", "difficulty": "NORMAL", "result": result, "failureReason": "야근"},
+        "recentSummary": {"successDays": success_days, "failureDays": failure_days},
+    }
+
+
+class TestRuleBasedFallback(unittest.TestCase):
+    def test_difficulty_follows_history(self):
+        self.assertEqual(next_difficulty(compact_mission_history([])), Difficulty.EASY)
+        self.assertEqual(next_difficulty(compact_mission_history(_history(["SUCCESS"] * 3))), Difficulty.HARD)
+        self.assertEqual(next_difficulty(compact_mission_history(_history(["SUCCESS", "FAILURE", "FAILURE"]))), Difficulty.EASY)
+        self.assertEqual(
+            next_difficulty(compact_mission_history(_history(["FAILURE", "SUCCESS", "SUCCESS", "FAILURE", "SUCCESS"]))),
+            Difficulty.NORMAL,
+        )
+
+    def test_missions_use_preferred_exercises_and_minimum_minutes(self):
+        response = daily_missions_fallback(_missions_request(_history(["SUCCESS"] * 3, difficulty="EASY")))
+        exercise, light, diet = response.missions
+        self.assertEqual((exercise.type, exercise.difficulty), (MissionType.EXERCISE, Difficulty.NORMAL))
+        self.assertTrue(exercise.name.startswith("러닝"))
+        self.assertEqual(exercise.estimatedMinutes, 25)
+        self.assertTrue(light.name.startswith("요가"))
+        self.assertEqual(diet.type, MissionType.DIET)
+        self.assertEqual(diet.estimatedCalories, 0)
+
+        no_time = daily_missions_fallback(_missions_request(preferred=[], weekly_failures=["시간 부족"]))
+        self.assertEqual(len(no_time.missions), 2)
+        self.assertTrue(no_time.missions[0].name.startswith("걷기"))
+        self.assertEqual(no_time.missions[0].estimatedMinutes, 20)
+
+    def test_feedback_intents_follow_result_and_ratio(self):
+        failing = daily_feedback_fallback(DailyFeedbackRequest(**_feedback_payload(1)))
+        self.assertEqual([c.intent for c in failing.encouragementCandidates], [Intent.RETRY, Intent.PUSH])
+        self.assertIn("20%", failing.feedbackText)
+
+        praised = daily_feedback_fallback(DailyFeedbackRequest(**_feedback_payload(1, "SUCCESS", 5, 1)))
+        self.assertEqual(praised.encouragementCandidates[0].intent, Intent.PRAISE)
+
+    def test_weekly_uses_top_ranked_reason(self):
+        response = weekly_analysis_fallback(WeeklyAnalysisRequest(
+            userId=1,
+            weekRange={"start": "2026-01-05", "end": "2026-01-11"},
+            weeklyStats={"totalDays": 7, "successDays": 2, "failureDays": 5},
+            failureReasonsRanked=[{"reason": "피로", "count": 1}, {"reason": "야근", "count": 3}],
+        ))
+        self.assertEqual(response.mainFailureReason, "야근 (3회)")
+        self.assertIn("난이도를 낮춰", response.overallFeedback)
+
+
+class TestDeadlineFallbackEndpoints(unittest.TestCase):
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
+    def test_missed_deadline_answers_with_marked_fallback(self, mock_run_agent_system):
+        async def slow_agent(**kwargs):
+            await asyncio.sleep(1)
+            return {"agent_response": "{}"}
+        mock_run_agent_system.side_effect = slow_agent
+
+        before = get_fallback_stats().get("daily_feedback", {}).get("deadline", 0)
+        with patch.dict(os.environ, {"AGENT_DEADLINE_DAILY_FEEDBACK": "0.05"}):
+            response = client.post("/ai/analysis/daily", json=_feedback_payload(16001))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["X-AI-Fallback"], "deadline")
+        DailyFeedbackResponse(**response.json())
+        self.assertEqual(get_fallback_stats()["daily_feedback"]["deadline"], before + 1)
+
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
+    def test_agent_error_answers_with_marked_fallback(self, mock_run_agent_system):
+        mock_run_agent_system.return_value = {"agent_response": "지금은 응답을 생성하는 데 문제가 발생했어요.", "agent_failed": True}
+
+        response = client.post("/ai/analysis/daily", json=_feedback_payload(16002))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["X-AI-Fallback"], "agent_error")
+        self.assertEqual(response.json()["encouragementCandidates"][0]["intent"], "RETRY")
+
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
+    def test_agent_answer_in_time_is_not_marked(self, mock_run_agent_system):
+        mock_run_agent_system.return_value = {
+            "agent_response": '{"feedbackText": "좋아요", "encouragementCandidates": []}'
+        }
+
+        response = client.post("/ai/analysis/daily", json=_feedback_payload(16003))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-AI-Fallback", response.headers)
+        self.assertEqual(response.json()["feedbackText"], "좋아요")
+
+
+if __name__ == '__main__':
+    unittest.main()
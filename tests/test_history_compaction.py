@@ -0,0 +1,64 @@
+import unittest
+from datetime import date, timedelta
+
+from app.api.history import compact_mission_history
+from app.api.schemas import RecentMissionHistoryItem
+from app.core.token_budget import BudgetSection, fit_to_budget
+
+
+def _item(day, result, mission_type="EXERCISE", difficulty="EASY", reason=None):
+    return RecentMissionHistoryItem(
+        date=date(2026, 1, 1) + timedelta(days=day), missionType=mission_type,
+        difficulty=difficulty, result=result, failureReason=reason,
+    )
+
+
+class TestCompactMissionHistory(unittest.TestCase):
+    def test_short_history_is_rendered_verbatim(self):
+        history = compact_mission_history([_item(1, "SUCCESS"), _item(0, "FAILURE", reason="비")], raw_items=5)
+        self.assertFalse(history.aggregated)
+        lines = history.prompt_lines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith("- 날짜: 2026-01-01"))  # 날짜순 정렬
+        self.assertEqual(history.latest.date, date(2026, 1, 2))
+
+    def test_long_history_is_aggregated_to_fixed_size(self):
+        items = [_item(i, "SUCCESS" if i % 4 else "FAILURE", reason="야근" if i % 8 == 0 else "비") for i in range(400)]
+        items += [_item(400, "SUCCESS", mission_type="DIET", difficulty="HARD"), _item(401, "SUCCESS")]
+        history = compact_mission_history(items, raw_items=3)
+
+        self.assertEqual((history.total, history.successes, history.failures), (402, 302, 100))
+        self.assertEqual(history.current_streak[1], 5)  # 397, 398, 399, 400, 401
+        self.assertEqual(history.longest_success_streak, 5)
+        self.assertEqual(history.top_failure_reasons[0], ("야근", 50))
+        self.assertIn(("DIET", "HARD", 1, 0), [(t.value, d.value, s, f) for t, d, s, f in history.counts])
+
+        lines = history.prompt_lines()
+        self.assertLessEqual(len(lines), 5)
+        self.assertEqual(len(compact_mission_history(items * 5, raw_items=3).prompt_lines()), len(lines))
+        recent_block = lines[-1].split("\n")
+        self.assertEqual(recent_block[0], "- 최근 3건:")
+        self.assertTrue(recent_block[-1].strip().startswith("- 날짜: 2027-02-06"))
+
+    def test_budget_trim_keeps_recent_header_with_its_items(self):
+        items = [_item(i, "FAILURE", reason=f"사유 {i}") for i in range(50)]
+        lines = compact_mission_history(items, raw_items=4).prompt_lines()
+        section = BudgetSection(lines, trim_from="start", min_lines=1)
+        full = fit_to_budget(0, 0, 0, {"h": section}).final_tokens
+        recent_tokens = fit_to_budget(1, 0, 0, {"h": section}).final_tokens
+
+        for budget in range(recent_tokens - 1, full + 1):
+            rendered = fit_to_budget(budget, 0, 0, {"h": section}).sections["h"].render().split("\n")
+            self.assertIn("- 최근 4건:", rendered)
+            header = rendered.index("- 최근 4건:")
+            self.assertEqual(len(rendered) - header - 1, 4, rendered)
+            self.assertFalse(any(line.startswith("  ") for line in rendered[:header]), rendered)
+
+    def test_empty_history(self):
+        history = compact_mission_history([], raw_items=5)
+        self.assertIsNone(history.latest)
+        self.assertEqual(history.prompt_lines(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
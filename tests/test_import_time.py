@@ -0,0 +1,30 @@
+import subprocess
+import sys
+import unittest
+
+from scripts.bench_import_time import LAZY_MODULES, parse_importtime
+
+_SAMPLE = """import time: self [us] | cumulative | imported package
+import time:        10 |         10 |     leaf
+import time:        20 |         30 |   child_a
+import time:         5 |          5 |   child_b
+import time:       100 |        135 | target
+"""
+
+
+class TestImportTimeBenchmark(unittest.TestCase):
+    def test_parse_importtime_tree(self):
+        run = parse_importtime(_SAMPLE)
+        self.assertEqual(run.cumulative_us("target"), 135)
+        self.assertEqual([e.module for e in run.heaviest_children("target", 5)], ["child_a", "child_b"])
+        self.assertTrue(run.loaded("leaf"))
+
+    def test_heavy_modules_are_not_imported_eagerly(self):
+        for module in ("agent_system", "app.main"):
+            code = f"import sys, {module}; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+            result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+            self.assertEqual(result.stdout.strip(), "", f"{module} eagerly imports {result.stdout.strip()}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+
+import llm_hedging
+from agent_system import run_agent_system_async
+from llm_hedging import Hedger, LatencyTracker
+
+_ENABLED = {"LLM_HEDGING": "true"}
+
+
+class SlowThenFast:
+    """첫 호출은 느리고 이후 호출은 바로 끝나는 LLM 호출 흉내."""
+
+    def __init__(self, slow_seconds=1.0):
+        self.slow_seconds = slow_seconds
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        try:
+            if call == 1:
+                await asyncio.sleep(self.slow_seconds)
+            return f"call-{call}"
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+def _warm(hedger, key="planner", seconds=0.01, samples=5):
+    for _ in range(samples):
+        hedger.latencies.record(key, seconds)
+
+
+class TestLatencyTracker(unittest.TestCase):
+    def test_percentile(self):
+        tracker = LatencyTracker()
+        for ms in range(1, 101):
+            tracker.record("coach", ms / 1000)
+        self.assertAlmostEqual(tracker.percentile("coach", 95), 0.095, places=3)
+        self.assertIsNone(tracker.percentile("planner", 95))
+
+
+class TestHedger(unittest.TestCase):
+    def test_slow_call_is_hedged_and_loser_cancelled(self):
+        hedger = Hedger(min_samples=5, max_rate=1.0)
+        _warm(hedger)
+        fn = SlowThenFast()
+        with patch.dict("os.environ", _ENABLED):
+            result = asyncio.run(hedger.call("planner", fn))
+        self.assertEqual(result, "call-2")
+        self.assertEqual(fn.cancelled, 1)
+        counters = hedger.snapshot()["nodes"]["planner"]
+        self.assertEqual((counters["hedges_fired"], counters["hedges_won"]), (1, 1))
+
+    def test_fast_call_is_not_hedged(self):
+        hedger = Hedger(min_samples=5, max_rate=1.0)
+        _warm(hedger, seconds=0.5)
+        fn = SlowThenFast(slow_seconds=0)
+        with patch.dict("os.environ", _ENABLED):
+            self.assertEqual(asyncio.run(hedger.call("planner", fn)), "call-1")
+        self.assertEqual(fn.calls, 1)
+        self.assertEqual(hedger.snapshot()["nodes"]["planner"]["hedges_fired"], 0)
+
+    def test_no_hedge_without_enough_samples_or_when_disabled(self):
+        hedger = Hedger(min_samples=5, max_rate=1.0)
+        _warm(hedger, samples=4)
+        fn = SlowThenFast(slow_seconds=0.05)
+        with patch.dict("os.environ", _ENABLED):
+            asyncio.run(hedger.call("planner", fn))
+        self.assertEqual(fn.calls, 1)
+
+        _warm(hedger, samples=5)
+        fn = SlowThenFast(slow_seconds=0.05)
+        with patch.dict("os.environ", {"LLM_HEDGING": "false"}):
+            asyncio.run(hedger.call("planner", fn))
+        self.assertEqual(fn.calls, 1)
+
+    def test_rate_cap_limits_hedges(self):
+        hedger = Hedger(min_samples=5, max_rate=0.0)
+        _warm(hedger)
+        fn = SlowThenFast(slow_seconds=0.05)
+        with patch.dict("os.environ", _ENABLED):
+            self.assertEqual(asyncio.run(hedger.call("planner", fn)), "call-1")
+        self.assertEqual(fn.calls, 1)
+        self.assertEqual(hedger.snapshot()["nodes"]["planner"]["rate_limited"], 1)
+
+    def test_failed_primary_waits_for_hedge(self):
+        hedger = Hedger(min_samples=5, max_rate=1.0)
+        _warm(hedger)
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            if len(calls) == 1:
+                await asyncio.sleep(0.05)
+                raise ConnectionError("primary failed")
+            await asyncio.sleep(0.1)
+            return "hedge"
+
+        with patch.dict("os.environ", _ENABLED):
+            self.assertEqual(asyncio.run(hedger.call("planner", fn)), "hedge")
+
+    def test_both_failing_raises_primary_error(self):
+        hedger = Hedger(min_samples=5, max_rate=1.0)
+        _warm(hedger)
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            call = len(calls)
+            await asyncio.sleep(0.05)
+            raise ConnectionError(f"call {call}")
+
+        with patch.dict("os.environ", _ENABLED):
+            with self.assertRaisesRegex(ConnectionError, "call 1"):
+                asyncio.run(hedger.call("planner", fn))
+
+
+class TestAgentNodeHedging(unittest.TestCase):
+    def test_agent_node_uses_hedged_call(self):
+        class SlowFirstLLM:
+            def __init__(self):
+                self.calls = 0
+
+            async def ainvoke(self, messages, config=None):
+                self.calls += 1
+                if self.calls == 1:
+                    await asyncio.sleep(1)
+                return AIMessage(content=f"답변 {self.calls}")
+
+        hedger = Hedger(min_samples=5, max_rate=1.0)
+        _warm(hedger)
+        fake = SlowFirstLLM()
+        with patch.object(llm_hedging, "_CACHED_HEDGER", hedger), \
+                patch.dict("os.environ", _ENABLED), \
+                patch("agent_system.get_llm", return_value=fake):
+            result = asyncio.run(run_agent_system_async("오늘 미션 추천", target_agent="planner"))
+        self.assertEqual(result["agent_response"], "답변 2")
+
+
+if __name__ == "__main__":
+    unittest.main()
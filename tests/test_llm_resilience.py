@@ -0,0 +1,190 @@
+import asyncio
+import random
+import unittest
+from unittest.mock import patch
+
+import openai
+from langchain_core.messages import AIMessage
+
+import llm_resilience
+from agent_system import run_agent_system_async
+from llm_resilience import (
+    CircuitBreaker, CircuitOpenError, RetryPolicy, acall_with_retry, call_with_retry, is_retryable,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_backoff_is_jittered_and_capped(self):
+        policy = RetryPolicy(base_delay=0.5, max_delay=2.0)
+        rng = random.Random(1)
+        for attempt in range(6):
+            delay = policy.backoff(attempt, rng)
+            self.assertGreaterEqual(delay, 0.0)
+            self.assertLessEqual(delay, min(2.0, 0.5 * 2 ** attempt))
+
+    def test_retryable_errors(self):
+        self.assertTrue(is_retryable(TimeoutError()))
+        self.assertTrue(is_retryable(ConnectionError()))
+        self.assertTrue(is_retryable(openai.APITimeoutError(request=None)))
+        self.assertTrue(is_retryable(StatusError(429)))
+        self.assertTrue(is_retryable(StatusError(503)))
+        self.assertFalse(is_retryable(StatusError(400)))
+        self.assertFalse(is_retryable(ValueError("bad request")))
+        self.assertFalse(is_retryable(CircuitOpenError(1.0)))
+
+    def test_retries_retryable_errors_then_succeeds(self):
+        outcomes = [TimeoutError(), StatusError(502), "ok"]
+        sleeps = []
+
+        def flaky():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        result = call_with_retry(
+            flaky, policy=RetryPolicy(max_retries=2), breaker=CircuitBreaker(), sleep=sleeps.append
+        )
+        self.assertEqual(result, "ok")
+        self.assertEqual(len(sleeps), 2)
+
+    def test_non_retryable_error_is_raised_immediately(self):
+        calls = []
+
+        def bad_request():
+            calls.append(1)
+            raise StatusError(400)
+
+        breaker = CircuitBreaker(failure_threshold=1)
+        with self.assertRaises(StatusError):
+            call_with_retry(bad_request, policy=RetryPolicy(max_retries=3), breaker=breaker, sleep=lambda _: None)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(breaker.state, llm_resilience.CLOSED)
+
+    def test_async_attempt_timeout_is_retried(self):
+        attempts = []
+
+        async def slow():
+            attempts.append(1)
+            await asyncio.sleep(1)
+
+        policy = RetryPolicy(max_retries=1, base_delay=0, timeout=0.02)
+        with self.assertRaises(TimeoutError):
+            asyncio.run(acall_with_retry(slow, policy=policy, breaker=CircuitBreaker()))
+        self.assertEqual(len(attempts), 2)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_consecutive_failures_and_fails_fast(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10, clock=FakeClock())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "closed")
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            breaker.allow()
+        snapshot = breaker.snapshot()
+        self.assertEqual((snapshot["opened"], snapshot["short_circuited"]), (1, 1))
+        self.assertEqual(snapshot["retry_after_seconds"], 10)
+
+    def test_success_resets_the_failure_count(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "closed")
+
+    def test_half_open_allows_a_single_probe(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=10, clock=clock)
+        breaker.record_failure()
+        clock.now = 11
+
+        breaker.allow()  # probe
+        self.assertEqual(breaker.state, "half_open")
+        with self.assertRaises(CircuitOpenError):
+            breaker.allow()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+        clock.now = 22
+        breaker.allow()
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+        breaker.allow()
+
+    def test_cancelled_probe_frees_the_slot(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=1, clock=clock)
+        breaker.record_failure()
+        clock.now = 2
+
+        async def cancelled():
+            raise asyncio.CancelledError
+
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(acall_with_retry(cancelled, policy=RetryPolicy(timeout=0), breaker=breaker))
+        breaker.allow()
+
+
+class BrownoutLLM:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages, config=None):
+        self.calls += 1
+        raise openai.APITimeoutError(request=None)
+
+
+class TestAgentNodeResilience(unittest.TestCase):
+    def test_open_circuit_skips_llm_and_marks_agent_failed(self):
+        fake = BrownoutLLM()
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+        with patch.object(llm_resilience, "_CACHED_LLM_BREAKER", breaker), \
+                patch.dict("os.environ", {"LLM_MAX_RETRIES": "1", "LLM_RETRY_BASE_DELAY_SECONDS": "0"}), \
+                patch("agent_system.get_llm", return_value=fake):
+            first = asyncio.run(run_agent_system_async("오늘 미션 추천", target_agent="planner"))
+            second = asyncio.run(run_agent_system_async("오늘 미션 추천", target_agent="planner"))
+
+        self.assertTrue(first["agent_failed"])
+        self.assertTrue(second["agent_failed"])
+        self.assertEqual(fake.calls, 2)  # 첫 요청의 시도 + 재시도 1회, 두 번째 요청은 서킷이 막음
+        self.assertEqual(breaker.snapshot()["short_circuited"], 1)
+
+    def test_retry_recovers_from_transient_error(self):
+        class FlakyLLM:
+            def __init__(self):
+                self.calls = 0
+
+            async def ainvoke(self, messages, config=None):
+                self.calls += 1
+                if self.calls == 1:
+                    raise openai.APIConnectionError(request=None)
+                return AIMessage(content="플래너 답변")
+
+        fake = FlakyLLM()
+        with patch.object(llm_resilience, "_CACHED_LLM_BREAKER", CircuitBreaker()), \
+                patch.dict("os.environ", {"LLM_RETRY_BASE_DELAY_SECONDS": "0"}), \
+                patch("agent_system.get_llm", return_value=fake):
+            result = asyncio.run(run_agent_system_async("오늘 미션 추천", target_agent="planner"))
+        self.assertFalse(result["agent_failed"])
+        self.assertEqual(result["agent_response"], "플래너 답변")
+        self.assertEqual(fake.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
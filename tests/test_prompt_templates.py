@@ -0,0 +1,53 @@
+import unittest
+
+from app.api.prompts import WEEKLY_ANALYSIS_PROMPT
+from prompt_templates import PromptRegistry, PromptTemplate, estimate_tokens, get_prompt_registry
+
+
+class TestPromptTemplate(unittest.TestCase):
+    def test_render_fills_fields_and_keeps_escaped_braces(self):
+        template = PromptTemplate("t", '사용자 ID: {user_id}\n```json\n{{"a": "{value}"}}\n```')
+        rendered = template.render(user_id=7, value="x")
+        self.assertEqual(rendered.text, '사용자 ID: 7\n```json\n{"a": "x"}\n```')
+        self.assertEqual(rendered.variables, (("user_id", "7"), ("value", "x")))
+        self.assertEqual(rendered.version, template.version)
+
+    def test_static_tokens_exclude_variables(self):
+        template = PromptTemplate("t", "주간 분석: {body}")
+        self.assertEqual(template.fields, ("body",))
+        self.assertEqual(template.static_tokens, estimate_tokens("주간 분석: "))
+
+    def test_version_changes_with_source(self):
+        self.assertNotEqual(PromptTemplate("t", "a {x}").version, PromptTemplate("t", "b {x}").version)
+        self.assertEqual(PromptTemplate("t", "a {x}").version, PromptTemplate("t", "a {x}").version)
+
+    def test_missing_or_unsupported_fields_raise(self):
+        with self.assertRaises(KeyError):
+            PromptTemplate("t", "{a} {b}").render(a=1)
+        with self.assertRaises(ValueError):
+            PromptTemplate("t", "{a.b}")
+
+    def test_registry_dedents_and_rejects_duplicates(self):
+        registry = PromptRegistry()
+        template = registry.register("t", """
+            첫 줄 {x}
+            둘째 줄
+            """)
+        self.assertEqual(template.render(x=1).text, "첫 줄 1\n둘째 줄\n")
+        with self.assertRaises(ValueError):
+            registry.register("t", "다른 내용")
+
+
+class TestRegisteredPrompts(unittest.TestCase):
+    def test_api_and_agent_prompts_are_registered(self):
+        import agent_system  # noqa: F401  (system.* 템플릿 등록)
+
+        snapshot = get_prompt_registry().snapshot()
+        for name in ("api.daily_missions", "api.weekly_analysis", "system.planner", "system.orchestrator"):
+            self.assertIn(name, snapshot)
+            self.assertGreater(snapshot[name]["static_tokens"], 0)
+        self.assertEqual(snapshot["api.weekly_analysis"]["version"], WEEKLY_ANALYSIS_PROMPT.version)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,30 @@
+import asyncio
 import unittest
+from unittest.mock import patch
 
-from agent_system import route_to_agent, validate_user_request
+from langchain_core.messages import AIMessage
+
+from agent_router import route_locally
+from agent_system import (
+    ORCHESTRATOR_SYSTEM_PROMPT, _normalize_agent_choice, build_error_response, get_speculation_stats, route_entry,
+    route_to_agent, run_agent_system_async, validate_user_request,
+)
+
+
+class FakeLLM:
+    """orchestrator 응답 → agent 응답 순으로 돌려주는 테스트용 LLM."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def invoke(self, messages, config=None):
+        self.calls.append(messages)
+        return AIMessage(content=self.responses.pop(0))
+
+    async def ainvoke(self, messages, config=None):
+        self.calls.append(messages)
+        return AIMessage(content=self.responses.pop(0))
 
 
 class TestRouting(unittest.TestCase):
@@ -16,6 +40,32 @@ class TestRouting(unittest.TestCase):
     def test_route_analysis(self):
         self.assertEqual(route_to_agent({"selected_agent": "analysis"}), "analysis")
 
+    def test_entry_without_target_goes_to_orchestrator(self):
+        self.assertEqual(route_entry({"selected_agent": None}), "orchestrator")
+
+    def test_entry_with_target_skips_orchestrator(self):
+        self.assertEqual(route_entry({"selected_agent": "planner"}), "planner")
+
+
+class TestLocalRouter(unittest.TestCase):
+    def test_confident_korean_planner(self):
+        decision = route_locally("다음 주 운동 루틴이랑 계획 세워줘")
+        self.assertEqual(decision.agent, "planner")
+        self.assertGreaterEqual(decision.confidence, 0.75)
+
+    def test_english_keywords_match_on_word_boundary(self):
+        self.assertEqual(route_locally("explanation").confidence, 0.0)
+        self.assertEqual(route_locally("analyze my stats").agent, "analysis")
+
+    def test_no_keywords_defaults_to_analysis(self):
+        decision = route_locally("안녕")
+        self.assertEqual(decision.agent, "analysis")
+        self.assertEqual(decision.confidence, 0.0)
+
+    def test_normalize_falls_back_to_router(self):
+        self.assertEqual(_normalize_agent_choice("", "조언 좀 해줘"), "coach")
+        self.assertEqual(_normalize_agent_choice("planner", "분석해줘"), "planner")
+
 
 class TestValidation(unittest.TestCase):
     def test_empty_request(self):
@@ -27,5 +77,81 @@ class TestValidation(unittest.TestCase):
         self.assertIsNone(message)
 
 
+
+class PromptAwareFakeLLM:
+    """orchestrator 호출에는 지정한 에이전트를, 나머지 호출에는 어떤 에이전트가 답했는지 돌려줌."""
+
+    def __init__(self, orchestrator_choice):
+        self.orchestrator_choice = orchestrator_choice
+        self.agent_calls = 0
+
+    async def ainvoke(self, messages, config=None):
+        if messages[0].content == ORCHESTRATOR_SYSTEM_PROMPT:
+            await asyncio.sleep(0.01)
+            return AIMessage(content=self.orchestrator_choice)
+        self.agent_calls += 1
+        node = config["metadata"]["node"]
+        return AIMessage(content=f"{node} 답변", usage_metadata={"input_tokens": 7, "output_tokens": 3, "total_tokens": 10})
+
+
+class TestAsyncRunner(unittest.TestCase):
+    def test_async_runner_uses_ainvoke(self):
+        fake = FakeLLM("coach", "코칭 답변")
+        with patch("agent_system.get_llm", return_value=fake):
+            result = asyncio.run(run_agent_system_async("운동 조언이 필요해요"))
+        self.assertEqual(result["selected_agent"], "coach")
+        self.assertEqual(result["agent_response"], "코칭 답변")
+        self.assertEqual(len(fake.calls), 2)
+
+    def test_target_agent_skips_orchestrator_call(self):
+        fake = FakeLLM("플래너 답변")
+        with patch("agent_system.get_llm", return_value=fake):
+            result = asyncio.run(run_agent_system_async("오늘 미션 추천", target_agent="planner"))
+        self.assertEqual(result["selected_agent"], "planner")
+        self.assertEqual(result["agent_response"], "플래너 답변")
+        self.assertEqual(len(fake.calls), 1)
+        self.assertFalse(result["agent_failed"])
+
+    def test_llm_error_marks_agent_failed(self):
+        fake = FakeLLM()  # 응답이 없어 ainvoke가 IndexError
+        with patch("agent_system.get_llm", return_value=fake):
+            result = asyncio.run(run_agent_system_async("오늘 미션 추천", target_agent="planner"))
+        self.assertTrue(result["agent_failed"])
+        self.assertEqual(result["agent_response"], build_error_response())
+
+    def test_confident_local_route_skips_orchestrator_call(self):
+        fake = FakeLLM("플래너 답변")
+        with patch("agent_system.get_llm", return_value=fake):
+            result = asyncio.run(run_agent_system_async("한 달 다이어트 계획이랑 루틴 짜줘"))
+        self.assertEqual(result["selected_agent"], "planner")
+        self.assertEqual(len(fake.calls), 1)
+
+    def test_speculation_hit_reuses_agent_result(self):
+        fake = PromptAwareFakeLLM("coach")
+        before = get_speculation_stats()["hits"]
+        with patch.dict("os.environ", {"SPECULATIVE_ROUTING": "true"}), \
+                patch("agent_system.get_llm", return_value=fake):
+            result = asyncio.run(run_agent_system_async("운동 조언이 필요해요"))
+        self.assertEqual(result["agent_response"], "coach 답변")
+        self.assertEqual(fake.agent_calls, 1)
+        self.assertEqual(get_speculation_stats()["hits"], before + 1)
+
+    def test_speculation_miss_reruns_selected_agent(self):
+        fake = PromptAwareFakeLLM("analysis")
+        before = get_speculation_stats()
+        with patch.dict("os.environ", {"SPECULATIVE_ROUTING": "true"}), \
+                patch("agent_system.get_llm", return_value=fake):
+            result = asyncio.run(run_agent_system_async("운동 조언이 필요해요"))
+        after = get_speculation_stats()
+        self.assertEqual(result["selected_agent"], "analysis")
+        self.assertEqual(result["agent_response"], "analysis 답변")
+        self.assertEqual(after["misses"], before["misses"] + 1)
+        self.assertEqual(after["wasted_tokens"], before["wasted_tokens"] + 10)
+
+    def test_async_runner_rejects_empty_request(self):
+        result = asyncio.run(run_agent_system_async("  "))
+        self.assertFalse(result["task_completed"])
+
+
 if __name__ == "__main__":
     unittest.main()
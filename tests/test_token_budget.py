@@ -0,0 +1,91 @@
+import asyncio
+import os
+import unittest
+from datetime import date, timedelta
+from unittest.mock import patch, AsyncMock
+
+from agent_system import update_user_context
+from app.api.schemas import DailyMissionRequest
+from app.api.services import get_daily_missions_service
+from app.core.token_budget import BudgetSection, fit_to_budget, get_token_budget_stats
+
+
+class TestFitToBudget(unittest.TestCase):
+    def test_under_budget_keeps_everything(self):
+        result = fit_to_budget(1000, fixed_tokens=100, context_tokens=50, sections={"h": BudgetSection(["a", "b"])})
+        self.assertTrue(result.include_context)
+        self.assertEqual(result.sections["h"].lines, ["a", "b"])
+        self.assertEqual(result.tokens_saved, 0)
+
+    def test_context_is_dropped_before_lines(self):
+        result = fit_to_budget(110, fixed_tokens=100, context_tokens=50, sections={"h": BudgetSection(["a", "b"])})
+        self.assertFalse(result.include_context)
+        self.assertEqual(result.sections["h"].lines, ["a", "b"])
+        self.assertEqual(result.tokens_saved, 50)
+
+    def test_trims_from_requested_end_down_to_min_lines(self):
+        lines = ["첫째 줄", "둘째 줄", "셋째 줄"]
+        oldest_first = fit_to_budget(1, 0, 0, {"h": BudgetSection(list(lines), trim_from="start", min_lines=1)})
+        self.assertEqual(oldest_first.sections["h"].lines, ["셋째 줄"])
+        self.assertEqual(oldest_first.dropped_lines, {"h": 2})
+
+        ranked = fit_to_budget(1, 0, 0, {"h": BudgetSection(list(lines), trim_from="end", min_lines=1)})
+        self.assertEqual(ranked.sections["h"].lines, ["첫째 줄"])
+        self.assertGreater(ranked.final_tokens, 1)  # min_lines 때문에 예산 초과로 남음
+
+    def test_zero_budget_disables_trimming(self):
+        result = fit_to_budget(0, 10_000, 500, {"h": BudgetSection(["a"] * 100)})
+        self.assertTrue(result.include_context)
+        self.assertEqual(len(result.sections["h"].lines), 100)
+
+
+class TestDailyMissionsTokenBudget(unittest.TestCase):
+    def _request(self, days):
+        start = date(2025, 1, 1)
+        return DailyMissionRequest(**{
+            "userId": 777,
+            "onboarding": {
+                "appGoal": "체중 감량", "workTimeType": "FIXED", "availableStartTime": "18:30",
+                "availableEndTime": "22:00", "minExerciseMinutes": 20, "preferredExercises": ["러닝"],
+                "lifestyleType": "NIGHT",
+            },
+            "recentMissionHistory": [
+                {"date": (start + timedelta(days=i)).isoformat(), "missionType": "EXERCISE",
+                 "difficulty": "NORMAL", "result": "FAILURE", "failureReason": f"사유 {i}"}
+                for i in range(days)
+            ],
+            "weeklyFailureReasons": ["시간 부족"],
+        })
+
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
+    def test_over_budget_drops_context_then_aggregate_lines(self, mock_run_agent_system):
+        mock_run_agent_system.return_value = {"agent_response": '{"missions": []}'}
+        update_user_context("777", {"preferences": {"goal": "감량"}})
+        before = dict(get_token_budget_stats().snapshot().get("daily_missions", {"trimmed": 0, "tokens_saved": 0}))
+
+        with patch.dict(os.environ, {"PROMPT_TOKEN_BUDGET_DAILY_MISSIONS": "800"}), \
+                self.assertLogs("app.api.services", level="INFO") as logs:
+            asyncio.run(get_daily_missions_service(self._request(200)))
+
+        kwargs = mock_run_agent_system.call_args.kwargs
+        self.assertFalse(kwargs["include_context"])
+        self.assertIn("2025-07-19", kwargs["user_request"])  # 가장 최근 미션은 남음
+        self.assertNotIn("- 기간:", kwargs["user_request"])  # 집계 줄부터 제거
+        self.assertIn("saved", logs.output[0])
+
+        after = get_token_budget_stats().snapshot()["daily_missions"]
+        self.assertEqual(after["trimmed"] - before["trimmed"], 1)
+        self.assertGreater(after["tokens_saved"], before["tokens_saved"])
+
+    @patch('app.api.services.run_agent_system_async', new_callable=AsyncMock)
+    def test_short_history_is_untouched(self, mock_run_agent_system):
+        mock_run_agent_system.return_value = {"agent_response": '{"missions": []}'}
+        asyncio.run(get_daily_missions_service(self._request(3)))
+
+        kwargs = mock_run_agent_system.call_args.kwargs
+        self.assertTrue(kwargs["include_context"])
+        self.assertIn("2025-01-01", kwargs["user_request"])
+
+
+if __name__ == "__main__":
+    unittest.main()
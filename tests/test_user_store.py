@@ -0,0 +1,456 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+
+import user_store
+from agent_system import (
+    get_user_context, get_user_context_fingerprint, get_user_context_version, run_agent_system_async,
+    summarize_user_context, update_user_context,
+)
+from user_store import EventRing, InMemoryUserStore, SQLiteUserStore, UserEvent, UserRecord, apply_user_payload
+
+
+class TestUserRecords(unittest.TestCase):
+    def test_event_round_trips_through_slots_and_extra(self):
+        payload = {
+            "date": "2026-01-05",
+            "missionType": "EXERCISE",
+            "difficulty": "EASY",
+            "mission_result": "FAILURE",
+            "fail_reason": "야근",
+            "history_successes": 3,
+            "weird": {"nested": True},
+        }
+        event = UserEvent.from_dict(payload, 12.5)
+        self.assertIsInstance(event.result, int)
+        self.assertEqual(event.to_dict(), {**payload, "ts": 12.5})
+        self.assertEqual(event.get("mission_result"), "FAILURE")
+        self.assertEqual(event.get("history_successes"), 3)
+        self.assertIsNone(event.get("missing"))
+
+    def test_non_string_coded_field_falls_back_to_extra(self):
+        event = UserEvent.from_dict({"difficulty": 3}, 0.0)
+        self.assertIsNone(event.difficulty)
+        self.assertEqual(event.to_dict(), {"difficulty": 3, "ts": 0.0})
+
+    def test_repeated_strings_are_shared(self):
+        first = UserEvent.from_dict({"fail_reason": "".join(["야", "근"])}, 0.0)
+        second = UserEvent.from_dict({"fail_reason": "".join(["야", "근"])}, 1.0)
+        self.assertIs(first.fail_reason, second.fail_reason)
+
+    def test_ring_keeps_the_latest_events_in_order(self):
+        ring = EventRing()
+        for i in range(7):
+            ring.append(UserEvent.from_dict({"mission": f"m{i}"}, float(i)), capacity=5)
+        self.assertEqual([e.mission for e in ring], ["m2", "m3", "m4", "m5", "m6"])
+        self.assertEqual(ring.last().mission, "m6")
+        self.assertEqual([e.mission for e in ring.recent(2)], ["m5", "m6"])
+        self.assertEqual(len(ring), 5)
+
+    def test_apply_counts_stats_and_skips_duplicate_events(self):
+        record = UserRecord(0.0, 1)
+        self.assertIsNotNone(apply_user_payload(record, {"event": {"mission": "걷기", "mission_result": "success"}}, 1.0))
+        self.assertIsNone(apply_user_payload(record, {"event": {"mission": "걷기", "mission_result": "success"}}, 2.0))
+        self.assertIsNotNone(apply_user_payload(record, {"event": {"mission": "걷기", "mission_result": "fail"}}, 3.0))
+        self.assertEqual((record.success, record.fail, len(record.events), record.updated_at), (1, 1, 2, 3.0))
+
+
+class CountingLock:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.acquired = 0
+
+    def __enter__(self):
+        self._lock.acquire()
+        self.acquired += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+
+def count_lock_acquisitions(store, op):
+    locks = []
+    for stripe in store._stripes:
+        stripe.lock = CountingLock()
+        locks.append(stripe.lock)
+    op()
+    return sum(lock.acquired for lock in locks)
+
+
+class StoreContract:
+    """두 저장소가 같은 동작을 하는지 확인하는 공통 테스트."""
+
+    def make_store(self):
+        raise NotImplementedError
+
+    def test_missing_user(self):
+        store = self.make_store()
+        self.assertIsNone(store.read("nobody"))
+        self.assertEqual(store.version("nobody"), 0)
+
+    def test_update_merges_and_versions_only_on_change(self):
+        store = self.make_store()
+        self.assertTrue(store.update("u1", {"preferences": {"goal": "감량"}}))
+        v1 = store.version("u1")
+        self.assertFalse(store.update("u1", {"preferences": {"goal": "감량"}}))
+        self.assertEqual(store.version("u1"), v1)
+
+        self.assertTrue(store.update("u1", {"event": {"mission": "걷기", "mission_result": "success"}}))
+        self.assertFalse(store.update("u1", {"event": {"mission": "걷기", "mission_result": "success"}}))
+        self.assertGreater(store.version("u1"), v1)
+
+        record = store.read("u1")
+        self.assertEqual(record["preferences"], {"goal": "감량"})
+        self.assertEqual(len(record["events"]), 1)
+        self.assertEqual(record["stats"], {"success": 1, "fail": 0})
+
+    def test_events_are_capped(self):
+        store = self.make_store()
+        for i in range(user_store.MAX_USER_EVENTS + 5):
+            store.update("u1", {"event": {"mission": f"m{i}"}})
+        events = store.read("u1")["events"]
+        self.assertEqual(len(events), user_store.MAX_USER_EVENTS)
+        self.assertEqual(events[-1]["mission"], f"m{user_store.MAX_USER_EVENTS + 4}")
+
+    def test_values_json_cannot_encode_are_stored_as_strings(self):
+        store = self.make_store()
+        store.update("u1", {"preferences": {"s": {1}, 7: "seven"}, "event": {"mission": "걷기", "tags": {"a"}}})
+        store.flush()
+        record = store.read("u1")  # SQLite는 DB에서 다시 읽음
+        self.assertEqual(record["preferences"], {"s": "{1}", "7": "seven"})
+        self.assertEqual(record["events"][-1]["tags"], "{'a'}")
+
+    def test_read_returns_a_copy(self):
+        store = self.make_store()
+        store.update("u1", {"preferences": {"goal": "감량"}})
+        store.read("u1")["preferences"]["goal"] = "changed"
+        self.assertEqual(store.read("u1")["preferences"], {"goal": "감량"})
+
+    def test_concurrent_updates_from_many_threads(self):
+        store = self.make_store()
+        users = [f"u{i}" for i in range(20)]
+
+        def worker(offset):
+            for n in range(40):
+                user = users[(offset + n) % len(users)]
+                store.update(user, {"event": {"mission": f"m{offset}-{n}", "mission_result": "success"}})
+                store.read(user)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        store.flush()
+        self.assertEqual(sum(store.read(u)["stats"]["success"] for u in users), 8 * 40)
+
+    def test_each_operation_takes_one_lock_on_the_hot_path(self):
+        store = self.make_store()
+        store.update("u1", {"preferences": {"goal": "감량"}})
+        if hasattr(store, "cache_seconds"):
+            store.cache_seconds = 60
+        self.assertEqual(count_lock_acquisitions(store, lambda: store.update("u1", {"event": {"mission": "걷기"}})), 1)
+        self.assertEqual(count_lock_acquisitions(store, lambda: store.read("u1")), 1)
+        self.assertEqual(count_lock_acquisitions(store, lambda: store.version("u1")), 1)
+
+    def test_expired_user_is_dropped(self):
+        store = self.make_store()
+        with patch("user_store.time.time", return_value=1000.0):
+            store.update("u1", {"preferences": {"goal": "감량"}})
+            store.flush()
+        with patch("user_store.time.time", return_value=1000.0 + user_store.USER_TTL_SECONDS + 10):
+            self.assertIsNone(store.read("u1"))
+
+    def test_sweep_evicts_users_that_are_never_touched_again(self):
+        store = self.make_store()
+        with patch("user_store.time.time", return_value=1000.0):
+            store.update("churned", {"preferences": {"goal": "감량"}})
+        with patch("user_store.time.time", return_value=1000.0 + user_store.USER_TTL_SECONDS):
+            store.update("active", {"preferences": {"goal": "유지"}})
+            store.flush()
+        with patch("user_store.time.time", return_value=1000.0 + user_store.USER_TTL_SECONDS + 10):
+            self.assertGreaterEqual(store.sweep(), 1)
+            self.assertEqual(store.snapshot()["users"], 1)
+            self.assertIsNotNone(store.read("active"))
+
+
+    def test_render_is_cached_until_the_version_changes(self):
+        store = self.make_store()
+        if hasattr(store, "cache_seconds"):
+            store.cache_seconds = 60  # DB에서 다시 읽으면 새로 렌더링하므로 캐시 안에서만 확인
+        calls = []
+
+        def renderer(record):
+            calls.append(record.version)
+            return f"goal={record.preferences.get('goal')}"
+
+        self.assertIsNone(store.render("u1", renderer))
+        store.update("u1", {"preferences": {"goal": "감량"}})
+        store.flush()
+        self.assertEqual(store.render("u1", renderer), "goal=감량")
+        store.update("u1", {"preferences": {"goal": "감량"}})  # 내용 그대로 → version 유지
+        store.flush()
+        self.assertEqual(store.render("u1", renderer), "goal=감량")
+        self.assertEqual(len(calls), 1)
+
+        store.update("u1", {"preferences": {"goal": "유지"}})
+        self.assertEqual(store.render("u1", renderer), "goal=유지")
+        self.assertEqual(len(calls), 2)
+
+
+class TestInMemoryUserStore(StoreContract, unittest.TestCase):
+    def make_store(self, **kwargs):
+        return InMemoryUserStore(**kwargs)
+
+    def test_max_users_evicts_least_recently_updated(self):
+        store = self.make_store(max_users=3, stripes=1)
+        for user in ("u0", "u1", "u2"):
+            store.update(user, {"preferences": {"goal": "감량"}})
+        store.update("u0", {"event": {"mission": "걷기"}})  # u0이 가장 최근
+        store.update("u3", {"preferences": {"goal": "감량"}})
+
+        self.assertIsNone(store.read("u1"))
+        self.assertIsNotNone(store.read("u0"))
+        snapshot = store.snapshot()
+        self.assertEqual((snapshot["users"], snapshot["evicted_lru"]), (3, 1))
+
+    def test_approx_bytes_grows_with_records(self):
+        store = self.make_store()
+        store.update("u1", {"preferences": {"goal": "감량"}})
+        small = store.snapshot()["approx_bytes"]
+        for i in range(10):
+            store.update(f"u{i + 2}", {"event": {"mission": f"m{i}", "fail_reason": "야근"}})
+        self.assertGreater(small, 0)
+        self.assertGreater(store.snapshot()["approx_bytes"], small)
+
+
+class TestSQLiteUserStore(StoreContract, unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "users.sqlite3")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_store(self, **kwargs):
+        kwargs.setdefault("flush_seconds", 60)
+        kwargs.setdefault("cache_seconds", 0)
+        return SQLiteUserStore(self.path, **kwargs)
+
+    def test_writes_are_batched_until_flush(self):
+        worker_a = self.make_store(cache_seconds=60)
+        worker_b = self.make_store()  # 같은 호스트의 다른 워커 프로세스 역할
+        worker_a.update("u1", {"preferences": {"goal": "감량"}})
+        self.assertEqual(worker_a.read("u1")["preferences"], {"goal": "감량"})
+        self.assertIsNone(worker_b.read("u1"))
+
+        worker_a.flush()
+        self.assertEqual(worker_b.read("u1")["preferences"], {"goal": "감량"})
+        self.assertEqual(worker_b.version("u1"), worker_a.version("u1"))
+
+    def test_batch_size_triggers_flush(self):
+        store = self.make_store(batch_size=3, stripes=1)
+        for i in range(3):
+            store.update(f"u{i}", {"preferences": {"goal": "감량"}})
+        deadline = time.monotonic() + 5
+        while store.snapshot()["flushes"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)  # 백그라운드 flush 스레드가 깨어날 때까지
+        snapshot = store.snapshot()
+        self.assertEqual((snapshot["flushes"], snapshot["pending_users"], snapshot["users"]), (1, 0, 3))
+
+    def test_flusher_survives_an_unexpected_error(self):
+        store = self.make_store(batch_size=1, stripes=1)
+        write_user = store._write_user_locked
+        failures = []
+
+        def fail_once(user_id, write):
+            if not failures:
+                failures.append(user_id)
+                raise RuntimeError("boom")
+            write_user(user_id, write)
+
+        with patch.object(store, "_write_user_locked", side_effect=fail_once), \
+                self.assertLogs("user_store", level="ERROR"):
+            store.update("u1", {"preferences": {"goal": "감량"}})
+            deadline = time.monotonic() + 5
+            while not failures and time.monotonic() < deadline:
+                time.sleep(0.01)
+            store.update("u2", {"preferences": {"goal": "유지"}})  # 되돌려진 u1과 함께 다시 기록
+            while store.snapshot()["flushes"] == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        self.assertTrue(store._flusher.is_alive())
+        other = self.make_store()
+        self.assertEqual(other.read("u1")["preferences"], {"goal": "감량"})
+        self.assertEqual(other.read("u2")["preferences"], {"goal": "유지"})
+
+    def test_concurrent_workers_merge_instead_of_overwriting(self):
+        worker_a = self.make_store()
+        worker_b = self.make_store()
+        worker_a.update("u1", {"preferences": {"goal": "감량"}, "event": {"mission": "걷기", "mission_result": "success"}})
+        worker_b.update("u1", {"preferences": {"time": "아침"}, "event": {"mission": "스쿼트", "mission_result": "fail"}})
+        worker_a.flush()
+        worker_b.flush()
+
+        record = self.make_store().read("u1")
+        self.assertEqual(record["preferences"], {"goal": "감량", "time": "아침"})
+        self.assertEqual([e["mission"] for e in record["events"]], ["걷기", "스쿼트"])
+        self.assertEqual(record["stats"], {"success": 1, "fail": 1})
+
+    def test_merged_write_from_another_worker_invalidates_render(self):
+        worker_a = self.make_store()
+        worker_b = self.make_store()
+        worker_a.update("u1", {"event": {"mission": "걷기"}})
+        with patch("user_store.time.time_ns", return_value=1_000_000):
+            worker_b.update("u1", {"event": {"mission": "스쿼트"}})  # 시계가 뒤처진 워커 → 더 작은 version
+        worker_a.flush()
+
+        def missions(record):
+            return [e.get("mission") for e in record.events]
+
+        self.assertEqual(worker_a.render("u1", missions), ["걷기"])
+        worker_b.flush()
+        self.assertEqual(worker_a.render("u1", missions), ["걷기", "스쿼트"])
+
+    def test_cache_miss_merges_pending_writes_without_flushing(self):
+        other = self.make_store()  # 다른 워커
+        other.update("u1", {"preferences": {"time": "아침"}, "event": {"mission": "걷기", "mission_result": "success"}})
+        other.flush()
+        db_version = other.version("u1")
+
+        store = self.make_store(cache_seconds=0)  # 읽을 때마다 DB에서 다시 읽음
+        store.update("u1", {"preferences": {"goal": "감량"}, "event": {"mission": "스쿼트", "mission_result": "fail"}})
+        record = store.read("u1")
+        self.assertEqual(record["preferences"], {"time": "아침", "goal": "감량"})
+        self.assertEqual([e["mission"] for e in record["events"]], ["걷기", "스쿼트"])
+        self.assertEqual(record["stats"], {"success": 1, "fail": 1})
+        self.assertGreater(store.version("u1"), db_version)
+        snapshot = store.snapshot()
+        self.assertEqual((snapshot["flushes"], snapshot["pending_users"]), (0, 1))
+
+        store.flush()
+        self.assertEqual(self.make_store().read("u1")["preferences"], {"time": "아침", "goal": "감량"})
+
+    def test_stale_writer_merge_does_not_reuse_render(self):
+        worker_a = self.make_store(cache_seconds=60)
+        worker_b = self.make_store()
+
+        def prefs(record):
+            return dict(record.preferences)
+
+        worker_a.update("u1", {"preferences": {"a": 1}})
+        worker_a.flush()
+        self.assertEqual(worker_a.render("u1", prefs), {"a": 1})
+
+        worker_b.update("u1", {"preferences": {"b": 2}})
+        worker_b.flush()
+        # A는 B의 쓰기를 아직 모르는 캐시 위에서 갱신하고, 시계가 앞서 있어 A의 version이 DB보다 훨씬 크다
+        with patch("user_store.time.time_ns", return_value=10 ** 19):
+            worker_a.update("u1", {"preferences": {"c": 3}})
+        local_version = worker_a.version("u1")
+        worker_a.flush()
+
+        worker_a.cache_seconds = 0
+        self.assertEqual(worker_a.read("u1")["preferences"], {"a": 1, "b": 2, "c": 3})
+        self.assertEqual(worker_a.render("u1", prefs), {"a": 1, "b": 2, "c": 3})
+        self.assertGreater(worker_a.version("u1"), local_version)  # 합쳐진 내용 → version 기반 응답 캐시도 갱신
+
+    def test_read_through_cache_avoids_db_reads(self):
+        store = self.make_store(cache_seconds=60)
+        store.update("u1", {"preferences": {"goal": "감량"}})
+        for _ in range(5):
+            store.read("u1")
+            store.version("u1")
+        snapshot = store.snapshot()
+        self.assertEqual(snapshot["db_reads"], 1)  # 첫 update의 read-through 한 번
+        self.assertEqual(snapshot["cache_hits"], 10)
+
+    def test_cache_is_capped_without_losing_unflushed_writes(self):
+        store = self.make_store(max_users=2, stripes=1, cache_seconds=60)
+        for user in ("u0", "u1", "u2"):
+            store.update(user, {"preferences": {"goal": user}})
+        snapshot = store.snapshot()
+        self.assertEqual((snapshot["cached_users"], snapshot["evicted_lru"]), (2, 1))
+        self.assertEqual(store.read("u0")["preferences"], {"goal": "u0"})  # flush 후 DB에서 다시 읽음
+
+    def test_sweep_drops_stale_cache_entries(self):
+        store = self.make_store(cache_seconds=60)
+        with patch("user_store.time.time", return_value=1000.0):
+            store.update("u1", {"preferences": {"goal": "감량"}})
+        with patch("user_store.time.time", return_value=1100.0):
+            store.sweep()
+            snapshot = store.snapshot()
+            self.assertEqual((snapshot["cached_users"], snapshot["evicted_stale"]), (0, 1))
+            self.assertEqual(store.read("u1")["preferences"], {"goal": "감량"})
+
+    def test_stale_cache_keeps_unflushed_local_writes(self):
+        store = self.make_store(cache_seconds=0)
+        store.update("u1", {"preferences": {"goal": "감량"}})
+        self.assertEqual(store.read("u1")["preferences"], {"goal": "감량"})
+
+
+class TestAgentSystemUsesStore(unittest.TestCase):
+    def test_context_functions_delegate_to_configured_store(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = SQLiteUserStore(os.path.join(tmpdir, "users.sqlite3"), flush_seconds=60)
+            with patch.object(user_store, "_CACHED_USER_STORE", store):
+                update_user_context("901", {"preferences": {"goal": "감량"}})
+                self.assertIn("goal:감량", summarize_user_context("901"))
+                self.assertEqual(get_user_context_version("901"), store.version("901"))
+                self.assertEqual(store.snapshot()["pending_users"], 1)
+
+    def test_context_is_rendered_once_per_version(self):
+        with patch.object(user_store, "_CACHED_USER_STORE", InMemoryUserStore()):
+            update_user_context("902", {"preferences": {"goal": "감량"}})
+            first = get_user_context("902")
+            self.assertIs(get_user_context("902"), first)
+            self.assertEqual(first.message.content, first.summary)
+            self.assertEqual(get_user_context_fingerprint("902"), first.fingerprint)
+
+            update_user_context("902", {"event": {"mission": "걷기", "mission_result": "success"}})
+            second = get_user_context("902")
+            self.assertIsNot(second, first)
+            self.assertIn("미션:걷기 / 결과:success", second.summary)
+            self.assertIn("성공 1회", second.summary)
+            self.assertIsNone(get_user_context("unknown").message)
+
+    def test_async_runner_uses_the_store_off_the_event_loop(self):
+        threads = []
+
+        class RecordingStore(InMemoryUserStore):
+            def update(self, user_id, payload):
+                threads.append(threading.current_thread())
+                return super().update(user_id, payload)
+
+        class FakeLLM:
+            async def ainvoke(self, messages, config=None):
+                return AIMessage(content="플래너 답변")
+
+        with patch.object(user_store, "_CACHED_USER_STORE", RecordingStore()), \
+                patch("agent_system.get_llm", return_value=FakeLLM()):
+            result = asyncio.run(run_agent_system_async(
+                "오늘 미션 추천", user_id="903", user_payload={"preferences": {"goal": "감량"}}, target_agent="planner",
+            ))
+        self.assertEqual(result["agent_response"], "플래너 답변")
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+
+    def test_store_interface_is_abstract(self):
+        with self.assertRaises(TypeError):
+            user_store.UserContextStore()
+
+    def test_memory_store_is_the_default(self):
+        with patch.object(user_store, "_CACHED_USER_STORE", None), patch.dict("os.environ", {}, clear=False):
+            os.environ.pop("USER_STORE_DB_PATH", None)
+            self.assertIsInstance(user_store.get_user_store(), InMemoryUserStore)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+import agent_system
+from app.main import app
+
+_OFFLINE_ENV = {"UPSTAGE_API_KEY": "test-key", "UPSTAGE_API_BASE": "http://127.0.0.1:9"}
+
+
+def _wait_until_ready(client, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get("/ready")
+        if response.status_code == 200 or response.json()["status"] == "failed" or time.monotonic() > deadline:
+            return response
+        time.sleep(0.01)
+
+
+class TestStartupWarmup(unittest.TestCase):
+    def test_ready_after_warmup(self):
+        with patch.dict(os.environ, _OFFLINE_ENV), TestClient(app) as client:
+            response = _wait_until_ready(client)
+            self.assertIsNotNone(agent_system._CACHED_GRAPH)
+            self.assertIsNotNone(agent_system._CACHED_LLM)
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["status"], "ready")
+        self.assertEqual(body["api_base"], "http://127.0.0.1:9")
+        self.assertTrue(body["connection"].startswith("failed"))  # 연결 예열 실패는 준비 상태를 막지 않음
+        self.assertIsNone(agent_system._CACHED_LLM)  # 종료 시 클라이언트 정리
+
+    def test_not_ready_without_llm_client(self):
+        env = {k: v for k, v in os.environ.items() if k != "UPSTAGE_API_KEY"}
+        with patch.dict(os.environ, env, clear=True), TestClient(app) as client:
+            response = _wait_until_ready(client)
+            self.assertEqual(client.get("/").status_code, 200)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["status"], "failed")
+        self.assertIn("UPSTAGE_API_KEY", response.json()["error"])
+
+    def test_concurrent_first_calls_build_one_llm(self):
+        built = []
+
+        class CountingChatUpstage:
+            def __init__(self, **kwargs):
+                time.sleep(0.05)  # 생성이 느릴 때 경쟁이 드러나도록
+                built.append(kwargs)
+
+        results = []
+        with patch.dict(os.environ, _OFFLINE_ENV), \
+                patch("langchain_upstage.ChatUpstage", CountingChatUpstage), \
+                patch.object(agent_system, "_CACHED_LLM", None), \
+                patch.object(agent_system, "_CACHED_HTTP_CLIENTS", None):
+            threads = [threading.Thread(target=lambda: results.append(agent_system.get_llm())) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            clients = agent_system._CACHED_HTTP_CLIENTS
+            clients[0].close()
+
+        self.assertEqual(len(built), 1)
+        self.assertEqual(len({id(llm) for llm in results}), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, AsyncMock
+
+from fastapi import HTTPException
+
+from app.api.schemas import WeeklyAnalysisResponse
+from scripts.weekly_analysis_batch import run_batch
+
+
+def _record(user_id):
+    return {
+        "userId": user_id,
+        "weekRange": {"start": "2026-01-05", "end": "2026-01-11"},
+        "weeklyStats": {"totalDays": 7, "successDays": 3, "failureDays": 4},
+        "failureReasonsRanked": [{"reason": "시간 부족", "count": 3}],
+    }
+
+
+class TestWeeklyAnalysisBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmp.name, "in.jsonl")
+        self.output_path = os.path.join(self.tmp.name, "out.jsonl")
+        with open(self.input_path, "w", encoding="utf-8") as f:
+            for user_id in (1, 2, 3):
+                f.write(json.dumps(_record(user_id)) + "\n")
+            f.write("{not json}\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_resume_skips_completed_and_retries_failed(self):
+        async def flaky(request):
+            if request.userId == 2:
+                raise HTTPException(status_code=500, detail="boom")
+            return WeeklyAnalysisResponse(mainFailureReason="시간 부족", overallFeedback="잘했어요")
+
+        with patch("scripts.weekly_analysis_batch.get_weekly_analysis_service", new=AsyncMock(side_effect=flaky)):
+            first = asyncio.run(run_batch(self.input_path, self.output_path, workers=2))
+        self.assertEqual((first["succeeded"], first["failed"], first["skipped"], first["invalid"]), (2, 1, 0, 1))
+
+        # 크래시로 마지막 줄이 잘린 상황을 흉내
+        with open(self.output_path, "a", encoding="utf-8") as f:
+            f.write('{"key": "3:2026')
+
+        ok = AsyncMock(return_value=WeeklyAnalysisResponse(mainFailureReason="x", overallFeedback="y"))
+        with patch("scripts.weekly_analysis_batch.get_weekly_analysis_service", new=ok):
+            second = asyncio.run(run_batch(self.input_path, self.output_path, workers=2))
+
+        self.assertEqual((second["succeeded"], second["skipped"]), (1, 2))
+        self.assertEqual(ok.call_args.args[0].userId, 2)
+        with open(self.output_path, encoding="utf-8") as f:
+            keys = [json.loads(line)["key"] for line in f]
+        self.assertEqual(sorted(keys), ["1:2026-01-05:2026-01-11", "2:2026-01-05:2026-01-11", "3:2026-01-05:2026-01-11"])
+
+    def test_duplicate_keys_are_analyzed_once(self):
+        with open(self.input_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(_record(1)) + "\n")
+            f.write(json.dumps(_record(3)) + "\n")
+
+        ok = AsyncMock(return_value=WeeklyAnalysisResponse(mainFailureReason="x", overallFeedback="y"))
+        with patch("scripts.weekly_analysis_batch.get_weekly_analysis_service", new=ok):
+            result = asyncio.run(run_batch(self.input_path, self.output_path, workers=4))
+
+        self.assertEqual((result["succeeded"], result["duplicates"], result["failed"]), (3, 2, 0))
+        self.assertEqual(ok.call_count, 3)
+        with open(self.output_path, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,1031 @@
+"""
+유저 컨텍스트(개인화) 저장소.
+
+agent_system의 update_user_context / summarize_user_context / get_user_context_version은
+이 모듈의 저장소 인터페이스(UserContextStore)만 사용한다.
+
+- InMemoryUserStore: 프로세스 로컬 dict (기본값). 워커마다 따로 가지므로 멀티워커에서는 개인화가 워커별로 다름
+- SQLiteUserStore: 한 호스트의 모든 워커가 같은 SQLite 파일(WAL)을 공유
+  - 읽기: 프로세스 로컬 read-through 캐시. USER_STORE_CACHE_SECONDS 동안은 DB를 다시 읽지 않음
+    캐시 미스 때 다시 읽으면 아직 기록하지 않은 이 프로세스의 변경분(pending)을 그 위에 합쳐 보여준다 (flush를 강제하지 않음)
+  - 쓰기: 캐시에 바로 반영하고 변경분만 모아 백그라운드 스레드가 USER_STORE_FLUSH_SECONDS마다
+    (또는 한 조각에 USER_STORE_BATCH_SIZE명이 쌓이면 바로) 한 트랜잭션으로 기록 → 요청 경로는 디스크 쓰기를 하지 않음
+  - 캐시 미스의 DB 읽기는 진행 중인 flush가 끝날 때까지 기다릴 수 있는 동기 호출이므로
+    async 경로(agent_system / app.api)는 저장소를 asyncio.to_thread로 부른다
+  - 선호는 키 단위 upsert, 이벤트는 append, 통계는 증분으로 기록해 여러 워커의 쓰기가 서로 덮어쓰지 않고 합쳐짐
+  - 다른 워커의 변경은 최대 (캐시 시간 + flush 간격) 늦게 보인다
+  - flush가 실패해도 변경분은 pending으로 돌아가고 flush 스레드는 로그만 남기고 계속 돈다
+- 두 저장소 모두 JSON으로 기록할 수 없는 선호/이벤트 값(set 등)은 반영할 때 문자열로 바꾼다
+
+두 저장소 모두 user_id 해시로 나눈 조각(stripe)마다 락을 따로 두고, 연산 하나는 락을 한 번만 잡는다
+(SQLite 캐시 미스처럼 DB I/O가 필요한 경우만 I/O 전후로 나눠 잡음). scripts/bench_user_store.py 참고.
+
+메모리 상한
+- 조각의 레코드는 마지막 갱신 순서(OrderedDict)로 둔다 → 앞쪽이 가장 오래 갱신되지 않은 유저
+- 백그라운드 스위퍼가 USER_STORE_SWEEP_SECONDS마다 조각 앞쪽에서 만료(TTL)된 레코드만 조금씩 지운다
+  (한 번에 _SWEEP_BATCH개씩 락을 잡았다 놓으므로 요청을 오래 막지 않음)
+- 인메모리 레코드 수가 USER_STORE_MAX_USERS를 넘으면 가장 오래 갱신되지 않은 유저부터 내보낸다 (LRU)
+- SQLite 저장소는 로컬 캐시에 같은 상한을 걸고, 스위퍼가 오래된 캐시 항목과 DB의 만료 유저를 지운다
+- snapshot()의 users / approx_bytes로 레코드 수와 대략적인 메모리 사용량을 본다
+
+렌더링 캐시
+- render(user_id, renderer)는 renderer(record) 결과(agent_system의 컨텍스트 요약 / SystemMessage)를 레코드에
+  version과 함께 붙여 두고, update로 version이 오르기 전까지는 다시 렌더링하지 않는다
+- SQLite 저장소는 DB에서 다시 읽은 레코드(캐시 시간마다)를 한 번 새로 렌더링한다 (다른 워커의 쓰기가 합쳐졌을 수 있음)
+
+환경변수 (선택)
+- USER_STORE_DB_PATH=/var/lib/omteam/users.sqlite3   # 없으면 인메모리
+- USER_STORE_CACHE_SECONDS=2
+- USER_STORE_FLUSH_SECONDS=0.5
+- USER_STORE_BATCH_SIZE=64
+- USER_STORE_LOCK_STRIPES=16
+- USER_STORE_MAX_USERS=100000      # 0이면 상한 없음
+- USER_STORE_SWEEP_SECONDS=60
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import atexit
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+MAX_USER_EVENTS = 30
+USER_TTL_SECONDS = 60 * 60 * 24 * 14  # 14 days
+DEFAULT_LOCK_STRIPES = 16
+DEFAULT_MAX_USERS = 100_000
+
+_SWEEP_BATCH = 512
+_BYTES_SAMPLE_PER_STRIPE = 16
+
+_MISSING = object()
+
+logger = logging.getLogger(__name__)
+
+
+def _now_ts() -> float:
+    return time.time()
+
+
+# -----------------------------------------------------------------------------
+# Records (per-user memory: __slots__ objects + fixed-capacity event ring)
+# -----------------------------------------------------------------------------
+class _Codebook:
+    """몇 가지 값만 반복되는 필드(미션 결과/타입/난이도) ↔ 작은 정수 코드. 코드 수는 limit개로 제한."""
+
+    def __init__(self, limit: int = 256) -> None:
+        self._limit = limit
+        self._codes: Dict[str, int] = {}
+        self._values: List[str] = []
+        self._lock = threading.Lock()
+
+    def encode(self, value: Any) -> Optional[int]:
+        """코드 (문자열이 아니거나 코드가 다 찼으면 None → 호출자가 extra에 원래 값을 둔다)."""
+        if not isinstance(value, str):
+            return None
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None and len(self._values) < self._limit:
+                    code = self._codes[value] = len(self._values)
+                    self._values.append(value)
+        return code
+
+    def decode(self, code: int) -> str:
+        return self._values[code]
+
+
+# 같은 내용의 문자열(실패 사유, 선호 값, 키 이름 등)을 객체 하나로 공유.
+# sys.intern과 달리 개수/길이 제한이 있어 임의 입력으로 무한히 커지지 않는다.
+_INTERNED: Dict[str, str] = {}
+_INTERN_LIMIT = 65536
+_INTERN_MAX_LENGTH = 256
+
+
+def _intern(value: Any) -> Any:
+    if value.__class__ is not str or len(value) > _INTERN_MAX_LENGTH:
+        return value
+    shared = _INTERNED.get(value)
+    if shared is None:
+        if len(_INTERNED) >= _INTERN_LIMIT:
+            return value
+        shared = _INTERNED.setdefault(value, value)
+    return shared
+
+
+_JSON_SCALARS = (str, int, float, bool, type(None))
+
+
+def _json_value(value: Any) -> Any:
+    """
+    JSON으로 기록할 수 없는 값(set, datetime, 문자열이 아닌 키 등)은 문자열로 바꾼다.
+    → 잘못된 값 하나가 SQLite flush를 실패시켜 뒤의 쓰기를 모두 막지 않고, 캐시와 DB에서 다시 읽은 값이 같다.
+    """
+    if isinstance(value, _JSON_SCALARS):
+        return value
+    try:
+        return json.loads(json.dumps(value, ensure_ascii=False, default=str))
+    except (TypeError, ValueError):  # 문자열로 바꿀 수 없는 키, 순환 참조
+        return str(value)
+
+
+_RESULTS = _Codebook()
+_MISSION_TYPES = _Codebook()
+_DIFFICULTIES = _Codebook()
+
+# payload 키 → (슬롯, 코드북). 코드북이 None이면 문자열을 공유(intern)해서 저장
+_EVENT_FIELDS: Tuple[Tuple[str, str, Optional[_Codebook]], ...] = (
+    ("mission", "mission", None),
+    ("missionType", "mission_type", _MISSION_TYPES),
+    ("difficulty", "difficulty", _DIFFICULTIES),
+    ("mission_result", "result", _RESULTS),
+    ("fail_reason", "fail_reason", None),
+    ("condition", "condition", None),
+    ("schedule", "schedule", None),
+)
+_EVENT_SLOTS = {key: (slot, codebook) for key, slot, codebook in _EVENT_FIELDS}
+_RESULT_SUCCESS = _RESULTS.encode("success")
+_RESULT_FAIL = _RESULTS.encode("fail")
+
+
+class UserEvent:
+    """
+    유저 이벤트 하나. 요약에 쓰는 필드는 슬롯(결과/타입/난이도는 코드)으로,
+    나머지 키는 extra에 (key1, value1, key2, value2, ...) 평탄한 튜플로 둔다 (None 값은 저장하지 않음).
+    """
+
+    __slots__ = ("ts", "mission", "mission_type", "difficulty", "result", "fail_reason", "condition", "schedule", "extra")
+
+    def __init__(self, ts: float) -> None:
+        self.ts = ts
+        self.mission = self.mission_type = self.difficulty = self.result = None
+        self.fail_reason = self.condition = self.schedule = None
+        self.extra: Optional[Tuple[Any, ...]] = None
+
+    @classmethod
+    def from_dict(cls, event: Dict[str, Any], ts: float) -> "UserEvent":
+        self = cls(ts)
+        extra: Optional[List[Any]] = None
+        for key, value in event.items():
+            if value is None or key == "ts":
+                continue
+            key, value = str(key), _json_value(value)
+            spec = _EVENT_SLOTS.get(key)
+            if spec is not None:
+                slot, codebook = spec
+                if codebook is None:
+                    setattr(self, slot, _intern(value))
+                    continue
+                code = codebook.encode(value)
+                if code is not None:
+                    setattr(self, slot, code)
+                    continue
+            # payload는 같은 빌더가 같은 키 순서로 만들므로 순서를 그대로 둔다 (same_content 비교용)
+            if extra is None:
+                extra = []
+            extra.append(_intern(key))
+            extra.append(_intern(value))
+        if extra:
+            self.extra = tuple(extra)
+        return self
+
+    def _extra_items(self) -> Iterator[Tuple[str, Any]]:
+        extra = self.extra or ()
+        return zip(extra[::2], extra[1::2])
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """payload 키 이름으로 값 조회 (코드는 원래 문자열로)."""
+        for field_key, slot, codebook in _EVENT_FIELDS:
+            if field_key == key:
+                value = getattr(self, slot)
+                if value is None:
+                    break
+                return codebook.decode(value) if codebook is not None else value
+        for extra_key, value in self._extra_items():
+            if extra_key == key:
+                return value
+        return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        event: Dict[str, Any] = {}
+        for key, slot, codebook in _EVENT_FIELDS:
+            value = getattr(self, slot)
+            if value is not None:
+                event[key] = codebook.decode(value) if codebook is not None else value
+        event.update(self._extra_items())
+        event["ts"] = self.ts
+        return event
+
+    def same_content(self, other: "UserEvent") -> bool:
+        return (
+            self.mission == other.mission
+            and self.mission_type == other.mission_type
+            and self.difficulty == other.difficulty
+            and self.result == other.result
+            and self.fail_reason == other.fail_reason
+            and self.condition == other.condition
+            and self.schedule == other.schedule
+            and self.extra == other.extra
+        )
+
+
+class EventRing:
+    """최근 이벤트 capacity개만 두는 링 버퍼. 다 차기 전까지는 필요한 만큼만 자라고, 찬 뒤에는 가장 오래된 칸을 덮어쓴다."""
+
+    __slots__ = ("_items", "_head")
+
+    def __init__(self) -> None:
+        self._items: List[UserEvent] = []
+        self._head = 0  # 다 찬 뒤 가장 오래된 이벤트의 위치
+
+    def append(self, event: UserEvent, capacity: int = MAX_USER_EVENTS) -> None:
+        if len(self._items) < capacity:
+            self._items.append(event)
+        else:
+            self._items[self._head] = event
+            self._head = (self._head + 1) % len(self._items)
+
+    def last(self) -> Optional[UserEvent]:
+        if not self._items:
+            return None
+        return self._items[self._head - 1]
+
+    def recent(self, n: int) -> List[UserEvent]:
+        """최근 n개 (오래된 것부터)."""
+        return list(self)[-n:] if n > 0 else []
+
+    def __iter__(self) -> Iterator[UserEvent]:
+        items, head = self._items, self._head
+        return itertools.chain(itertools.islice(items, head, None), itertools.islice(items, head))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class UserRecord:
+    __slots__ = ("preferences", "events", "success", "fail", "updated_at", "version", "rendered")
+
+    def __init__(self, now: float, version: int) -> None:
+        self.preferences: Dict[str, Any] = {}
+        self.events = EventRing()
+        self.success = 0
+        self.fail = 0
+        self.updated_at = now
+        self.version = version
+        self.rendered: Optional[Tuple[int, Any]] = None  # (렌더링 당시 version, renderer 결과)
+
+    def render(self, renderer: Callable[["UserRecord"], T]) -> T:
+        """renderer(self) 결과. version이 그대로면 지난 결과를 재사용한다."""
+        rendered = self.rendered
+        if rendered is None or rendered[0] != self.version:
+            rendered = self.rendered = (self.version, renderer(self))
+        return rendered[1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """읽기용 사본 (read()의 반환 형식)."""
+        return {
+            "preferences": dict(self.preferences),
+            "events": [event.to_dict() for event in self.events],
+            "stats": {"success": self.success, "fail": self.fail},
+            "updated_at": self.updated_at,
+            "version": self.version,
+        }
+
+
+def new_user_record(now: float, version: int) -> UserRecord:
+    return UserRecord(now, version)
+
+
+def approx_record_bytes(record: UserRecord) -> int:
+    """레코드 하나의 대략적인 메모리 크기 (공유되는 문자열/작은 정수도 그대로 셈 → 실제보다 크게 나옴)."""
+    size = sys.getsizeof(record) + sys.getsizeof(record.events) + sys.getsizeof(record.events._items)
+    size += sys.getsizeof(record.preferences)
+    for k, v in record.preferences.items():
+        size += sys.getsizeof(k) + sys.getsizeof(v)
+    for event in record.events:
+        size += sys.getsizeof(event)
+        for slot in UserEvent.__slots__:
+            value = getattr(event, slot)
+            if isinstance(value, str):
+                size += sys.getsizeof(value)
+        if event.extra:
+            size += sys.getsizeof(event.extra) + sum(sys.getsizeof(item) for item in event.extra)
+    return size
+
+
+class _ByteEstimate:
+    """조각마다 최근 갱신 레코드 몇 개의 크기를 재서 전체 레코드 수로 늘려 잡는다 (조각 락 안에서 add 호출)."""
+
+    def __init__(self) -> None:
+        self.sampled = 0
+        self.sample_bytes = 0
+
+    def add(self, records: Any) -> None:
+        for record in itertools.islice(reversed(records), _BYTES_SAMPLE_PER_STRIPE):
+            self.sampled += 1
+            self.sample_bytes += approx_record_bytes(record)
+
+    def total(self, count: int) -> int:
+        return int(self.sample_bytes / self.sampled * count) if self.sampled else 0
+
+
+def copy_user_record(record: UserRecord) -> Dict[str, Any]:
+    return record.to_dict()
+
+
+@dataclass
+class UserDelta:
+    """레코드에 실제로 반영된 변경분 (SQLite 배치 쓰기 단위)."""
+    preferences: Dict[str, Any] = field(default_factory=dict)
+    events: List[UserEvent] = field(default_factory=list)
+    success: int = 0
+    fail: int = 0
+
+    def merge(self, other: "UserDelta") -> None:
+        self.preferences.update(other.preferences)
+        self.events.extend(other.events)
+        self.success += other.success
+        self.fail += other.fail
+
+
+def apply_user_payload(record: UserRecord, payload: Optional[Dict[str, Any]], now: float) -> Optional[UserDelta]:
+    """
+    payload를 레코드에 반영하고, 내용이 바뀌었으면 변경분을 반환 (version은 저장소가 올림).
+    직전과 같은 이벤트(재시도/중복 요청)는 다시 쌓지 않는다.
+    """
+    record.updated_at = now
+    if not payload:
+        return None
+
+    delta = UserDelta()
+    preferences = payload.get("preferences") or {}
+    if isinstance(preferences, dict):
+        for k, v in preferences.items():
+            k, v = str(k), _json_value(v)
+            if record.preferences.get(k, _MISSING) != v:
+                record.preferences[_intern(k)] = _intern(v)
+                delta.preferences[k] = v
+
+    event = payload.get("event")
+    if isinstance(event, dict):
+        candidate = UserEvent.from_dict(event, now)
+        last_event = record.events.last()
+        if last_event is None or not last_event.same_content(candidate):
+            record.events.append(candidate)
+            delta.events.append(candidate)
+
+            if candidate.result == _RESULT_SUCCESS:
+                record.success += 1
+                delta.success += 1
+            elif candidate.result == _RESULT_FAIL:
+                record.fail += 1
+                delta.fail += 1
+
+    return delta if delta.preferences or delta.events else None
+
+
+class UserContextStore(ABC):
+    """유저 컨텍스트 저장소 인터페이스."""
+
+    backend = "base"
+
+    @abstractmethod
+    def ensure(self, user_id: str) -> None:
+        """레코드가 없으면(또는 만료됐으면) 빈 레코드를 만든다."""
+
+    @abstractmethod
+    def update(self, user_id: str, payload: Optional[Dict[str, Any]]) -> bool:
+        """payload 반영. 내용이 바뀌어 version이 올랐으면 True."""
+
+    @abstractmethod
+    def read(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """레코드 사본 dict (preferences / events / stats / updated_at / version, 없거나 만료됐으면 None)."""
+
+    @abstractmethod
+    def version(self, user_id: str) -> int:
+        """레코드 version (없으면 0)."""
+
+    @abstractmethod
+    def render(self, user_id: str, renderer: Callable[[UserRecord], T]) -> Optional[T]:
+        """
+        renderer(record) 결과 (없거나 만료됐으면 None). 결과는 레코드에 캐시되고 version이 오를 때만 다시 렌더링된다.
+        renderer는 조각 락 안에서 실행되므로 레코드를 바꾸거나 I/O를 하면 안 된다.
+        """
+
+    def flush(self) -> None:
+        """모아 둔 쓰기를 기록 (인메모리는 no-op)."""
+
+    def sweep(self) -> int:
+        """만료된 레코드를 조금씩 지우고 지운 수를 반환 (백그라운드 스위퍼가 주기적으로 호출)."""
+        return 0
+
+    @abstractmethod
+    def snapshot(self) -> Dict[str, Any]:
+        """레코드 수 / 대략적인 메모리 / 카운터 (/ai/metrics용)."""
+
+
+# -----------------------------------------------------------------------------
+# In-memory (process local)
+# -----------------------------------------------------------------------------
+class _Stripe:
+    """user_id 해시로 나눈 저장소 조각. 락은 조각마다 하나라 다른 조각의 유저끼리는 서로 기다리지 않는다."""
+
+    __slots__ = ("lock", "records", "evicted_expired", "evicted_lru")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.records: "OrderedDict[str, UserRecord]" = OrderedDict()  # 마지막 갱신 순서
+        self.evicted_expired = 0
+        self.evicted_lru = 0
+
+
+def _per_stripe_cap(max_users: int, stripes: int) -> int:
+    return -(-max_users // stripes) if max_users > 0 else 0
+
+
+class InMemoryUserStore(UserContextStore):
+    backend = "memory"
+
+    def __init__(
+        self,
+        ttl_seconds: float = USER_TTL_SECONDS,
+        stripes: int = DEFAULT_LOCK_STRIPES,
+        max_users: int = DEFAULT_MAX_USERS,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max(0, max_users)
+        self._stripes = [_Stripe() for _ in range(max(1, stripes))]
+        self._stripe_cap = _per_stripe_cap(self.max_users, len(self._stripes))
+        # 레코드 내용이 바뀔 때마다 새 번호 (프로세스 내 단조 증가 → 레코드가 재생성돼도 재사용되지 않음)
+        self._versions = itertools.count(1)
+        self._sweeps = 0
+
+    def _stripe(self, user_id: str) -> _Stripe:
+        return self._stripes[hash(user_id) % len(self._stripes)]
+
+    def _get_live_locked(self, stripe: _Stripe, user_id: str) -> Optional[UserRecord]:
+        record = stripe.records.get(user_id)
+        if record is not None and _now_ts() - record.updated_at > self.ttl_seconds:
+            del stripe.records[user_id]
+            stripe.evicted_expired += 1
+            return None
+        return record
+
+    def _ensure_locked(self, stripe: _Stripe, user_id: str) -> UserRecord:
+        record = self._get_live_locked(stripe, user_id)
+        if record is None:
+            record = stripe.records[user_id] = new_user_record(_now_ts(), next(self._versions))
+            if self._stripe_cap and len(stripe.records) > self._stripe_cap:
+                stripe.records.popitem(last=False)
+                stripe.evicted_lru += 1
+        return record
+
+    def ensure(self, user_id: str) -> None:
+        stripe = self._stripe(user_id)
+        with stripe.lock:
+            self._ensure_locked(stripe, user_id)
+
+    def update(self, user_id: str, payload: Optional[Dict[str, Any]]) -> bool:
+        stripe = self._stripe(user_id)
+        with stripe.lock:
+            record = self._ensure_locked(stripe, user_id)
+            changed = apply_user_payload(record, payload, _now_ts()) is not None
+            stripe.records.move_to_end(user_id)  # updated_at이 바뀌었으므로 갱신 순서 유지
+            if changed:
+                record.version = next(self._versions)
+            return changed
+
+    def read(self, user_id: str) -> Optional[Dict[str, Any]]:
+        stripe = self._stripe(user_id)
+        with stripe.lock:
+            record = self._get_live_locked(stripe, user_id)
+            return copy_user_record(record) if record is not None else None
+
+    def version(self, user_id: str) -> int:
+        stripe = self._stripe(user_id)
+        with stripe.lock:
+            record = self._get_live_locked(stripe, user_id)
+            return record.version if record is not None else 0
+
+    def render(self, user_id: str, renderer: Callable[[UserRecord], T]) -> Optional[T]:
+        stripe = self._stripe(user_id)
+        with stripe.lock:
+            record = self._get_live_locked(stripe, user_id)
+            return record.render(renderer) if record is not None else None
+
+    def sweep(self) -> int:
+        evicted = 0
+        for stripe in self._stripes:
+            while True:
+                with stripe.lock:
+                    cutoff = _now_ts() - self.ttl_seconds
+                    removed = 0
+                    while removed < _SWEEP_BATCH and stripe.records:
+                        oldest = next(iter(stripe.records.values()))
+                        if oldest.updated_at >= cutoff:
+                            break
+                        stripe.records.popitem(last=False)
+                        removed += 1
+                    stripe.evicted_expired += removed
+                evicted += removed
+                if removed < _SWEEP_BATCH:
+                    break
+        self._sweeps += 1
+        return evicted
+
+    def snapshot(self) -> Dict[str, Any]:
+        users = evicted_expired = evicted_lru = 0
+        estimate = _ByteEstimate()
+        for stripe in self._stripes:
+            with stripe.lock:
+                users += len(stripe.records)
+                evicted_expired += stripe.evicted_expired
+                evicted_lru += stripe.evicted_lru
+                estimate.add(stripe.records.values())
+        return {
+            "backend": self.backend,
+            "users": users,
+            "max_users": self.max_users,
+            "approx_bytes": estimate.total(users),
+            "lock_stripes": len(self._stripes),
+            "evicted_expired": evicted_expired,
+            "evicted_lru": evicted_lru,
+            "sweeps": self._sweeps,
+        }
+
+
+# -----------------------------------------------------------------------------
+# SQLite (shared by all workers on a host)
+# -----------------------------------------------------------------------------
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id    TEXT PRIMARY KEY,
+    version    INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    success    INTEGER NOT NULL DEFAULT 0,
+    fail       INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS user_preferences (
+    user_id TEXT NOT NULL,
+    key     TEXT NOT NULL,
+    value   TEXT NOT NULL,
+    PRIMARY KEY (user_id, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS user_events (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    event   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS user_events_user ON user_events (user_id, id);
+CREATE INDEX IF NOT EXISTS users_updated_at ON users (updated_at);
+"""
+
+
+def _next_version(previous: int) -> int:
+    # 워커 사이에서도 겹치지 않도록 시각(us) 기반, 같은 레코드 안에서는 항상 증가
+    return max(previous + 1, time.time_ns() // 1000)
+
+
+@dataclass
+class _PendingWrite:
+    version: int
+    updated_at: float
+    delta: UserDelta
+
+
+def _apply_pending(record: Optional[UserRecord], write: _PendingWrite) -> UserRecord:
+    """DB에서 읽은 레코드 위에 아직 기록하지 않은 변경분을 다시 얹는다."""
+    delta = write.delta
+    if record is None:
+        record = new_user_record(write.updated_at, write.version)
+    elif delta.preferences or delta.events:
+        # 합친 내용은 DB 행과 다르므로 DB version과 겹치지 않게 올린다
+        record.version = max(write.version, record.version + 1)
+    record.preferences.update((_intern(k), _intern(v)) for k, v in delta.preferences.items())
+    for event in delta.events:
+        record.events.append(event)
+    record.success += delta.success
+    record.fail += delta.fail
+    record.updated_at = max(record.updated_at, write.updated_at)
+    return record
+
+
+class _CacheStripe:
+    """SQLite 저장소의 프로세스 로컬 캐시 조각 (락 하나 + 캐시 + 아직 기록하지 않은 변경분)."""
+
+    __slots__ = ("lock", "cache", "pending", "cache_hits", "db_reads", "evicted_stale", "evicted_lru")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        # user -> (record | None, loaded_at), 읽어 온(또는 만든) 순서
+        self.cache: "OrderedDict[str, Tuple[Optional[UserRecord], float]]" = OrderedDict()
+        self.pending: Dict[str, _PendingWrite] = {}
+        self.cache_hits = 0
+        self.db_reads = 0
+        self.evicted_stale = 0
+        self.evicted_lru = 0
+
+
+class SQLiteUserStore(UserContextStore):
+    backend = "sqlite"
+
+    def __init__(
+        self,
+        path: str,
+        cache_seconds: float = 2.0,
+        flush_seconds: float = 0.5,
+        batch_size: int = 64,
+        ttl_seconds: float = USER_TTL_SECONDS,
+        stripes: int = DEFAULT_LOCK_STRIPES,
+        max_users: int = DEFAULT_MAX_USERS,
+    ) -> None:
+        self.path = path
+        self.cache_seconds = cache_seconds
+        self.flush_seconds = flush_seconds
+        self.batch_size = max(1, batch_size)
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max(0, max_users)  # 로컬 캐시 상한 (DB는 TTL로만 정리)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._db_lock = threading.Lock()
+
+        self._stripes = [_CacheStripe() for _ in range(max(1, stripes))]
+        self._stripe_cap = _per_stripe_cap(self.max_users, len(self._stripes))
+        self._counters = {"flushes": 0, "flushed_users": 0, "expired_deleted": 0, "sweeps": 0}  # _db_lock 아래에서만 갱신
+        self._wakeup = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="user-store-flush", daemon=True)
+        self._flusher.start()
+
+    def _stripe(self, user_id: str) -> _CacheStripe:
+        return self._stripes[hash(user_id) % len(self._stripes)]
+
+    # --- reads ---------------------------------------------------------------
+    def _load_locked(self, user_id: str) -> Optional[UserRecord]:
+        """DB에서 레코드를 읽는다 (_db_lock을 잡은 상태에서 호출)."""
+        row = self._conn.execute(
+            "SELECT version, updated_at, success, fail FROM users WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        version, updated_at, success, fail = row
+        if _now_ts() - updated_at > self.ttl_seconds:
+            self._delete_user_locked(user_id)
+            return None
+        prefs = self._conn.execute(
+            "SELECT key, value FROM user_preferences WHERE user_id = ?", (user_id,)
+        ).fetchall()
+        events = self._conn.execute(
+            "SELECT event FROM user_events WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+            (user_id, MAX_USER_EVENTS),
+        ).fetchall()
+        record = UserRecord(updated_at, version)
+        record.preferences = {_intern(k): _intern(json.loads(v)) for k, v in prefs}
+        for (raw,) in reversed(events):
+            event = json.loads(raw)
+            record.events.append(UserEvent.from_dict(event, event.pop("ts", updated_at)))
+        record.success, record.fail = success, fail
+        return record
+
+    def _delete_user_locked(self, user_id: str) -> None:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table in ("users", "user_preferences", "user_events"):
+                self._conn.execute(f"DELETE FROM {table} WHERE user_id = ?", (user_id,))
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _cached_locked(
+        self, stripe: _CacheStripe, user_id: str, now: float, require_fresh: bool
+    ) -> Tuple[bool, Optional[UserRecord]]:
+        """(캐시에 있었는지, 레코드). 만료된 레코드는 None으로 본다."""
+        cached = stripe.cache.get(user_id)
+        if cached is None or (require_fresh and now - cached[1] >= self.cache_seconds):
+            return False, None
+        record = cached[0]
+        if record is not None and now - record.updated_at > self.ttl_seconds:
+            record = None
+        return True, record
+
+    def _refresh(self, stripe: _CacheStripe, user_id: str) -> None:
+        """
+        캐시 미스/만료 → DB에서 다시 읽어 캐시를 채운다. 이 프로세스의 미기록 변경분(pending)은
+        flush하지 않고 읽어 온 레코드 위에 합친다. flush도 pending을 _db_lock 안에서 가져가므로
+        _db_lock을 잡고 읽는 동안에는 "pending에서는 빠졌지만 아직 DB에 없는" 변경이 없다.
+        """
+        with self._db_lock:
+            started = _now_ts()
+            record = self._load_locked(user_id)
+            with stripe.lock:
+                stripe.db_reads += 1
+                cached = stripe.cache.get(user_id)
+                # 읽는 동안 같은 프로세스의 다른 요청이 캐시를 채웠으면 그쪽을 유지
+                if cached is not None and cached[1] >= started:
+                    return
+                write = stripe.pending.get(user_id)
+                if write is not None:
+                    record = _apply_pending(record, write)
+                # 다시 읽은 레코드는 렌더링 캐시 없이 시작한다 (version이 같아도 다른 워커의 쓰기와
+                # 합쳐진 내용일 수 있으므로 이전 렌더링을 옮기지 않음)
+                self._cache_put_locked(stripe, user_id, record, _now_ts())
+
+    def _cache_put_locked(
+        self, stripe: _CacheStripe, user_id: str, record: Optional[UserRecord], now: float
+    ) -> None:
+        stripe.cache[user_id] = (record, now)
+        stripe.cache.move_to_end(user_id)
+        if self._stripe_cap and len(stripe.cache) > self._stripe_cap:
+            # 내보낸 유저에 미기록 변경이 있어도 pending에 남아 있고 다음 읽기(_refresh)가 다시 합친다
+            stripe.cache.popitem(last=False)
+            stripe.evicted_lru += 1
+
+    def _with_record(self, user_id: str, fn: Callable[[_CacheStripe, Optional[UserRecord], float], T]) -> T:
+        """fn(stripe, record, now)을 조각 락 안에서 실행. 캐시 hit이면 락은 한 번만 잡는다."""
+        stripe = self._stripe(user_id)
+        with stripe.lock:
+            now = _now_ts()
+            hit, record = self._cached_locked(stripe, user_id, now, require_fresh=True)
+            if hit:
+                stripe.cache_hits += 1
+                return fn(stripe, record, now)
+        self._refresh(stripe, user_id)
+        with stripe.lock:
+            now = _now_ts()
+            _, record = self._cached_locked(stripe, user_id, now, require_fresh=False)
+            return fn(stripe, record, now)
+
+    def read(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self._with_record(
+            user_id, lambda stripe, record, now: copy_user_record(record) if record is not None else None
+        )
+
+    def version(self, user_id: str) -> int:
+        return self._with_record(user_id, lambda stripe, record, now: record.version if record is not None else 0)
+
+    def render(self, user_id: str, renderer: Callable[[UserRecord], T]) -> Optional[T]:
+        return self._with_record(
+            user_id, lambda stripe, record, now: record.render(renderer) if record is not None else None
+        )
+
+    # --- writes --------------------------------------------------------------
+    def _ensure_locked(
+        self, stripe: _CacheStripe, user_id: str, record: Optional[UserRecord], now: float
+    ) -> UserRecord:
+        if record is None:
+            record = new_user_record(now, _next_version(0))
+            self._cache_put_locked(stripe, user_id, record, now)
+            self._queue_locked(stripe, user_id, record, UserDelta())
+        return record
+
+    def _queue_locked(self, stripe: _CacheStripe, user_id: str, record: UserRecord, delta: UserDelta) -> None:
+        pending = stripe.pending.get(user_id)
+        if pending is None:
+            stripe.pending[user_id] = _PendingWrite(record.version, record.updated_at, delta)
+            # 배치 크기는 조각별로 센다 (전체 pending 수를 세려면 공용 락이 필요하므로)
+            if len(stripe.pending) >= self.batch_size:
+                self._wakeup.set()
+        else:
+            pending.version = record.version
+            pending.updated_at = record.updated_at
+            pending.delta.merge(delta)
+
+    def ensure(self, user_id: str) -> None:
+        self._with_record(user_id, lambda stripe, record, now: self._ensure_locked(stripe, user_id, record, now))
+
+    def update(self, user_id: str, payload: Optional[Dict[str, Any]]) -> bool:
+        def apply(stripe: _CacheStripe, record: Optional[UserRecord], now: float) -> bool:
+            record = self._ensure_locked(stripe, user_id, record, now)
+            delta = apply_user_payload(record, payload, now)
+            if delta is not None:
+                record.version = _next_version(record.version)
+            self._queue_locked(stripe, user_id, record, delta or UserDelta())
+            return delta is not None
+
+        return self._with_record(user_id, apply)
+
+    def _flush_loop(self) -> None:
+        # 디스크 쓰기는 이 스레드에서만 (요청 스레드는 캐시에 반영하고 바로 반환)
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                # 변경분은 pending으로 되돌려졌으므로 다음 주기에 다시 시도 (스레드가 죽으면 이후 쓰기가 기록되지 않음)
+                logger.exception("user store flush failed")
+
+    def flush(self) -> None:
+        with self._db_lock:
+            # pending을 가져가는 것부터 기록까지 _db_lock 안에서 (_refresh가 중간 상태를 보지 않도록)
+            pending: Dict[str, _PendingWrite] = {}
+            for stripe in self._stripes:
+                with stripe.lock:
+                    if stripe.pending:
+                        pending.update(stripe.pending)
+                        stripe.pending = {}
+            if not pending:
+                return
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for user_id, write in pending.items():
+                    self._write_user_locked(user_id, write)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                self._requeue(pending)
+                raise
+            self._counters["flushes"] += 1
+            self._counters["flushed_users"] += len(pending)
+
+    def _requeue(self, pending: Dict[str, _PendingWrite]) -> None:
+        """기록에 실패한 변경을 되돌려 다음 flush에서 다시 시도."""
+        for user_id, write in pending.items():
+            stripe = self._stripe(user_id)
+            with stripe.lock:
+                newer = stripe.pending.get(user_id)
+                if newer is not None:
+                    write.delta.merge(newer.delta)
+                    write.version, write.updated_at = newer.version, newer.updated_at
+                stripe.pending[user_id] = write
+
+    def _write_user_locked(self, user_id: str, write: _PendingWrite) -> None:
+        delta = write.delta
+        self._conn.execute(
+            "INSERT INTO users (user_id, version, updated_at, success, fail) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET "
+            # 내용이 바뀌는 기록은 DB와 이 워커의 version 중 큰 값보다 1 크게 → 합쳐진 행의 version은
+            # 어느 워커가 캐시해 둔 version과도 겹치지 않아, 다시 읽으면 version 기반 캐시(응답 캐시)가 갱신된다
+            "version = CASE WHEN ? THEN MAX(version, excluded.version) + 1 ELSE version END, "
+            "updated_at = MAX(updated_at, excluded.updated_at), "
+            "success = success + excluded.success, fail = fail + excluded.fail",
+            (user_id, write.version, write.updated_at, delta.success, delta.fail,
+             bool(delta.preferences or delta.events)),
+        )
+        if delta.preferences:
+            self._conn.executemany(
+                "INSERT INTO user_preferences (user_id, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id, key) DO UPDATE SET value = excluded.value",
+                [(user_id, k, json.dumps(v, ensure_ascii=False)) for k, v in delta.preferences.items()],
+            )
+        if delta.events:
+            self._conn.executemany(
+                "INSERT INTO user_events (user_id, event) VALUES (?, ?)",
+                [(user_id, json.dumps(e.to_dict(), ensure_ascii=False)) for e in delta.events[-MAX_USER_EVENTS:]],
+            )
+            self._conn.execute(
+                "DELETE FROM user_events WHERE user_id = ? AND id <= "
+                "(SELECT id FROM user_events WHERE user_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (user_id, user_id, MAX_USER_EVENTS),
+            )
+
+    def sweep(self) -> int:
+        # 캐시 시간이 지난 항목은 어차피 DB에서 다시 읽으므로 메모리에 둘 이유가 없다
+        evicted = 0
+        for stripe in self._stripes:
+            while True:
+                with stripe.lock:
+                    now = _now_ts()
+                    removed = 0
+                    while removed < _SWEEP_BATCH and stripe.cache:
+                        _, loaded_at = next(iter(stripe.cache.values()))
+                        if now - loaded_at < self.cache_seconds:
+                            break
+                        stripe.cache.popitem(last=False)
+                        removed += 1
+                    stripe.evicted_stale += removed
+                evicted += removed
+                if removed < _SWEEP_BATCH:
+                    break
+
+        # DB의 만료 유저 (다른 워커가 다시 찾지 않는 유저도 여기서 정리됨)
+        while True:
+            with self._db_lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    expired = [row[0] for row in self._conn.execute(
+                        "SELECT user_id FROM users WHERE updated_at < ? LIMIT ?",
+                        (_now_ts() - self.ttl_seconds, _SWEEP_BATCH),
+                    )]
+                    if expired:
+                        marks = ", ".join("?" * len(expired))
+                        for table in ("users", "user_preferences", "user_events"):
+                            self._conn.execute(f"DELETE FROM {table} WHERE user_id IN ({marks})", expired)
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._counters["expired_deleted"] += len(expired)
+            evicted += len(expired)
+            if len(expired) < _SWEEP_BATCH:
+                break
+        with self._db_lock:
+            self._counters["sweeps"] += 1
+        return evicted
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._db_lock:
+            users = self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+            counters = dict(self._counters)
+        cached = pending = cache_hits = db_reads = evicted_stale = evicted_lru = 0
+        estimate = _ByteEstimate()
+        for stripe in self._stripes:
+            with stripe.lock:
+                cached += len(stripe.cache)
+                pending += len(stripe.pending)
+                cache_hits += stripe.cache_hits
+                db_reads += stripe.db_reads
+                evicted_stale += stripe.evicted_stale
+                evicted_lru += stripe.evicted_lru
+                estimate.add([record for record, _ in stripe.cache.values() if record is not None])
+        return {
+            "backend": self.backend,
+            "path": self.path,
+            "users": users,
+            "lock_stripes": len(self._stripes),
+            "cached_users": cached,
+            "max_cached_users": self.max_users,
+            "approx_bytes": estimate.total(cached),
+            "pending_users": pending,
+            "cache_hits": cache_hits,
+            "db_reads": db_reads,
+            "evicted_stale": evicted_stale,
+            "evicted_lru": evicted_lru,
+            **counters,
+        }
+
+
+def _env_float(key: str, default: float) -> float:
+    raw = os.environ.get(key)
+    if raw:
+        try:
+            return float(raw)
+        except ValueError:
+            pass
+    return default
+
+
+def _sweep_loop(store: UserContextStore, interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            store.sweep()
+        except Exception:
+            logger.exception("user store sweep failed")
+
+
+def start_sweeper(store: UserContextStore, interval: float) -> threading.Thread:
+    """store.sweep()을 interval초마다 호출하는 데몬 스레드."""
+    thread = threading.Thread(target=_sweep_loop, args=(store, interval), name="user-store-sweep", daemon=True)
+    thread.start()
+    return thread
+
+
+_CACHED_USER_STORE: Optional[UserContextStore] = None
+_USER_STORE_INIT_LOCK = threading.Lock()
+
+
+def get_user_store() -> UserContextStore:
+    """USER_STORE_DB_PATH가 있으면 SQLite, 없으면 인메모리 저장소."""
+    global _CACHED_USER_STORE
+    if _CACHED_USER_STORE is None:
+        with _USER_STORE_INIT_LOCK:
+            if _CACHED_USER_STORE is None:
+                stripes = max(1, int(_env_float("USER_STORE_LOCK_STRIPES", DEFAULT_LOCK_STRIPES)))
+                max_users = max(0, int(_env_float("USER_STORE_MAX_USERS", DEFAULT_MAX_USERS)))
+                store: UserContextStore
+                path = os.environ.get("USER_STORE_DB_PATH")
+                if path:
+                    store = SQLiteUserStore(
+                        path,
+                        cache_seconds=_env_float("USER_STORE_CACHE_SECONDS", 2.0),
+                        flush_seconds=_env_float("USER_STORE_FLUSH_SECONDS", 0.5),
+                        batch_size=int(_env_float("USER_STORE_BATCH_SIZE", 64)),
+                        stripes=stripes,
+                        max_users=max_users,
+                    )
+                    atexit.register(store.flush)
+                else:
+                    store = InMemoryUserStore(stripes=stripes, max_users=max_users)
+                sweep_seconds = _env_float("USER_STORE_SWEEP_SECONDS", 60.0)
+                if sweep_seconds > 0:
+                    start_sweeper(store, sweep_seconds)
+                _CACHED_USER_STORE = store
+    return _CACHED_USER_STORE